@@ -0,0 +1,64 @@
+"""Throwaway benchmark database with synthetic catalogues of movies.
+
+Catalogues of given sizes are created by copying the IMDb dataset in the benchmark
+database (see config.LocalBenchmarkConfig), which is created again for every benchmark run.
+Copies share names with the dataset, so benchmarks of name searches can use synthetic
+catalogues with distinct names instead, see semwork.synthetic.
+"""
+
+from sqlalchemy import text
+from sqlalchemy_utils import create_database, database_exists, drop_database
+
+import config
+from semwork import create_app
+from semwork.extensions import db
+from semwork.import_data import load_dataset
+from semwork.movies.links import link_movies
+from semwork.synthetic import generate_movies
+
+COPY_MOVIES = """
+INSERT INTO movie (name, unaccented_name, slug, poster_link, release_year, certificate, runtime, genre,
+                   imdb_rating, summary, meta_score, director, star1, star2, star3, star4, no_of_votes, gross_earned)
+SELECT name || ' ' || copy, unaccented_name || ' ' || copy, slug || '-' || copy, poster_link, release_year,
+       certificate, runtime, genre, imdb_rating, summary, meta_score, director, star1, star2, star3, star4,
+       no_of_votes, gross_earned
+FROM movie CROSS JOIN generate_series(1, :copies) AS copy
+ORDER BY copy, movie.id
+LIMIT :missing
+RETURNING id
+"""
+
+
+def create_benchmark_app(config_class=config.LocalBenchmarkConfig):
+    """Create empty benchmark database and app using it."""
+
+    if database_exists(config_class.SQLALCHEMY_DATABASE_URI):
+        drop_database(config_class.SQLALCHEMY_DATABASE_URI)
+    create_database(config_class.SQLALCHEMY_DATABASE_URI)
+
+    app = create_app(config_class=config_class)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed_catalogue(size, synthetic=False):
+    """Replace movies in database with given number of copies of the dataset or of synthetic movies."""
+
+    db.session.execute(text('TRUNCATE movie, watch_list, watch_later, import_checkpoint CASCADE'))
+    db.session.commit()
+    if synthetic:
+        generate_movies(db, size, seed=0)
+        base = size
+    else:
+        base = load_dataset(db, 'imdb_top_1000.csv')
+    if size < base:
+        db.session.execute(
+            text('DELETE FROM movie WHERE id NOT IN (SELECT id FROM movie ORDER BY id LIMIT :size)'), {'size': size}
+        )
+    elif size > base:
+        copied_ids = db.session.scalars(text(COPY_MOVIES), {'copies': size // base, 'missing': size - base}).all()
+        link_movies(db.session.connection(), copied_ids)
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
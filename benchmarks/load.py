@@ -0,0 +1,181 @@
+"""Load test comparing throughput of the sync app served by a threaded WSGI server
+and the app with async views served by uvicorn through semwork.asgi.
+
+A catalogue is created in the benchmark database, see benchmarks.catalogue, and both servers
+run in their own process with the page cache disabled, so every request queries the database.
+
+Usage: python -m benchmarks.load [--size 100000] [--concurrency 1 8 32] [--requests 400]
+"""
+
+import argparse
+import http.client
+import logging
+import random
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from sqlalchemy import select
+from werkzeug.serving import run_simple
+
+import config
+from benchmarks.catalogue import create_benchmark_app, seed_catalogue
+from benchmarks.recommendations import create_user
+from semwork import create_app
+from semwork.extensions import db
+from semwork.models.movie import Movie
+
+HOST = '127.0.0.1'
+PROMPTS = ['The Dark Knight', 'godfather', 'star wars', 'love', 'Amélie']
+
+
+class LoadSyncConfig(config.LocalBenchmarkConfig):  # pylint: disable=R0903; # flask config class
+    """Benchmark configuration without page cache."""
+
+    CACHE_BACKEND = None
+
+
+class LoadAsyncConfig(LoadSyncConfig):  # pylint: disable=R0903; # flask config class
+    """Benchmark configuration without page cache with async views."""
+
+    ASYNC_DATABASE = True
+
+
+def serve(mode, port):
+    """Serve the app in given mode until the process is terminated."""
+
+    if mode == 'sync':
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        run_simple(HOST, port, create_app(config_class=LoadSyncConfig), threaded=True)
+    else:
+        import uvicorn  # pylint: disable=C0415; # only needed by the served process
+        from semwork.asgi import create_asgi_app  # pylint: disable=C0415; # creates app of the async config
+
+        uvicorn.run(create_asgi_app(config_class=LoadAsyncConfig), host=HOST, port=port, log_level='warning')
+
+
+def request(port, method, path, headers=None, body=None):
+    """Send one request and return the response with its body read."""
+
+    connection = http.client.HTTPConnection(HOST, port, timeout=60)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        response.read()
+        return response
+    finally:
+        connection.close()
+
+
+def wait_for_server(port, timeout=30):
+    """Wait until the server answers requests."""
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            request(port, 'GET', '/movies/not-found')
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server on port {port} did not start')
+
+
+def login(port, username):
+    """Log in the user and return the session cookie."""
+
+    response = request(
+        port,
+        'POST',
+        '/users/login',
+        {'Content-Type': 'application/x-www-form-urlencoded'},
+        urlencode({'username': username, 'password': 'benchmark'}),
+    )
+    return response.getheader('Set-Cookie').split(';')[0]
+
+
+def request_paths(movies, count):
+    """Create mix of requested paths of browse, movie, search and home pages."""
+
+    rng = random.Random(count)
+    paths = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            paths.append(f'/movies/browse?after={rng.choice(movies)[0]}')
+        elif kind == 1:
+            movie_id, slug = rng.choice(movies)
+            paths.append(f'/movies/movie/{movie_id}-{slug}')
+        elif kind == 2:
+            paths.append('/movies/search-movie?' + urlencode({'search': rng.choice(PROMPTS)}))
+        else:
+            paths.append('/')
+    return paths
+
+
+def run_load(port, paths, cookie, concurrency):
+    """Request all paths by concurrent clients, return requests per second and latencies in milliseconds."""
+
+    def timed_request(path):
+        start = time.perf_counter()
+        response = request(port, 'GET', path, {'Cookie': cookie})
+        if response.status != 200:
+            raise RuntimeError(f'{path} returned {response.status}')
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        # warm up connections and in-process indexes
+        list(executor.map(timed_request, paths[: concurrency * 4]))
+        start = time.perf_counter()
+        latencies = list(executor.map(timed_request, paths))
+        elapsed = time.perf_counter() - start
+    return len(paths) / elapsed, latencies
+
+
+def main():
+    """Run the load test and print throughput table."""
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--serve', choices=['sync', 'async'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=8100)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    app = create_benchmark_app()
+    with app.app_context():
+        seed_catalogue(args.size)
+        username = create_user(args.size).username
+        movies = db.session.execute(select(Movie.id, Movie.slug).limit(5000)).all()
+    paths = request_paths(movies, args.requests)
+
+    print(f'{"mode":>6} {"clients":>8} {"req/s":>8} {"p50 ms":>9} {"p95 ms":>9}')
+    for offset, mode in enumerate(['sync', 'async']):
+        port = args.port + offset
+        server = subprocess.Popen(  # pylint: disable=R1732; # terminated below
+            [sys.executable, '-m', 'benchmarks.load', '--serve', mode, '--port', str(port)]
+        )
+        try:
+            wait_for_server(port)
+            cookie = login(port, username)
+            for concurrency in args.concurrency:
+                throughput, latencies = run_load(port, paths, cookie, concurrency)
+                p95 = statistics.quantiles(latencies, n=20)[-1]
+                print(
+                    f'{mode:>6} {concurrency:>8} {throughput:>8.1f}'
+                    f' {statistics.median(latencies):>9.2f} {p95:>9.2f}'
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
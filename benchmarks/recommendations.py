@@ -0,0 +1,86 @@
+"""Benchmark comparing latency of recommendations scored by the database and by NumPy.
+
+Catalogues are created in the benchmark database, see benchmarks.catalogue.
+
+Usage: python -m benchmarks.recommendations [--sizes 1000 100000 1000000] [--repeat 5]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from flask_login import login_user
+from sqlalchemy import func, select
+
+from benchmarks.catalogue import create_benchmark_app, seed_catalogue
+from semwork.extensions import db
+from semwork.home.services import get_new_recommendations
+from semwork.home.scoring import vector_scorer
+from semwork.models.movie import Movie
+from semwork.models.user import User
+from semwork.models.watch_list import WatchList
+
+HISTORY_LENGTH = 10
+
+
+def create_user(seed):
+    """Create user who has watched random movies."""
+
+    user = User(username=f'benchmark-{seed}', password='benchmark')
+    db.session.add(user)
+    db.session.flush()
+
+    rng = random.Random(seed)
+    max_id = db.session.scalar(select(func.max(Movie.id)))
+    min_id = db.session.scalar(select(func.min(Movie.id)))
+    watch_date = datetime(2024, 1, 1)
+    for movie_id in rng.sample(range(min_id, max_id + 1), HISTORY_LENGTH):
+        db.session.add(WatchList(user_id=user.id, movie_id=movie_id, date_watched=watch_date))
+        watch_date += timedelta(days=1)
+    db.session.commit()
+    return user
+
+
+def measure(scorer, repeat):
+    """Return latencies of recommendations in milliseconds."""
+
+    current_app.config['RECOMMENDATION_SCORER'] = scorer
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        get_new_recommendations()
+        latencies.append((time.perf_counter() - start) * 1000)
+        db.session.expunge_all()
+    return latencies
+
+
+def main():
+    """Run the benchmark and print latency table."""
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    with app.app_context(), app.test_request_context():
+        print(f'{"movies":>9} {"scorer":>7} {"p50 ms":>9} {"p95 ms":>9}')
+        for size in args.sizes:
+            seed_catalogue(size)
+            login_user(create_user(size))
+
+            start = time.perf_counter()
+            vector_scorer.columns()
+            print(f'{size:>9} {"load":>7} {(time.perf_counter() - start) * 1000:>9.2f}')
+
+            for scorer in ['sql', 'numpy']:
+                latencies = measure(scorer, args.repeat)
+                p95 = statistics.quantiles(latencies, n=20)[-1]
+                print(f'{size:>9} {scorer:>7} {statistics.median(latencies):>9.2f} {p95:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
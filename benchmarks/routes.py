@@ -0,0 +1,299 @@
+"""Benchmark of latency and throughput of every route of the app.
+
+Catalogues are created in the benchmark database, see benchmarks.catalogue, together with users
+whose watch histories have power-law lengths and prefer popular movies. Requests are sent by test
+clients of the app in this process, every concurrent client logged in as its own user, with the page
+cache disabled unless --cache is given. Results are printed and written as JSON, which can be compared
+with results of an earlier run to catch regressions.
+
+Usage: python -m benchmarks.routes [--sizes 1000 100000 1000000] [--requests 200] [--concurrency 1]
+                                   [--output results.json] [--compare baseline.json] [--threshold 0.2]
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from sqlalchemy import func, insert, select
+
+import config
+from benchmarks.catalogue import create_benchmark_app, seed_catalogue
+from semwork.extensions import db
+from semwork.home.services import rebuild_watch_again
+from semwork.models.movie import Movie
+from semwork.models.user import User
+from semwork.models.watch_list import WatchList
+
+PROMPTS = ['The Dark Knight', 'godfather', 'star wars', 'love', 'Christopher Nolan', 'Amélie']
+# longest watch history of benchmark users
+MAX_HISTORY = 500
+# movies requested by the benchmark, spread evenly over the whole catalogue
+MOVIE_SAMPLE = 5000
+
+
+class RoutesConfig(config.LocalBenchmarkConfig):  # pylint: disable=R0903; # flask config class
+    """Benchmark configuration without page cache."""
+
+    CACHE_BACKEND = None
+
+
+class CachedRoutesConfig(config.LocalBenchmarkConfig):  # pylint: disable=R0903; # flask config class
+    """Benchmark configuration with in-process page cache."""
+
+
+def create_users(count, seed):
+    """Create users with watch histories of power-law lengths, movies are picked by Zipf's law of popularity."""
+
+    rng = random.Random(seed)
+    # most voted movies are watched most often
+    movie_ids = db.session.scalars(select(Movie.id).order_by(Movie.no_of_votes.desc(), Movie.id)).all()
+    users = []
+    for i in range(count):
+        user = User(username=f'benchmark-{seed}-{i}', password='benchmark')
+        db.session.add(user)
+        db.session.flush()
+        length = min(int(rng.paretovariate(1.2) * 5), MAX_HISTORY)
+        watch_date = datetime(2024, 1, 1)
+        rows = []
+        for _ in range(length):
+            index = min(int(rng.paretovariate(1.0)) - 1, len(movie_ids) - 1)
+            rows.append({'user_id': user.id, 'movie_id': movie_ids[index], 'date_watched': watch_date})
+            watch_date += timedelta(hours=rng.randint(1, 72))
+        if rows:
+            db.session.execute(insert(WatchList), rows)
+        users.append(user)
+    # bulk inserts skip listeners of the watch list, which keep movies to watch again
+    rebuild_watch_again(db.session.connection(), [user.id for user in users])
+    usernames = [user.username for user in users]
+    db.session.commit()
+    return usernames
+
+
+def sample_movies(count):
+    """Get ids and slugs of count movies spread evenly over the catalogue ordered by ids."""
+
+    numbered = select(Movie.id, Movie.slug, func.row_number().over(order_by=Movie.id).label('number')).subquery()
+    step = max(db.session.scalar(select(func.count(Movie.id))) // count, 1)
+    return db.session.execute(
+        select(numbered.c.id, numbered.c.slug).where(numbered.c.number % step == 0).order_by(numbered.c.id).limit(count)
+    ).all()
+
+
+def login(client, username):
+    """Log in the test client as the user."""
+
+    response = client.post('/users/login', data={'username': username, 'password': 'benchmark'})
+    if response.status_code != 302:
+        raise RuntimeError(f'User {username} was not logged in')
+
+
+def read_requests(rng, movies):
+    """Create functions sending requests of read-only routes by their names."""
+
+    def browse(client):
+        return client.get(f'/movies/browse?after={rng.choice(movies)[0]}')
+
+    def movie(client):
+        movie_id, slug = rng.choice(movies)
+        return client.get(f'/movies/movie/{movie_id}-{slug}')
+
+    def search_movie(client):
+        return client.get('/movies/search-movie?' + urlencode({'search': rng.choice(PROMPTS)}))
+
+    def index(client):
+        return client.get('/')
+
+    def watch_history(client):
+        return client.get('/movies/watch-history')
+
+    return {
+        'browse': browse,
+        'movie': movie,
+        'search_movie': search_movie,
+        'index': index,
+        'watch_history': watch_history,
+    }
+
+
+def mutation_requests(rng, movies):
+    """Create functions sending requests of watch list mutations by their names.
+
+    Every added movie is removed again by the next request of the client, so repeated runs
+    keep watch lists of users unchanged. Functions returning None only prepare the next request.
+    """
+
+    def add_to_watch_list(client):
+        return client.post(f'/movies/add-to-watch-list/{rng.choice(movies)[0]}', data={'datewatched': '2024-06-01'})
+
+    def find_watch_list_record(client):
+        with client.application.app_context():
+            client.watch_list_record = db.session.scalar(
+                select(func.max(WatchList.id)).join(User).where(User.username == client.username)
+            )
+
+    def remove_from_watch_list(client):
+        return client.post(f'/movies/remove-from-watch-list/{client.watch_list_record}')
+
+    def add_to_watch_later(client):
+        client.watch_later = rng.choice(movies)[0]
+        return client.post(f'/movies/add-to-watch-later/{client.watch_later}')
+
+    def remove_from_watch_later(client):
+        return client.post(f'/movies/remove-from-watch-later/{client.watch_later}')
+
+    return {
+        'add_to_watch_list': add_to_watch_list,
+        'find_watch_list_record': find_watch_list_record,
+        'remove_from_watch_list': remove_from_watch_list,
+        'add_to_watch_later': add_to_watch_later,
+        'remove_from_watch_later': remove_from_watch_later,
+    }
+
+
+def percentile(latencies, percent):
+    """Get percentile of latencies."""
+
+    return statistics.quantiles(latencies, n=100, method='inclusive')[percent - 1]
+
+
+def measure(clients, sequence, measured, repeat):
+    """Send sequences of requests by all clients concurrently, return latencies in ms and measured requests/s.
+
+    Only the request of the sequence at index measured is timed, the others restore data changed by it.
+    Throughput counts only time spent in measured requests, so it is comparable between routes
+    with and without restoring requests.
+    """
+
+    def run_client(client):
+        latencies = []
+        for _ in range(repeat):
+            for i, send in enumerate(sequence):
+                start = time.perf_counter()
+                response = send(client)
+                if i == measured:
+                    latencies.append((time.perf_counter() - start) * 1000)
+                if response is not None and response.status_code not in (200, 302):
+                    raise RuntimeError(f'{response.request.path} returned {response.status_code}')
+        return latencies
+
+    with ThreadPoolExecutor(len(clients)) as executor:
+        client_latencies = list(executor.map(run_client, clients))
+    # clients send measured requests concurrently, so their rates add up
+    throughput = sum(len(latencies) / sum(latencies) * 1000 for latencies in client_latencies if latencies)
+    return [latency for latencies in client_latencies for latency in latencies], throughput
+
+
+def benchmark(app, size, args):
+    """Benchmark all routes on the catalogue of given size, return results of the routes."""
+
+    with app.app_context():
+        seed_catalogue(size)
+        usernames = create_users(args.concurrency, size)
+        movies = sample_movies(MOVIE_SAMPLE)
+
+    rng = random.Random(size)
+    clients = []
+    for username in usernames:
+        client = app.test_client()
+        client.username = username
+        login(client, username)
+        clients.append(client)
+
+    # routes with sequences of requests and index of the measured request
+    routes = {name: ([send], 0) for name, send in read_requests(rng, movies).items()}
+    mutations = mutation_requests(rng, movies)
+    watch_list = [
+        mutations['add_to_watch_list'],
+        mutations['find_watch_list_record'],
+        mutations['remove_from_watch_list'],
+    ]
+    watch_later = [mutations['add_to_watch_later'], mutations['remove_from_watch_later']]
+    routes['add_to_watch_list'] = (watch_list, 0)
+    routes['remove_from_watch_list'] = (watch_list, 2)
+    routes['add_to_watch_later'] = (watch_later, 0)
+    routes['remove_from_watch_later'] = (watch_later, 1)
+
+    results = []
+    requests = max(args.requests // args.concurrency, 1)
+    for route, (sequence, measured) in routes.items():
+        # warm up connections and in-process indexes
+        measure(clients, sequence, measured, max(requests // 10, 1))
+        latencies, throughput = measure(clients, sequence, measured, requests)
+        result = {
+            'size': size,
+            'route': route,
+            'requests': len(latencies),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'throughput': round(throughput, 1),
+        }
+        print(
+            f'{size:>9} {route:>24} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f}'
+            f' {result["p99_ms"]:>9.2f} {result["throughput"]:>8.1f}'
+        )
+        results.append(result)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print routes whose p95 latency grew by more than threshold against the baseline, return their number."""
+
+    previous = {(result['size'], result['route']): result for result in baseline['results']}
+    regressions = 0
+    for result in results:
+        before = previous.get((result['size'], result['route']))
+        if before and result['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions += 1
+            print(
+                f'Regression of {result["route"]} on {result["size"]} movies:'
+                f' p95 {before["p95_ms"]:.2f} ms -> {result["p95_ms"]:.2f} ms'
+            )
+    return regressions
+
+
+def main():
+    """Run the benchmark, print latency table and write results as JSON."""
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100_000, 1_000_000])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--cache', action='store_true', help='enable in-process page cache')
+    parser.add_argument('--output', help='file to write results to as JSON')
+    parser.add_argument('--compare', help='JSON file of earlier results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative growth of p95 latency')
+    args = parser.parse_args()
+
+    app = create_benchmark_app(CachedRoutesConfig if args.cache else RoutesConfig)
+    print(f'{"movies":>9} {"route":>24} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"req/s":>8}')
+    results = []
+    for size in args.sizes:
+        results += benchmark(app, size, args)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'cache': args.cache,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            if compare(results, json.load(file), args.threshold):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark comparing latency of the full-text and fuzzy search with the former ILIKE scoring query.
+
+Catalogues are created in the benchmark database, see benchmarks.catalogue, with --synthetic
+they have distinct synthetic names instead of copies of names of the dataset.
+
+Usage: python -m benchmarks.search [--sizes 1000 100000 1000000] [--repeat 5] [--synthetic]
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import case
+
+from benchmarks.catalogue import create_benchmark_app, seed_catalogue
+from semwork.extensions import db
+from semwork.models.movie import Movie
+from semwork.movies.services import full_text_search, fuzzy_search, prompt_to_words
+
+PROMPTS = ['The Dark Knight', 'godfather', 'star wars', 'love', 'Christopher Nolan', 'Amélie', 'pkmjnhgs', 'shawshenk']
+
+
+def ilike_search(prompt):
+    """Former search query scoring movies by number of words contained in the name."""
+
+    prompt_words = prompt_to_words(prompt) or ['']
+    common_words = (sum(case((Movie.unaccented_name.ilike(f'%{word}%'), 1), else_=0) for word in prompt_words)).label(
+        'common_words'
+    )
+    return db.session.query(Movie).add_columns(common_words).where(common_words > 0).order_by(common_words.desc()).all()
+
+
+def full_text_page(prompt):
+    """Current search query returning first page of results and their total."""
+
+    pagination = db.paginate(full_text_search(prompt_to_words(prompt)), page=1, per_page=24, error_out=False)
+    return pagination.items, pagination.total
+
+
+def fuzzy_page(prompt):
+    """Fuzzy search query returning first page of results and whether there is a next one, without their total."""
+
+    items = db.session.scalars(fuzzy_search(prompt_to_words(prompt)).limit(24 + 1)).all()
+    return items[:24], len(items) > 24
+
+
+def measure(search, repeat):
+    """Return latencies of all prompts in milliseconds."""
+
+    latencies = []
+    for prompt in PROMPTS:
+        # first run warms up caches
+        search(prompt)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            search(prompt)
+            latencies.append((time.perf_counter() - start) * 1000)
+            db.session.expunge_all()
+    return latencies
+
+
+def main():
+    """Run the benchmark and print latency table."""
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--synthetic', action='store_true', help='Search synthetic catalogues with distinct names.')
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    with app.app_context():
+        print(f'{"movies":>9} {"query":>10} {"p50 ms":>9} {"p95 ms":>9}')
+        for size in args.sizes:
+            seed_catalogue(size, synthetic=args.synthetic)
+            for name, search in [('ilike', ilike_search), ('full-text', full_text_page), ('fuzzy', fuzzy_page)]:
+                latencies = measure(search, args.repeat)
+                p95 = statistics.quantiles(latencies, n=20)[-1]
+                print(f'{size:>9} {name:>10} {statistics.median(latencies):>9.2f} {p95:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
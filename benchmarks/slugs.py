@@ -0,0 +1,58 @@
+"""Benchmark comparing links of movies built from stored slugs with slugs computed by the former filter.
+
+Usage: python -m benchmarks.slugs [--repeat 200]
+"""
+
+import argparse
+import statistics
+import time
+
+from flask import render_template_string
+from sqlalchemy import select
+
+from benchmarks.catalogue import create_benchmark_app, seed_catalogue
+from semwork.extensions import db
+from semwork.models.movie import Movie
+
+# links of one browse page
+COMPUTED_LINKS = """{% for movie in movies %}
+{{ url_for('movies.movie', movie_id=movie.id, name=(movie.name | movie_name_to_url)) }}
+{% endfor %}"""
+STORED_LINKS = """{% for movie in movies %}
+{{ url_for('movies.movie', movie_id=movie.id, name=movie.slug) }}
+{% endfor %}"""
+
+
+def measure(template, movies, repeat):
+    """Return render times of the template in microseconds."""
+
+    # first render compiles the template
+    render_template_string(template, movies=movies)
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render_template_string(template, movies=movies)
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    return latencies
+
+
+def main():
+    """Run the benchmark and print render time table."""
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    with app.app_context(), app.test_request_context():
+        seed_catalogue(1000)
+        movies = db.session.scalars(select(Movie).order_by(Movie.id).limit(24)).all()
+        print(f'{"links":>9} {"p50 us":>9} {"p95 us":>9}')
+        for name, template in [('computed', COMPUTED_LINKS), ('stored', STORED_LINKS)]:
+            latencies = measure(template, movies, args.repeat)
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(f'{name:>9} {statistics.median(latencies):>9.1f} {p95:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
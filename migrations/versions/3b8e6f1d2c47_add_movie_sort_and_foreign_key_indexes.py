@@ -0,0 +1,37 @@
+"""Add indexes of movies sorted by release year and rating and of watch lists by movies
+
+Revision ID: 3b8e6f1d2c47
+Revises: a52d7c9e1f36
+Create Date: 2026-10-18 19:06:41.228310
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e6f1d2c47'
+down_revision = 'a52d7c9e1f36'
+branch_labels = None
+depends_on = None
+
+
+# indexes of large tables are built without blocking writes, which cannot run in a transaction
+INDEXES = [
+    ('ix_movie_imdb_rating_id', 'movie', ['imdb_rating', 'id']),
+    ('ix_movie_release_year_id', 'movie', ['release_year', 'id']),
+    ('ix_watch_later_movie_id', 'watch_later', ['movie_id']),
+    ('ix_watch_list_movie_id', 'watch_list', ['movie_id']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,24 @@
+"""Add sequence of the version of cached values
+
+Revision ID: 5c1e9a7b3d24
+Revises: 8d2f4a6c1e93
+Create Date: 2026-10-18 21:04:12.730518
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e9a7b3d24'
+down_revision = '8d2f4a6c1e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE SEQUENCE cache_version')
+
+
+def downgrade():
+    op.execute('DROP SEQUENCE cache_version')
@@ -0,0 +1,42 @@
+"""Add counter of changes of movies
+
+Revision ID: 6d4b2e8f1a37
+Revises: 3e7a1c9b5d08
+Create Date: 2026-10-18 23:41:27.604913
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d4b2e8f1a37'
+down_revision = '3e7a1c9b5d08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'movie_change',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('changes', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute('INSERT INTO movie_change (id, changes) VALUES (1, 0)')
+    op.execute("""
+        CREATE FUNCTION count_movie_change() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE movie_change SET changes = changes + 1 WHERE id = 1;
+            RETURN NULL;
+        END $$;
+        CREATE TRIGGER count_movie_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON movie
+            FOR EACH STATEMENT EXECUTE FUNCTION count_movie_change();
+        """)
+
+
+def downgrade():
+    op.execute('DROP TRIGGER count_movie_change ON movie')
+    op.execute('DROP FUNCTION count_movie_change()')
+    op.drop_table('movie_change')
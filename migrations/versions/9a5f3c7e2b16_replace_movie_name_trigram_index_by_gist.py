@@ -0,0 +1,45 @@
+"""Replace GIN trigram index of unaccented movie names by GiST index ordered by distance
+
+Revision ID: 9a5f3c7e2b16
+Revises: 6d4b2e8f1a37
+Create Date: 2026-10-19 00:12:53.418207
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9a5f3c7e2b16'
+down_revision = '6d4b2e8f1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # indexes of large tables are built without blocking writes, which cannot run in a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_movie_unaccented_name_trgm_gist',
+            'movie',
+            ['unaccented_name'],
+            unique=False,
+            postgresql_using='gist',
+            postgresql_ops={'unaccented_name': 'gist_trgm_ops(siglen=256)'},
+            postgresql_concurrently=True,
+        )
+        op.drop_index('ix_movie_unaccented_name_trgm', table_name='movie', postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_movie_unaccented_name_trgm',
+            'movie',
+            ['unaccented_name'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'unaccented_name': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+        op.drop_index('ix_movie_unaccented_name_trgm_gist', table_name='movie', postgresql_concurrently=True)
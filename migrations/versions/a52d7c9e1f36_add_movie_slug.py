@@ -0,0 +1,55 @@
+"""Add slug of movie names used in urls
+
+Revision ID: a52d7c9e1f36
+Revises: f18b3d7e0c25
+Create Date: 2026-10-18 21:12:44.305918
+
+"""
+
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a52d7c9e1f36'
+down_revision = 'f18b3d7e0c25'
+branch_labels = None
+depends_on = None
+
+
+def name_to_slug(name):
+    """Copy of semwork.models.movie.name_to_slug at the time of the migration."""
+
+    slug = unicodedata.normalize('NFD', name).encode('ASCII', 'ignore').decode("utf-8")
+    slug = re.sub('[^a-zA-Z0-9 -]+', '', slug)
+    slug = re.sub('( - )+', ' ', slug)
+    return slug.lower().replace(' ', '-')
+
+
+def upgrade():
+    with op.batch_alter_table('movie', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('slug', sa.String(), nullable=True))
+
+    # slugs are computed in python, unaccent() of PostgreSQL transliterates differently
+    movie = sa.table('movie', sa.column('id', sa.Integer), sa.column('name', sa.String), sa.column('slug', sa.String))
+    connection = op.get_bind()
+    slugs = [
+        {'movie_id': movie_id, 'movie_slug': name_to_slug(name)}
+        for movie_id, name in connection.execute(sa.select(movie.c.id, movie.c.name))
+    ]
+    if slugs:
+        connection.execute(
+            movie.update().where(movie.c.id == sa.bindparam('movie_id')).values(slug=sa.bindparam('movie_slug')), slugs
+        )
+
+    with op.batch_alter_table('movie', schema=None) as batch_op:
+        batch_op.alter_column('slug', existing_type=sa.String(), nullable=False)
+        batch_op.create_index(batch_op.f('ix_movie_slug'), ['slug'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('movie', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_movie_slug'))
+        batch_op.drop_column('slug')
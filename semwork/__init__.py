@@ -3,14 +3,22 @@
 from flask import Flask
 from config import Config
 
+from semwork.async_db import async_db
+from semwork.cache import cache
 from semwork.extensions import db, bcrypt, login_manager, migrate
-from semwork.models.movie import Movie
+from semwork.pool import database_pool
+from semwork.profiling import profiler
+from semwork.replicas import replicas
 from semwork.models.user import User
-from semwork.import_data import load_dataset
 
 from semwork.home import bp as home_bp
 from semwork.users import bp as users_bp
 from semwork.movies import bp as movies_bp
+from semwork.metrics import bp as metrics_bp
+from semwork.movies.autocomplete import autocomplete
+from semwork.movies.catalogue import catalogue
+from semwork.home.scoring import vector_scorer
+from semwork.home.shelves import shelves
 
 
 def create_app(config_class=Config):
@@ -18,6 +26,12 @@ def create_app(config_class=Config):
     app = Flask(__name__, static_url_path='', static_folder='static', template_folder='templates')
     app.config.from_object(config_class)
 
+    # Configure pool of database connections, before the engine is created
+    database_pool.init_app(app)
+
+    # Connect replicas of the database read by read-only pages
+    replicas.init_app(app)
+
     # Initialize db
     db.init_app(app)
 
@@ -27,16 +41,28 @@ def create_app(config_class=Config):
     # Initialize Bcrypt
     bcrypt.init_app(app)
 
+    # Initialize cache of rendered pages
+    cache.init_app(app)
+
+    # Initialize in-process records of movies
+    catalogue.init_app(app)
+
+    # Initialize search suggestions
+    autocomplete.init_app(app)
+
+    # Initialize in-process recommendations scoring
+    vector_scorer.init_app(app)
+
+    # Initialize concurrent queries of home page shelves
+    shelves.init_app(app)
+
+    # Initialize profiling of requests
+    profiler.init_app(app)
+
     # Initialize LoginManager
     login_manager.login_view = 'users.login'
     login_manager.init_app(app)
 
-    # Import movies from given dataset
-    with app.app_context():
-        db.create_all()
-        if db.session.query(Movie).count() == 0:
-            load_dataset(db, 'imdb_top_1000.csv')
-
     @login_manager.user_loader
     def load_user(user_id):
         return User.query.get(int(user_id))
@@ -45,5 +71,10 @@ def create_app(config_class=Config):
     app.register_blueprint(home_bp)
     app.register_blueprint(users_bp, url_prefix='/users')
     app.register_blueprint(movies_bp, url_prefix='/movies')
+    if app.config.get('METRICS_ENABLED'):
+        app.register_blueprint(metrics_bp)
+
+    # Initialize async database, replaces views of registered blueprints
+    async_db.init_app(app)
 
     return app
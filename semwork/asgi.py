@@ -0,0 +1,154 @@
+"""ASGI entry point of the app with async views, served e.g. by `uvicorn semwork.asgi:app`.
+
+Flask handles requests synchronously, so every request runs in a thread of the executor of the adapter,
+while async views run on the loop of the server, where their queries wait for the database
+concurrently and share the pool of the async engine.
+"""
+
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+import config
+from semwork import create_app
+
+# request headers without the HTTP_ prefix in WSGI environ
+UNPREFIXED_HEADERS = {'content-type', 'content-length'}
+
+
+class RequestBody(io.RawIOBase):
+    """Body of the HTTP request received by the loop as the WSGI application reads it,
+    so at most one message of the body is held in memory, called from threads of the executor."""
+
+    def __init__(self, receive, loop):
+        super().__init__()
+        self.receive = receive
+        self.loop = loop
+        self.chunk = b''
+        self.more_body = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.chunk and self.more_body:
+            message = asyncio.run_coroutine_threadsafe(self.receive(), self.loop).result()
+            # body of disconnected client ends early, which is detected by the application by its length
+            self.chunk = message.get('body', b'')
+            self.more_body = message['type'] == 'http.request' and message.get('more_body', False)
+        size = min(len(buffer), len(self.chunk))
+        buffer[:size] = self.chunk[:size]
+        self.chunk = self.chunk[size:]
+        return size
+
+
+def build_environ(scope: dict, body) -> dict:
+    """Create WSGI environ of the HTTP request of the ASGI scope with the stream of its body."""
+
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_PROTOCOL': f'HTTP/{scope["http_version"]}',
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        # the stream ends with the body, also when it is sent in chunks without content length
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+    for name, value in scope['headers']:
+        name, value = name.decode('latin1'), value.decode('latin1')
+        key = name.upper().replace('-', '_')
+        if name not in UNPREFIXED_HEADERS:
+            key = f'HTTP_{key}'
+        # repeated headers are joined into one value
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+class WsgiToAsgi:
+    """ASGI application handling HTTP requests of the WSGI application in threads of its executor."""
+
+    def __init__(self, wsgi_application, max_workers=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix='wsgi')
+        self.loop = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            raise ValueError(f'WSGI application cannot handle {scope["type"]} connections')
+
+        self.loop = asyncio.get_running_loop()
+        body = io.BufferedReader(RequestBody(receive, self.loop))
+        await self.loop.run_in_executor(self.executor, self.run_wsgi_app, scope, body, send)
+
+    def send(self, send, message: dict):
+        """Send the message by the loop and wait until it is sent, called from threads of the executor."""
+
+        asyncio.run_coroutine_threadsafe(send(message), self.loop).result()
+
+    def run_wsgi_app(self, scope: dict, body, send):
+        """Run the WSGI application for the request, chunks of its response are sent as they are produced."""
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['start'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('ascii'), value.encode('latin1')) for name, value in headers],
+            }
+
+        def send_start():
+            if not response.get('sent'):
+                self.send(send, response['start'])
+                response['sent'] = True
+
+        result = self.wsgi_application(build_environ(scope, body), start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    send_start()
+                    self.send(send, {'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        send_start()
+        self.send(send, {'type': 'http.response.body'})
+
+    def async_to_sync(self, func):
+        """Make async view callable by Flask in threads of the executor, the view runs on the loop of the server
+        in a copy of the context of the thread, so it sees contexts of Flask."""
+
+        @wraps(func)
+        def run(*args, **kwargs):
+            return asyncio.run_coroutine_threadsafe(func(*args, **kwargs), self.loop).result()
+
+        return run
+
+
+def create_asgi_app(config_class=config.AsyncConfig):
+    """Create ASGI application of the app in async mode."""
+
+    flask_app = create_app(config_class=config_class)
+    asgi_app = WsgiToAsgi(flask_app)
+    # Flask runs async views in a new loop of every request by default
+    flask_app.async_to_sync = asgi_app.async_to_sync
+    return asgi_app
+
+
+app = create_asgi_app()
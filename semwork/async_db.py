@@ -0,0 +1,85 @@
+"""Async database engine used by async views of read-heavy pages when the app is served by an ASGI server."""
+
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from flask import current_app, render_template
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from semwork.pool import async_engine_options
+
+# async views replacing views of the same endpoints, registered by async_view
+async_views = {}
+
+
+def async_view(endpoint: str):
+    """Decorator registering async view replacing the view of the endpoint in async mode."""
+
+    def decorator(view):
+        async_views[endpoint] = view
+        return view
+
+    return decorator
+
+
+async def render_template_async(template_name: str, **context) -> str:
+    """Render the template in a thread, so filters of templates querying the database or the cache
+    do not block the loop."""
+
+    return await sync_to_async(render_template, thread_sensitive=False)(template_name, **context)
+
+
+class AsyncDatabase:
+    """Flask extension creating async engine (asyncpg) of the app database when ASYNC_DATABASE is set.
+
+    Every query opens its own session, so independent queries of one page run concurrently
+    on separate connections. Connections of asyncpg belong to one event loop, so the pooled
+    engine needs all async views running on the loop of the ASGI server, see semwork.asgi.
+    """
+
+    def init_app(self, app):
+        """Create async engine and replace views by their async versions, call after registering blueprints."""
+
+        app.config.setdefault('ASYNC_DATABASE', False)
+        app.config.setdefault('ASYNC_ENGINE_OPTIONS', async_engine_options(app.config))
+        if not app.config['ASYNC_DATABASE']:
+            return
+
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI']).set(drivername='postgresql+asyncpg')
+        app.extensions['async_db'] = create_async_engine(url, **app.config['ASYNC_ENGINE_OPTIONS'])
+        app.view_functions.update(async_views)
+
+    @property
+    def engine(self):
+        """Async engine of the current app."""
+
+        return current_app.extensions['async_db']
+
+    @asynccontextmanager
+    async def session(self):
+        """Open session of the async engine, loaded objects stay usable after it is closed."""
+
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            yield session
+
+    async def execute(self, statement):
+        """Execute the statement in its own session and return all rows."""
+
+        async with self.session() as session:
+            return (await session.execute(statement)).all()
+
+    async def scalars(self, statement):
+        """Execute the statement in its own session and return all scalars."""
+
+        async with self.session() as session:
+            return (await session.scalars(statement)).all()
+
+    async def get(self, model, ident):
+        """Get instance of the model by its primary key, None when missing."""
+
+        async with self.session() as session:
+            return await session.get(model, ident)
+
+
+async_db = AsyncDatabase()
@@ -0,0 +1,305 @@
+"""Cache of rendered pages and fragments with in-process LRU and Redis backends."""
+
+import socket
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
+from threading import Lock
+from urllib.parse import urlparse
+
+import click
+from flask import current_app, g, request
+from flask.cli import AppGroup
+from flask_login import current_user
+from sqlalchemy import Sequence, func, select, text
+
+from semwork.extensions import db
+from semwork.replicas import parse_lsn, replica_lsn
+
+# version of cached values, all values are stored under keys containing the version, it is kept in the database,
+# so it is shared by all workers and commands and never evicted like cached values
+CACHE_VERSION = Sequence('cache_version', metadata=db.metadata)
+
+
+class LRUBackend:
+    """In-process cache dropping the least recently used values when it is full."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.values = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key: str):
+        """Get value stored under the key, None if missing or expired."""
+
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self.values[key]
+                return None
+            self.values.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, timeout: int = None):
+        """Store value under the key for timeout seconds, forever without timeout."""
+
+        with self.lock:
+            self.values[key] = (time.monotonic() + timeout if timeout else None, value)
+            self.values.move_to_end(key)
+            while len(self.values) > self.max_entries:
+                self.values.popitem(last=False)
+
+    def incr(self, key: str):
+        """Increment number stored under the key and return it."""
+
+        with self.lock:
+            _, value = self.values.get(key, (None, '0'))
+            self.values[key] = (None, str(int(value) + 1))
+            return int(value) + 1
+
+
+class RedisBackend:
+    """Cache stored in Redis or any server speaking its protocol, shared by all workers.
+
+    Uses one connection per worker guarded by a lock. When the server is not reachable,
+    values are reported missing and not stored, so pages are rendered as without cache.
+    """
+
+    def __init__(self, url: str, key_prefix: str = 'semwork:', socket_timeout: float = 1.0):
+        parsed = urlparse(url)
+        self.address = (parsed.hostname or 'localhost', parsed.port or 6379)
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.key_prefix = key_prefix
+        self.socket_timeout = socket_timeout
+        self.connection = None
+        self.lock = Lock()
+
+    def connect(self):
+        """Open connection to the server and select the database."""
+
+        connection = socket.create_connection(self.address, timeout=self.socket_timeout)
+        self.connection = connection.makefile('rwb')
+        if self.db:
+            self.send('SELECT', self.db)
+
+    def send(self, *args):
+        """Send command to the server and return its reply."""
+
+        encoded = [str(arg).encode() for arg in args]
+        self.connection.write(b'*%d\r\n' % len(encoded))
+        for arg in encoded:
+            self.connection.write(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self.connection.flush()
+        return self.read_reply()
+
+    def read_reply(self):
+        """Read one reply of the server."""
+
+        line = self.connection.readline()
+        if not line:
+            raise ConnectionError('Connection closed by the server')
+        kind, data = line[:1], line[1:-2]
+        if kind == b'+':
+            return data.decode()
+        if kind == b'-':
+            raise ConnectionError(data.decode())
+        if kind == b':':
+            return int(data)
+        if kind == b'$':
+            if int(data) < 0:
+                return None
+            value = self.connection.read(int(data) + 2)[:-2]
+            return value.decode()
+        if kind == b'*':
+            return [self.read_reply() for _ in range(int(data))]
+        raise ConnectionError(f'Unknown reply {line!r}')
+
+    def command(self, *args):
+        """Send command, connecting first when needed, None when the server is not reachable."""
+
+        with self.lock:
+            try:
+                if self.connection is None:
+                    self.connect()
+                return self.send(*args)
+            except OSError:
+                # connection is opened again by the next command
+                self.connection = None
+                return None
+
+    def get(self, key: str):
+        """Get value stored under the key, None if missing or expired."""
+
+        return self.command('GET', self.key_prefix + key)
+
+    def set(self, key: str, value: str, timeout: int = None):
+        """Store value under the key for timeout seconds, forever without timeout."""
+
+        if timeout:
+            self.command('SET', self.key_prefix + key, value, 'PX', int(timeout * 1000))
+        else:
+            self.command('SET', self.key_prefix + key, value)
+
+    def incr(self, key: str):
+        """Increment number stored under the key and return it."""
+
+        return self.command('INCR', self.key_prefix + key)
+
+
+def create_backend(config):
+    """Create backend selected by CACHE_BACKEND config, None disables caching."""
+
+    if config['CACHE_BACKEND'] == 'lru':
+        return LRUBackend(config['CACHE_MAX_ENTRIES'])
+    if config['CACHE_BACKEND'] == 'redis':
+        return RedisBackend(config['CACHE_REDIS_URL'])
+    return None
+
+
+class Cache:
+    """Flask extension caching rendered pages of anonymous users and fragments of pages.
+
+    Cached values are invalidated all at once by incrementing the version, which is part of keys of all values,
+    so outdated values are never read and expire later. The version is a sequence of the database read by every
+    worker at most once per CACHE_VERSION_POLL seconds, so changes committed by other workers and commands
+    outdate in-process caches of all workers too.
+    """
+
+    def init_app(self, app):
+        """Create backend of the app and register cache commands."""
+
+        app.config.setdefault('CACHE_BACKEND', 'lru')
+        app.config.setdefault('CACHE_MAX_ENTRIES', 2048)
+        app.config.setdefault('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+        app.config.setdefault('CACHE_TIMEOUT', 300)
+        app.config.setdefault('CACHE_VERSION_POLL', 1.0)
+        app.extensions['cache'] = {
+            'backend': create_backend(app.config),
+            'stats': Counter(),
+            'version': None,
+            'version_read_at': 0.0,
+        }
+        app.cli.add_command(cache_cli)
+
+    @property
+    def backend(self):
+        """Backend of the current app, None when caching is disabled."""
+
+        return current_app.extensions['cache']['backend']
+
+    def stats(self):
+        """Get numbers of hits and misses of this worker by kind of cached values."""
+
+        return dict(current_app.extensions['cache']['stats'])
+
+    def versions(self):
+        """Get version of cached values and WAL position of the primary after all changes outdating
+        the previous versions, both the same during the request."""
+
+        if 'cache_version' not in g:
+            state = current_app.extensions['cache']
+            if time.monotonic() - state['version_read_at'] >= current_app.config['CACHE_VERSION_POLL']:
+                with db.engine.connect() as connection:
+                    # the sequence returns its start value before the first increment
+                    version, lsn = connection.execute(
+                        text(
+                            'SELECT CASE WHEN is_called THEN last_value ELSE 0 END, pg_current_wal_lsn() '
+                            f'FROM {CACHE_VERSION.name}'
+                        )
+                    ).one()
+                # replaced at once, threads of the worker share the state
+                state['version'] = (str(version), parse_lsn(lsn))
+                state['version_read_at'] = time.monotonic()
+            g.cache_version = state['version']
+        return g.cache_version
+
+    def version(self):
+        """Get version of cached values, the same during the request."""
+
+        return self.versions()[0]
+
+    def get(self, kind: str, key: str):
+        """Get cached value of given kind, None when missing, counts hits and misses."""
+
+        value = self.backend.get(f'{kind}:{self.version()}:{key}')
+        current_app.extensions['cache']['stats'][f'{kind}_{"misses" if value is None else "hits"}'] += 1
+        return value
+
+    def set(self, kind: str, key: str, value: str):
+        """Cache value of given kind for CACHE_TIMEOUT seconds.
+
+        Values rendered from reads of a replica are cached only when the replica replayed all changes
+        older than the current version before the reads, otherwise they could be older than the version."""
+
+        version, version_lsn = self.versions()
+        lsn = replica_lsn()
+        if lsn is not None and lsn < version_lsn:
+            current_app.logger.debug(
+                'Value %s:%s read from a replica behind version %s is not cached', kind, key, version
+            )
+            return
+        self.backend.set(f'{kind}:{version}:{key}', value, current_app.config['CACHE_TIMEOUT'])
+
+    def fragment(self, kind: str, key: str, render):
+        """Get cached fragment of a page, render and cache it when missing."""
+
+        if self.backend is None:
+            return render()
+        value = self.get(kind, key)
+        if value is None:
+            value = render()
+            self.set(kind, key, value)
+        return value
+
+    def cached_page(self, view):
+        """Decorator caching pages rendered by the view for anonymous users,
+        only rendered templates are cached, redirects are not."""
+
+        @wraps(view)
+        def decorated_view(*args, **kwargs):
+            if self.backend is None or request.method != 'GET' or current_user.is_authenticated:
+                return current_app.ensure_sync(view)(*args, **kwargs)
+
+            page = self.get('page', request.full_path)
+            if page is not None:
+                return page, {'X-Cache': 'HIT'}
+
+            page = current_app.ensure_sync(view)(*args, **kwargs)
+            if not isinstance(page, str):
+                return page
+            self.set('page', request.full_path, page)
+            return page, {'X-Cache': 'MISS'}
+
+        return decorated_view
+
+    def invalidate(self):
+        """Make all cached values of all workers outdated, return False when caching is disabled."""
+
+        if self.backend is None:
+            return False
+        # outside of the session, which may be just committing
+        with db.engine.begin() as connection:
+            version, lsn = connection.execute(select(CACHE_VERSION.next_value(), func.pg_current_wal_lsn())).one()
+        state = current_app.extensions['cache']
+        state['version'], state['version_read_at'] = (str(version), parse_lsn(lsn)), time.monotonic()
+        g.pop('cache_version', None)
+        return True
+
+
+cache = Cache()
+cache_cli = AppGroup('cache', help='Manage cache of rendered pages.')
+
+
+@cache_cli.command('clear')
+def clear_cache():
+    """Make all cached pages and fragments outdated."""
+
+    if not cache.invalidate():
+        click.echo('Cache is disabled.')
+        return
+    click.echo(
+        f'Cache cleared, workers stop using cached values in {current_app.config["CACHE_VERSION_POLL"]} seconds.'
+    )
@@ -0,0 +1,63 @@
+"""HTTP conditional requests answered by 304 Not Modified before pages are rendered."""
+
+import hashlib
+from functools import wraps
+
+from flask import current_app, make_response, request
+from flask_login import current_user
+
+
+def make_etag(*parts) -> str:
+    """Create strong ETag from parts identifying content of the page."""
+
+    return hashlib.sha1(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def is_not_modified(etag: str, last_modified) -> bool:
+    """Check whether the client has the page with given validators,
+    Last-Modified is used only by clients not sending ETag."""
+
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        # HTTP dates do not have fractions of seconds
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional(validators):
+    """Decorator answering GET requests of pages with 304 Not Modified when the client has the current page.
+
+    The validators function gets arguments of the view and returns parts of the ETag and the time
+    of the last modification of the page, or None when the page has no validators. Pages differ by user,
+    so the user is a part of the ETag and pages of logged in users are not stored by shared caches.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def decorated_view(*args, **kwargs):
+            found = validators(*args, **kwargs) if request.method == 'GET' else None
+            if found is None:
+                return current_app.ensure_sync(view)(*args, **kwargs)
+
+            parts, last_modified = found
+            etag = make_etag(current_user.get_id(), *parts)
+            if is_not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(current_app.ensure_sync(view)(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            if current_user.is_authenticated:
+                response.cache_control.private = True
+            response.vary.add('Cookie')
+            return response
+
+        return decorated_view
+
+    return decorator
@@ -5,7 +5,9 @@ from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
 
-db = SQLAlchemy()
+from semwork.replicas import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 bcrypt = Bcrypt()
 login_manager = LoginManager()
 migrate = Migrate()
@@ -5,4 +5,4 @@ from flask import Blueprint
 bp = Blueprint('home', __name__)
 
 # according to official documentation this is intended
-from semwork.home import routes  # pylint: disable=C0413; # noqa
+from semwork.home import routes, async_routes  # pylint: disable=C0413; # noqa
@@ -0,0 +1,47 @@
+"""Module providing async version of the home page, used in async mode."""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from flask import current_app
+from flask_login import login_required, current_user
+
+from semwork.async_db import async_db, async_view, render_template_async
+from semwork.home.services import (
+    recommendations_statement,
+    refresh_outdated_recommendations,
+    watch_again_statement,
+    watch_later_statement,
+)
+from semwork.home.shelves import shelves
+
+
+async def load_shelf(name, query):
+    """Await query of the shelf, empty when it is not loaded within the timeout of the shelf."""
+
+    try:
+        return await asyncio.wait_for(query, shelves.timeout(name))
+    except asyncio.TimeoutError:
+        current_app.logger.warning('Shelf %s was not loaded in %s s', name, shelves.timeout(name))
+        return []
+
+
+@async_view('home.index')
+@login_required
+async def index():
+    """Route to the home page, its shelves are queried concurrently."""
+
+    # recommendations are refreshed by the sync session, in a thread so the loop serves other requests meanwhile
+    await sync_to_async(refresh_outdated_recommendations, thread_sensitive=False)()
+    watch_later, recommendations, watch_again = await asyncio.gather(
+        load_shelf('watch_later', async_db.scalars(watch_later_statement())),
+        load_shelf('recommendations', async_db.execute(recommendations_statement())),
+        load_shelf('watch_again', async_db.scalars(watch_again_statement())),
+    )
+    return await render_template_async(
+        'home.html',
+        name=current_user.username,
+        watch_later=watch_later,
+        recommendations=recommendations,
+        watch_again=watch_again,
+    )
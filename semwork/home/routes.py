@@ -4,31 +4,30 @@ from flask import render_template
 from flask_login import login_required, current_user
 
 from semwork.home import bp  # pylint: disable=R0401; # noqa
-from semwork.home.services import get_watch_again, get_new_recommendations
-from semwork.extensions import db
-from semwork.models.movie import Movie
-from semwork.models.watch_later import WatchLater
+from semwork.home.services import (
+    recommendations_statement,
+    refresh_outdated_recommendations,
+    watch_again_statement,
+    watch_later_statement,
+)
+from semwork.home.shelves import shelves
+from semwork.replicas import replica_reads
 
 
 @bp.route('/')
 @login_required
+@replica_reads
 def index():
-    """Route to the home page."""
-    watch_later = (
-        db.session.query(Movie)
-        .join(WatchLater, Movie.id == WatchLater.movie_id)
-        .where(WatchLater.user_id == current_user.id)
-        .all()
-    )
-    recommendations = get_new_recommendations()
-    watch_again = get_watch_again()
-    return render_template(
-        'home.html',
-        name=current_user.username,
-        watch_later=watch_later,
-        recommendations=recommendations,
-        watch_again=watch_again,
+    """Route to the home page, its shelves are queried concurrently."""
+    refresh_outdated_recommendations()
+    loaded = shelves.load(
+        {
+            'watch_later': watch_later_statement(),
+            'recommendations': recommendations_statement(),
+            'watch_again': watch_again_statement(),
+        }
     )
+    return render_template('home.html', name=current_user.username, **loaded)
 
 
 @bp.route('/access-denied')
@@ -0,0 +1,149 @@
+"""In-process vectorized calculation of recommend values using NumPy."""
+
+from threading import Lock
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+
+from semwork.extensions import db
+from semwork.models.movie import Movie
+from semwork.models.movie_change import MovieChange
+
+
+class MovieColumns:  # pylint: disable=R0902,R0903; # class used to only store data
+    """Catalogue of movies stored as columnar arrays.
+
+    Genres are stored as bitmasks with one bit per genre and directors and stars
+    as integer codes of people, so whole catalogue is scored by array operations.
+    """
+
+    def __init__(self, movies):
+        self.genre_bits = {}
+        self.person_codes = {}
+
+        ids, years, genre_masks, directors, stars = [], [], [], [], []
+        for movie_id, release_year, genre, director, *movie_stars in movies:
+            ids.append(movie_id)
+            years.append(release_year)
+            genre_masks.append(self.genre_mask(genre.split(', ')))
+            directors.append(self.person_code(director))
+            stars.append([self.person_code(star) for star in movie_stars])
+
+        self.ids = np.array(ids, dtype=np.int64)
+        self.years = np.array(years, dtype=np.float64)
+        self.genre_masks = np.array(genre_masks, dtype=np.uint64)
+        self.directors = np.array(directors, dtype=np.int32)
+        self.stars = np.array(stars, dtype=np.int32).reshape(-1, 4)
+
+    def genre_mask(self, genres):
+        """Get bitmask of given genres, unknown genres get new bits."""
+
+        mask = 0
+        for genre in genres:
+            if genre not in self.genre_bits:
+                if len(self.genre_bits) == 64:
+                    raise ValueError('Movie catalogue has more than 64 genres')
+                self.genre_bits[genre] = 1 << len(self.genre_bits)
+            mask |= self.genre_bits[genre]
+        return mask
+
+    def person_code(self, person):
+        """Get integer code of the person, unknown people get new codes."""
+
+        return self.person_codes.setdefault(person, len(self.person_codes))
+
+    def known_codes(self, people):
+        """Get codes of given people that appear in the catalogue."""
+
+        return np.array([self.person_codes[person] for person in people if person in self.person_codes], dtype=np.int32)
+
+    def has_genre(self, genre):
+        """Get array of 0 and 1 marking movies of given genre."""
+
+        bits = np.uint64(self.genre_bits.get(genre, 0))
+        return ((self.genre_masks & bits) != 0).astype(np.float64)
+
+    def scores(self, recent_genres, avg_released, directors, actors):
+        """Calculate recommend values of all movies in one vectorized pass."""
+
+        actor_codes = self.known_codes(actors)
+        return (
+            self.has_genre(recent_genres[0]) * 100
+            + self.has_genre(recent_genres[1]) * 50
+            + self.has_genre(recent_genres[2]) * 20
+            - np.abs(self.years - avg_released) * 0.25
+            + np.isin(self.directors, self.known_codes(directors)) * 20
+            + np.isin(self.stars, actor_codes).sum(axis=1) * 5
+        )
+
+    def top(self, scores, excluded_ids, maximum):
+        """Get ids and values of maximum best scored movies except excluded ones,
+        ordered the same way as by the database query."""
+
+        candidates = np.flatnonzero(~np.isin(self.ids, np.array(list(excluded_ids), dtype=np.int64)))
+        if maximum <= 0 or len(candidates) == 0:
+            return []
+
+        if len(candidates) > maximum:
+            # keep every movie scored at least as the maximum-th best one, so ties are ordered by id
+            kth = -np.partition(-scores[candidates], maximum - 1)[maximum - 1]
+            candidates = candidates[scores[candidates] >= kth]
+        order = np.lexsort((self.ids[candidates], -scores[candidates]))[:maximum]
+        return [(int(self.ids[i]), float(scores[i])) for i in candidates[order]]
+
+
+class VectorScorer:
+    """Keeps columnar catalogue of movies per app and worker.
+
+    The catalogue is loaded on first use and loaded again when movies are changed, which is checked
+    by the counter of changes of movies, incremented in transactions of the changes, so the counter
+    is read together with the committed changes.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+
+    def init_app(self, app):
+        """Register place for the catalogue of the app."""
+
+        app.extensions['vector_scorer'] = {'columns': None, 'changes': None}
+
+    def columns(self) -> MovieColumns:
+        """Get catalogue of the current app, loading it when movies were changed."""
+
+        state = current_app.extensions['vector_scorer']
+        # read outside of the session, whose changes are not committed yet, deleted movies are skipped by recommend
+        with db.engine.connect() as connection:
+            changes = connection.scalar(select(MovieChange.changes))
+            if state['columns'] is None or state['changes'] != changes:
+                with self.lock:
+                    if state['columns'] is None or state['changes'] != changes:
+                        state['columns'] = MovieColumns(
+                            connection.execute(
+                                select(
+                                    Movie.id,
+                                    Movie.release_year,
+                                    Movie.genre,
+                                    Movie.director,
+                                    Movie.star1,
+                                    Movie.star2,
+                                    Movie.star3,
+                                    Movie.star4,
+                                )
+                            )
+                        )
+                        state['changes'] = changes
+        return state['columns']
+
+    def recommend(self, profile, excluded_ids, maximum):
+        """Get maximum best (Movie, recommend value) pairs for the watch history profile."""
+
+        columns = self.columns()
+        best = columns.top(columns.scores(*profile), excluded_ids, maximum)
+        movies = {movie.id: movie for movie in db.session.query(Movie).where(Movie.id.in_([i for i, _ in best]))}
+        # movies deleted since the catalogue was loaded are skipped
+        return [(movies[movie_id], value) for movie_id, value in best if movie_id in movies]
+
+
+vector_scorer = VectorScorer()
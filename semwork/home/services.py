@@ -2,12 +2,27 @@
 
 from collections import Counter
 from datetime import datetime
-from sqlalchemy import func, case
+from sqlalchemy import Integer, any_, bindparam, delete, event, func, case, literal, select, text, union_all, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from flask import current_app
 from flask_login import current_user
 
 from semwork.extensions import db
+from semwork.home.scoring import vector_scorer
+from semwork.models.genre import Genre
 from semwork.models.movie import Movie
+from semwork.models.movie_genre import MovieGenre
+from semwork.models.movie_person import DIRECTOR, STAR, MoviePerson
+from semwork.models.person import Person
+from semwork.models.recommendation import Recommendation
+from semwork.models.user import User
+from semwork.models.watch_again import WatchAgain, next_due
+from semwork.models.watch_later import WatchLater
 from semwork.models.watch_list import WatchList
+from semwork.replicas import mark_write
+
+# first key of PostgreSQL advisory locks of recommendations, the second one is the id of the user
+RECOMMENDATIONS_LOCK_KEY = 7_206_115
 
 
 def get_new_recommendations(maximum: int = 30, recent_limit: int = 10):
@@ -26,17 +41,91 @@ def get_new_recommendations(maximum: int = 30, recent_limit: int = 10):
     if recent_wh.count() == 0:
         return []
 
+    if current_app.config['RECOMMENDATION_SCORER'] == 'numpy':
+        watched_ids = db.session.scalars(select(WatchList.movie_id).where(WatchList.user_id == current_user.id))
+        return vector_scorer.recommend(watch_history_profile(recent_wh), set(watched_ids), maximum)
+
     recommendations = find_and_calculate_recommendations(recent_wh)
 
     # return given maximum of movies
     return recommendations.limit(maximum).all()
 
 
-def find_and_calculate_recommendations(watch_history: Movie):
-    """Calculate recommend value of each movie
-    based on given watch history."""
+def refresh_recommendations(maximum: int = 30, recent_limit: int = 10):
+    """Calculate recommended movies of the user and store them."""
+
+    lock_recommendations()
+    db.session.query(Recommendation).filter_by(user_id=current_user.id).delete()
+    db.session.add_all(
+        Recommendation(user_id=current_user.id, movie_id=movie.id, value=value)
+        for movie, value in get_new_recommendations(maximum, recent_limit)
+    )
+    db.session.execute(update(User).where(User.id == current_user.id).values(recommendations_outdated=False))
+    db.session.commit()
+
+
+def lock_recommendations():
+    """Lock recommendations of the user until the end of the transaction,
+    so concurrent requests of the user do not replace them at the same time."""
+
+    # the lock guards writes, reads of the transaction must not go to replicas
+    mark_write()
+    db.session.execute(
+        text('SELECT pg_advisory_xact_lock(:key, :user_id)'),
+        {'key': RECOMMENDATIONS_LOCK_KEY, 'user_id': current_user.id},
+    )
+
+
+def refresh_outdated_recommendations():
+    """Calculate recommended movies of the user again if the watch history changed."""
+
+    # queried instead of read from current_user, so changes not flushed yet are included
+    outdated = select(User.recommendations_outdated).where(User.id == current_user.id)
+    if not db.session.scalar(outdated):
+        return
+
+    # checked again under the lock, a concurrent request may have refreshed them meanwhile
+    lock_recommendations()
+    if db.session.scalar(outdated):
+        refresh_recommendations()
+    else:
+        db.session.commit()
+
+
+def recommendations_statement():
+    """Select stored recommended movies of the user with their recommend values."""
+
+    return (
+        select(Movie, Recommendation.value)
+        .join(Recommendation, Movie.id == Recommendation.movie_id)
+        .where(Recommendation.user_id == current_user.id)
+        .order_by(Recommendation.value.desc(), Movie.id)
+    )
+
+
+def get_recommendations():
+    """Get stored recommended movies of the user,
+    they are calculated again only after the watch history changed."""
+
+    refresh_outdated_recommendations()
+    return db.session.execute(recommendations_statement()).all()
+
+
+@event.listens_for(WatchList, 'after_insert')
+@event.listens_for(WatchList, 'after_delete')
+def outdate_recommendations(mapper, connection, target):  # pylint: disable=W0613; # signature given by sqlalchemy
+    """Mark recommendations of the user as outdated when the watch history changes."""
+
+    connection.execute(update(User).where(User.id == target.user_id).values(recommendations_outdated=True))
+
+
+def watch_history_profile(watch_history: Movie):
+    """Get three most common genres, average release year,
+    directors and actors of given watch history."""
 
     common_genres = 3
+    # load watch history only once
+    watch_history = list(watch_history)
 
     # genres
     recent_genres = [genre for entry in watch_history for genre in entry.genre.split(', ')]
@@ -63,20 +152,48 @@ def find_and_calculate_recommendations(watch_history: Movie):
         + [entry.star4 for entry in watch_history]
     )
 
+    return [genre for genre, _ in recent_genres], avg_released, directors, actors
+
+
+def find_and_calculate_recommendations(watch_history: Movie):
+    """Calculate recommend value of each movie
+    based on given watch history."""
+
+    recent_genres, avg_released, directors, actors = watch_history_profile(watch_history)
+
     # recommend_value = genre1 * 100 + genre2 * 50 + genre3 * 20 - yearDist * 0.25 + director * 20 + star1 * 5 + star2 * 5 + star3 * 5 + star4 * 5
-    recommend_value_col = (
-        case((Movie.genre.contains(recent_genres[0][0]), 1), else_=0) * 100
-        + case((Movie.genre.contains(recent_genres[1][0]), 1), else_=0) * 50
-        + case((Movie.genre.contains(recent_genres[2][0]), 1), else_=0) * 20
-        - func.abs(Movie.release_year - avg_released) * 0.25
-        + case((Movie.director.in_(directors), 1), else_=0) * 20
-        + (
-            case((Movie.star1.in_(actors), 1), else_=0)
-            + case((Movie.star2.in_(actors), 1), else_=0)
-            + case((Movie.star3.in_(actors), 1), else_=0)
-            + case((Movie.star4.in_(actors), 1), else_=0)
+    genre_weights = Counter()
+    for genre, weight in zip(recent_genres, [100, 50, 20]):
+        genre_weights[genre] += weight
+    # genres and people of the watch history are looked up in the indexes of their links to movies
+    genre_ids = dict(db.session.execute(select(Genre.name, Genre.id).where(Genre.name.in_(genre_weights))).all())
+    genre_value = sum(
+        case(
+            (
+                select(MovieGenre.movie_id)
+                .where(MovieGenre.movie_id == Movie.id, MovieGenre.genre_id == genre_ids.get(genre))
+                .exists(),
+                weight,
+            ),
+            else_=0,
+        )
+        for genre, weight in genre_weights.items()
+    )
+    person_matches = union_all(
+        *(
+            select(MoviePerson.movie_id, literal(weight).label('value'))
+            .join(Person, Person.id == MoviePerson.person_id)
+            .where(Person.name.in_(people), MoviePerson.role == role)
+            for people, role, weight in [(directors, DIRECTOR, 20), (actors, STAR, 5)]
         )
-        * 5
+    ).subquery()
+    person_values = (
+        select(person_matches.c.movie_id, func.sum(person_matches.c.value).label('value'))
+        .group_by(person_matches.c.movie_id)
+        .subquery()
+    )
+    recommend_value_col = (
+        genre_value - func.abs(Movie.release_year - avg_released) * 0.25 + func.coalesce(person_values.c.value, 0)
     ).label('recommend_value')
     watched_ids = (
         db.session.query(Movie.id)
@@ -86,56 +203,97 @@ def find_and_calculate_recommendations(watch_history: Movie):
     recommendations = (
         db.session.query(Movie)
         .add_columns(recommend_value_col)
+        .outerjoin(person_values, person_values.c.movie_id == Movie.id)
         .where(Movie.id.not_in(watched_ids))
-        .order_by(recommend_value_col.desc())
+        .order_by(recommend_value_col.desc(), Movie.id)
     )
 
     return recommendations
 
 
+def watch_later_statement():
+    """Select movies the user wants to watch later."""
+
+    return select(Movie).join(WatchLater, Movie.id == WatchLater.movie_id).where(WatchLater.user_id == current_user.id)
+
+
+def watch_again_statement():
+    """Select movies that could be watched again, the ones that became due most recently first."""
+
+    return (
+        select(Movie)
+        .join(WatchAgain, Movie.id == WatchAgain.movie_id)
+        .where(WatchAgain.user_id == current_user.id, WatchAgain.next_due < datetime.now())
+        .order_by(WatchAgain.next_due.desc(), Movie.id.desc())
+    )
+
+
 def get_watch_again():
-    """Get movies that could be watched again."""
+    """Get movies that could be watched again, the ones that became due most recently first."""
 
-    # order watch history by movies and then by date watched in ascending order
-    watch_history = (
-        db.session.query(Movie, WatchList)
-        .join(WatchList, Movie.id == WatchList.movie_id)
-        .where(WatchList.user_id == current_user.id)
-        .order_by(Movie.id)
-        .order_by(WatchList.date_watched)
-        .all()
+    return db.session.scalars(watch_again_statement()).all()
+
+
+@event.listens_for(WatchList, 'after_insert')
+@event.listens_for(WatchList, 'after_delete')
+def refresh_watch_again(mapper, connection, target):  # pylint: disable=W0613; # signature given by sqlalchemy
+    """Update last two dates the user watched the movie when the watch history changes."""
+
+    dates = connection.scalars(
+        select(WatchList.date_watched)
+        .where(WatchList.user_id == target.user_id, WatchList.movie_id == target.movie_id)
+        .order_by(WatchList.date_watched.desc())
+        .limit(2)
+    ).all()
+    key = (WatchAgain.user_id == target.user_id, WatchAgain.movie_id == target.movie_id)
+    if not dates:
+        connection.execute(delete(WatchAgain).where(*key))
+        return
+
+    last_watched, previous_watched = dates[0], dates[1] if len(dates) > 1 else None
+    values = {
+        'last_watched': last_watched,
+        'previous_watched': previous_watched,
+        'next_due': next_due(last_watched, previous_watched),
+    }
+    statement = insert(WatchAgain).values(user_id=target.user_id, movie_id=target.movie_id, **values)
+    connection.execute(
+        statement.on_conflict_do_update(index_elements=[WatchAgain.user_id, WatchAgain.movie_id], set_=values)
     )
 
-    if len(watch_history) == 0:
-        return []
 
-    watch_again = []
-
-    i = 1
-    dates = [watch_history[0][1].date_watched]
-    while i < len(watch_history):
-        # go through whole watch history
-        movie = watch_history[i]
-
-        if movie[0].id == watch_history[i - 1][0].id:
-            # same movies as previous one
-            dates.append(movie[1].date_watched)
-        elif len(dates) > 1:
-            # different movie and previous movie id has been more than once in wh
-            diff = dates[-1] - dates[-2]
-            if dates[-1] + diff < datetime.now():
-                # since last time watched the interval between dates watched has passed
-                watch_again.append((dates[-1] + diff - datetime.now(), watch_history[i - 1][0]))
-            dates = [movie[1].date_watched]
-        i += 1
-
-    # check last movie
-    if len(dates) > 1:
-        diff = dates[-1] - dates[-2]
-        if dates[-1] + diff < datetime.now():
-            watch_again.append((datetime.now() - (dates[-1] + diff), watch_history[i - 1][0]))
-        dates = [movie[1].date_watched]
-
-    watch_again = sorted(watch_again, key=lambda i: i[0], reverse=True)
-
-    return [movie for (_, movie) in watch_again]
+def rebuild_watch_again(connection, user_ids: list):
+    """Calculate last two dates of all movies watched by given users again,
+    used instead of refresh_watch_again by bulk changes of watch histories."""
+
+    in_users = any_(bindparam('user_ids', user_ids, type_=ARRAY(Integer)))
+    ranked = (
+        select(
+            WatchList.user_id,
+            WatchList.movie_id,
+            WatchList.date_watched,
+            func.row_number()
+            .over(partition_by=[WatchList.user_id, WatchList.movie_id], order_by=WatchList.date_watched.desc())
+            .label('rank'),
+        )
+        .where(WatchList.user_id == in_users)
+        .subquery()
+    )
+    last_watched = func.max(case((ranked.c.rank == 1, ranked.c.date_watched)))
+    previous_watched = func.max(case((ranked.c.rank == 2, ranked.c.date_watched)))
+
+    connection.execute(delete(WatchAgain).where(WatchAgain.user_id == in_users))
+    connection.execute(
+        insert(WatchAgain).from_select(
+            ['user_id', 'movie_id', 'last_watched', 'previous_watched', 'next_due'],
+            select(
+                ranked.c.user_id,
+                ranked.c.movie_id,
+                last_watched,
+                previous_watched,
+                last_watched + (last_watched - previous_watched),
+            )
+            .where(ranked.c.rank <= 2)
+            .group_by(ranked.c.user_id, ranked.c.movie_id),
+        )
+    )
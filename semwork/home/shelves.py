@@ -0,0 +1,88 @@
+"""Shelves of the home page queried concurrently, each within its own timeout."""
+
+import time
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from semwork.extensions import db
+
+
+def fetch(session, statement):
+    """Get all results of the statement, entities of statements selecting one entity."""
+
+    if len(statement.column_descriptions) == 1:
+        return session.scalars(statement).all()
+    return session.execute(statement).all()
+
+
+class Shelves:
+    """Flask extension querying shelves of the home page by a pool of threads.
+
+    Every shelf is queried in its own session with statement_timeout of the shelf, so the database
+    cancels queries of slow shelves, and the page shows slow shelves empty instead of waiting for them.
+    With HOME_SHELF_WORKERS set to 0 shelves are queried one by one in the session of the request.
+    Threads take connections from the pool of the worker shared with requests, so the pool is sized
+    for the threads and the requests together.
+    """
+
+    def init_app(self, app):
+        """Create pool of threads of the app, call after configuring the pool of the database."""
+
+        app.config.setdefault('HOME_SHELF_WORKERS', app.config['DATABASE_POOL_SIZE'] // 2)
+        app.config.setdefault('HOME_SHELF_TIMEOUT', 2.0)
+        app.config.setdefault('HOME_SHELF_TIMEOUTS', {})
+        workers = app.config['HOME_SHELF_WORKERS']
+        if workers >= app.config['DATABASE_POOL_SIZE'] and not app.config['DATABASE_EXTERNAL_POOLER']:
+            app.logger.warning(
+                'HOME_SHELF_WORKERS (%s) take all connections of the pool (%s), requests wait for overflow connections',
+                workers,
+                app.config['DATABASE_POOL_SIZE'],
+            )
+        app.extensions['shelves'] = ThreadPoolExecutor(workers, thread_name_prefix='home-shelf') if workers else None
+
+    def timeout(self, name: str) -> float:
+        """Get timeout of the shelf in seconds."""
+
+        return current_app.config['HOME_SHELF_TIMEOUTS'].get(name, current_app.config['HOME_SHELF_TIMEOUT'])
+
+    def load(self, statements: dict):
+        """Get results of statements of shelves by names of the shelves, empty for shelves not loaded in time."""
+
+        executor = current_app.extensions['shelves']
+        if executor is None:
+            return {name: fetch(db.session, statement) for name, statement in statements.items()}
+
+        engine = db.session().read_engine()
+        started = time.monotonic()
+        pending = {
+            name: executor.submit(self.query, engine, statement, self.timeout(name))
+            for name, statement in statements.items()
+        }
+        loaded = {}
+        for name, future in pending.items():
+            # timeouts run from the start of all queries, so the page waits at most for the longest one
+            try:
+                loaded[name] = future.result(timeout=max(started + self.timeout(name) - time.monotonic(), 0))
+            except (futures.TimeoutError, OperationalError):
+                # queries not started yet do not take connections, started ones are cancelled by their timeout
+                future.cancel()
+                current_app.logger.warning('Shelf %s was not loaded in %s s', name, self.timeout(name))
+                loaded[name] = []
+        return loaded
+
+    @staticmethod
+    def query(engine, statement, timeout: float):
+        """Query the shelf in a new session, called by threads of the pool."""
+
+        with Session(engine, expire_on_commit=False) as session:
+            # statement_timeout 0 would disable the timeout
+            session.execute(select(func.set_config('statement_timeout', f'{max(int(timeout * 1000), 1)}ms', True)))
+            return fetch(session, statement)
+
+
+shelves = Shelves()
@@ -1,39 +1,115 @@
 """Module importing movies dataset."""
 
 import csv
+import time
+from contextlib import contextmanager
+from itertools import islice
 
-from semwork.models.movie import Movie
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
 
+from semwork.models.movie import Movie, name_to_slug, remove_accents
+from semwork.models.import_checkpoint import ImportCheckpoint
+from semwork.movies.browse import refresh_facet_counts
+from semwork.movies.links import link_movies
 
-def load_dataset(db, file_name):
-    """Import movies dataset and import to database."""
+BATCH_SIZE = 1000
+# key of the PostgreSQL advisory lock held while the dataset is imported
+IMPORT_LOCK_KEY = 7_206_114
 
+
+def movie_values(row):
+    """Transform one dataset row to column values of the movie table."""
+
+    return {
+        'name': row['Series_Title'],
+        'unaccented_name': remove_accents(row['Series_Title']),
+        'slug': name_to_slug(row['Series_Title']),
+        'poster_link': row['Poster_Link'],
+        'release_year': int(row['Released_Year']),
+        'certificate': row['Certificate'] or None,
+        'runtime': row['Runtime'],
+        'genre': row['Genre'],
+        'imdb_rating': float(row['IMDB_Rating']),
+        'summary': row['Overview'],
+        'meta_score': int(row['Meta_score']) if row['Meta_score'] else None,
+        'director': row['Director'],
+        'star1': row['Star1'],
+        'star2': row['Star2'],
+        'star3': row['Star3'],
+        'star4': row['Star4'],
+        'no_of_votes': int(row['No_of_Votes']),
+        'gross_earned': int(row['Gross'].replace(',', '').replace('\"', '')) if row['Gross'] else None,
+    }
+
+
+def read_batches(reader, batch_size):
+    """Yield rows of the reader in lists of at most batch_size rows."""
+
+    while batch := list(islice(reader, batch_size)):
+        yield batch
+
+
+def upsert_movies_statement():
+    """Create insert statement updating already imported movies with the same name and release year."""
+
+    statement = insert(Movie)
+    return statement.on_conflict_do_update(
+        index_elements=[Movie.name, Movie.release_year],
+        set_={
+            **{
+                column.name: statement.excluded[column.name]
+                for column in Movie.__table__.columns
+                if column.name not in ('id', 'name', 'release_year', 'version', 'updated_at')
+                and column.computed is None
+            },
+            'version': Movie.version + 1,
+            'updated_at': func.now(),
+        },
+    ).returning(Movie.id)
+
+
+@contextmanager
+def import_lock(db):
+    """Try to acquire lock guarding the import, yield whether it was acquired."""
+
+    with db.engine.connect() as connection:
+        acquired = connection.scalar(text('SELECT pg_try_advisory_lock(:key)'), {'key': IMPORT_LOCK_KEY})
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': IMPORT_LOCK_KEY})
+
+
+def load_dataset(db, file_name, batch_size=BATCH_SIZE, resume=False):
+    """Import movies dataset to database.
+
+    The file is streamed in batches, so only one batch is held in memory,
+    and every batch is upserted with a single executemany, linked to its genres
+    and people and committed together with the number of rows imported so far. With resume the import
+    continues after the last committed row of the previous import of the file. Facet counts of the browse page
+    are counted again once all batches are imported.
+    """
+
+    checkpoint = db.session.get(ImportCheckpoint, file_name)
+    offset = checkpoint.rows_committed if resume and checkpoint else 0
+
+    start = time.perf_counter()
+    lines_read = 0
     with open(file_name, encoding='utf-8') as dataset:
-        reader = csv.DictReader(dataset)
-        lines_read = 0
-        for row in reader:
-            new_movie = Movie(
-                name=row['Series_Title'],
-                poster_link=row['Poster_Link'],
-                release_year=row['Released_Year'],
-                runtime=row['Runtime'],
-                genre=row['Genre'],
-                imdb_rating=row['IMDB_Rating'],
-                summary=row['Overview'],
-                director=row['Director'],
-                star1=row['Star1'],
-                star2=row['Star2'],
-                star3=row['Star3'],
-                star4=row['Star4'],
-                no_of_votes=row['No_of_Votes'],
-            )
-            if row['Certificate']:
-                new_movie.certificate = row['Certificate']
-            if row['Meta_score']:
-                new_movie.meta_score = row['Meta_score']
-            if row['Gross']:
-                new_movie.gross_earned = row['Gross'].replace(',', '').replace('\"', '')
-            db.session.add(new_movie)
+        reader = islice(csv.DictReader(dataset), offset, None)
+        for batch in read_batches(reader, batch_size):
+            # rows with the same name and release year can not be upserted in one statement
+            values = {(row['Series_Title'], row['Released_Year']): movie_values(row) for row in batch}
+            movie_ids = db.session.scalars(upsert_movies_statement(), list(values.values())).all()
+            link_movies(db.session.connection(), movie_ids)
+            lines_read += len(batch)
+            db.session.merge(ImportCheckpoint(source=file_name, rows_committed=offset + lines_read))
             db.session.commit()
-            lines_read += 1
-        print(f'Movies added: {lines_read}')
+    refresh_facet_counts(db.session.connection())
+    db.session.commit()
+
+    elapsed = time.perf_counter() - start
+    print(f'Movies added: {lines_read} ({lines_read / elapsed if elapsed else 0:.0f} rows/s)')
+    return lines_read
@@ -0,0 +1,8 @@
+"""Metrics module init file."""
+
+from flask import Blueprint
+
+bp = Blueprint('metrics', __name__)
+
+# according to official documentation this is intended
+from semwork.metrics import routes  # pylint: disable=C0413; # noqa
@@ -0,0 +1,83 @@
+"""Module providing metrics of the worker in Prometheus text format."""
+
+import hmac
+import os
+
+from flask import Response, abort, current_app, request
+
+from semwork.cache import cache
+from semwork.extensions import db
+from semwork.metrics import bp  # pylint: disable=R0401; # noqa
+from semwork.pool import database_pool
+from semwork.profiling import profiler
+
+# metrics of the pool with their Prometheus types and descriptions
+POOL_METRICS = [
+    ('size', 'gauge', 'Number of connections kept by the pool.'),
+    ('checked_in', 'gauge', 'Number of idle connections in the pool.'),
+    ('checked_out', 'gauge', 'Number of connections in use.'),
+    ('overflow', 'gauge', 'Number of connections opened over the size of the pool.'),
+    ('checkouts', 'counter', 'Number of connections taken from the pool.'),
+    ('overflows', 'counter', 'Number of connections opened over the size of the pool.'),
+    ('timeouts', 'counter', 'Number of requests for connection that timed out.'),
+    ('wait_seconds', 'counter', 'Time spent getting connections from the pool.'),
+    ('max_wait_seconds', 'gauge', 'Longest time spent getting one connection from the pool.'),
+]
+
+# totals of profiled requests by endpoints with their descriptions, all are counters
+PROFILE_METRICS = [
+    ('requests', 'Number of profiled requests.'),
+    ('request_seconds', 'Wall time of profiled requests.'),
+    ('sql_queries', 'Number of SQL queries of profiled requests.'),
+    ('sql_seconds', 'Time of SQL queries of profiled requests.'),
+    ('slow_queries', 'Number of slow SQL queries of profiled requests.'),
+    ('template_seconds', 'Time of rendering templates of profiled requests.'),
+]
+
+
+def format_metric(name: str, kind: str, description: str, samples: list) -> list:
+    """Format one metric with its samples, pairs of labels and values, in Prometheus text format."""
+
+    lines = [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+    for labels, value in samples:
+        label_text = ','.join(f'{key}="{label}"' for key, label in labels.items())
+        lines.append(f'{name}{{{label_text}}} {value}')
+    return lines
+
+
+@bp.before_request
+def check_token():
+    """Allow access to metrics only with bearer token METRICS_TOKEN, when it is set."""
+
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+
+
+@bp.route('/metrics')
+def metrics():
+    """Route with metrics of this worker."""
+
+    labels = {'pid': os.getpid()}
+    lines = []
+    pool_metrics = database_pool.metrics(db.engine)
+    if pool_metrics is not None:
+        for name, kind, description in POOL_METRICS:
+            lines += format_metric(f'semwork_db_pool_{name}', kind, description, [(labels, pool_metrics[name])])
+
+    cache_samples = []
+    for key, value in sorted(cache.stats().items()):
+        kind, result = key.rsplit('_', 1)
+        cache_samples.append(({**labels, 'kind': kind, 'result': result}, value))
+    if cache_samples:
+        lines += format_metric('semwork_cache_lookups', 'counter', 'Number of lookups of cached values.', cache_samples)
+
+    profile_stats = profiler.stats()
+    if profile_stats:
+        for name, description in PROFILE_METRICS:
+            samples = [
+                ({**labels, 'endpoint': endpoint}, totals.get(name, 0))
+                for endpoint, totals in sorted(profile_stats.items())
+            ]
+            lines += format_metric(f'semwork_{name}', 'counter', description, samples)
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,23 @@
+"""Module defining SQLAlchemy model of FacetCount."""
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from semwork.extensions import db
+
+
+class FacetCount(db.Model):  # pylint: disable=R0903; # sqlalchemy class used to only store data
+    """Class representing table FacetCount in database.
+    Numbers of movies by values of browse filters, precomputed after movies are imported.
+    """
+
+    facet: Mapped[str] = mapped_column(primary_key=True)
+    value: Mapped[str] = mapped_column(primary_key=True)
+    movies: Mapped[int]
+
+    def __init__(self, facet: str, value: str, movies: int):
+        self.facet = facet
+        self.value = value
+        self.movies = movies
+
+    def __repr__(self):
+        return f'<FacetCount {self.facet}> Value: {self.value} Movies: {self.movies}'
@@ -0,0 +1,18 @@
+"""Module defining SQLAlchemy model of Genre."""
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from semwork.extensions import db
+
+
+class Genre(db.Model):  # pylint: disable=R0903; # sqlalchemy class used to only store data
+    """Class representing table Genre in database."""
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(unique=True)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return f'<Genre {self.name}>'
@@ -0,0 +1,21 @@
+"""Module defining SQLAlchemy model of ImportCheckpoint."""
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from semwork.extensions import db
+
+
+class ImportCheckpoint(db.Model):  # pylint: disable=R0903; # sqlalchemy class used to only store data
+    """Class representing table ImportCheckpoint in database.
+    Stores number of rows of the dataset file already committed to database.
+    """
+
+    source: Mapped[str] = mapped_column(primary_key=True)
+    rows_committed: Mapped[int] = mapped_column(default=0)
+
+    def __init__(self, source: str, rows_committed: int):
+        self.source = source
+        self.rows_committed = rows_committed
+
+    def __repr__(self):
+        return f'<ImportCheckpoint {self.source}> Rows committed: {self.rows_committed}'
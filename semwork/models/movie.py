@@ -1,18 +1,83 @@
 """Module defining SQLAlchemy model of Movie."""
 
+import re
 import unicodedata
+from datetime import datetime
 
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import DDL, Computed, DateTime, Index, UniqueConstraint, event, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Mapped, mapped_column, validates
 
 from semwork.extensions import db
 
+# extensions used by search, unaccent() is only stable
+# and generated columns and indexes need an immutable function
+SEARCH_FUNCTIONS = """
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+"""
+
+# document searched by full-text search, movie names are ranked higher than people and summary,
+# punctuation is replaced with spaces the same way as in search prompts
+SEARCH_VECTOR = " || ".join(
+    f"setweight(to_tsvector('english', regexp_replace(immutable_unaccent({document}), '[^[:alnum:]]+', ' ', 'g')),"
+    f" '{weight}')"
+    for document, weight in [
+        ('name', 'A'),
+        ("director || ' ' || star1 || ' ' || star2 || ' ' || star3 || ' ' || star4", 'B'),
+        ('summary', 'C'),
+    ]
+)
+
+
+def remove_accents(text: str) -> str:
+    """Remove accents from given text."""
+
+    return unicodedata.normalize('NFD', text).encode('ASCII', 'ignore').decode("utf-8")
+
+
+def name_to_slug(name: str) -> str:
+    """Transform movie name to the name used in urls of the movie."""
+
+    # remove non-words character and lowercase letters
+    slug = re.sub('[^a-zA-Z0-9 -]+', '', remove_accents(name))
+    # replace ' - ' with just one space
+    slug = re.sub('( - )+', ' ', slug)
+    # lowercase all and replace spaces with dash
+    return slug.lower().replace(' ', '-')
+
 
 class Movie(db.Model):  # pylint: disable=R0902,R0903; # sqlalchemy class used to only store data
     """Class representing table Movie in database."""
 
+    __table_args__ = (
+        UniqueConstraint('name', 'release_year', name='movie_name_release_year_key'),
+        Index('ix_movie_search_vector', 'search_vector', postgresql_using='gin'),
+        # movies with the most similar names are read from the trigram index in the order of their distance,
+        # signatures longer than the default 12 bytes keep the index selective in catalogues of millions of names
+        Index(
+            'ix_movie_unaccented_name_trgm_gist',
+            'unaccented_name',
+            postgresql_using='gist',
+            postgresql_ops={'unaccented_name': 'gist_trgm_ops(siglen=256)'},
+        ),
+        # movies sorted by release year, rating or votes and filtered by certificate, ties ordered by id
+        Index('ix_movie_release_year_id', 'release_year', 'id'),
+        Index('ix_movie_imdb_rating_id', 'imdb_rating', 'id'),
+        Index('ix_movie_no_of_votes_id', 'no_of_votes', 'id'),
+        Index('ix_movie_certificate_id', 'certificate', 'id'),
+        # movies changed since the last refresh are looked up by the autocomplete index, see semwork.movies.autocomplete
+        Index('ix_movie_updated_at', 'updated_at'),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str]
     unaccented_name: Mapped[str]
+    # name used in urls, stored so links are not computed on every render
+    slug: Mapped[str] = mapped_column(index=True)
     poster_link: Mapped[str]
     release_year: Mapped[int]
     certificate: Mapped[str] = mapped_column(nullable=True)
@@ -28,6 +93,14 @@ class Movie(db.Model):  # pylint: disable=R0902,R0903; # sqlalchemy class used t
     star4: Mapped[str]
     no_of_votes: Mapped[int]
     gross_earned: Mapped[int] = mapped_column(nullable=True)
+    search_vector: Mapped[str] = mapped_column(TSVECTOR, Computed(SEARCH_VECTOR, persisted=True), deferred=True)
+    # incremented by every update, identifies the content of the movie in ETags of pages
+    version: Mapped[int] = mapped_column(default=1, server_default='1')
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), onupdate=func.now(), server_default=func.now()
+    )
+
+    __mapper_args__ = {'version_id_col': version}
 
     def __init__(
         self,
@@ -46,7 +119,7 @@ class Movie(db.Model):  # pylint: disable=R0902,R0903; # sqlalchemy class used t
         no_of_votes: int,
     ):  # pylint: disable=R0913; # related to previous warnings
         self.name = name
-        self.unaccented_name = unicodedata.normalize('NFD', name).encode('ASCII', 'ignore').decode("utf-8")
+        self.unaccented_name = remove_accents(name)
         self.poster_link = poster_link
         self.release_year = release_year
         self.runtime = runtime
@@ -60,10 +133,18 @@ class Movie(db.Model):  # pylint: disable=R0902,R0903; # sqlalchemy class used t
         self.star4 = star4
         self.no_of_votes = no_of_votes
 
+    @validates('name')
+    def validate_name(self, _, name):
+        """Keep slug of the movie up to date with its name."""
+
+        self.slug = name_to_slug(name)
+        return name
+
     def __repr__(self):
         return (
             f'<Movie {self.name}>'
             f' {self.unaccented_name}'
+            f' {self.slug}'
             f' {self.poster_link}'
             f' {self.release_year}'
             f' {self.runtime}'
@@ -77,3 +158,10 @@ class Movie(db.Model):  # pylint: disable=R0902,R0903; # sqlalchemy class used t
             f' {self.star4}'
             f' {self.no_of_votes}'
         )
+
+
+# gross earnings movies are sorted by, unknown earnings are sorted as zero, so all movies have a cursor
+SORTED_GROSS_EARNED = func.coalesce(Movie.gross_earned, 0)
+Index('ix_movie_sorted_gross_earned_id', SORTED_GROSS_EARNED, Movie.id)
+
+event.listen(Movie.__table__, 'before_create', DDL(SEARCH_FUNCTIONS))
@@ -0,0 +1,35 @@
+"""Module defining SQLAlchemy model of MovieChange."""
+
+from sqlalchemy import DDL, BigInteger, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from semwork.extensions import db
+from semwork.models.movie import Movie
+
+# every statement changing movies increments the counter in its transaction, so concurrent changes
+# wait for each other and readers see the incremented counter only together with the committed changes
+COUNT_MOVIE_CHANGES = """
+CREATE OR REPLACE FUNCTION count_movie_change() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE movie_change SET changes = changes + 1 WHERE id = 1;
+    RETURN NULL;
+END $$;
+CREATE TRIGGER count_movie_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON movie
+    FOR EACH STATEMENT EXECUTE FUNCTION count_movie_change();
+"""
+
+
+class MovieChange(db.Model):  # pylint: disable=R0903; # sqlalchemy class used to only store data
+    """Class representing table MovieChange in database.
+    Its only row counts statements that changed movies, in-process copies of movies are loaded again when it changes.
+    """
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    changes: Mapped[int] = mapped_column(BigInteger)
+
+    def __repr__(self):
+        return f'<MovieChange> Changes: {self.changes}'
+
+
+event.listen(MovieChange.__table__, 'after_create', DDL('INSERT INTO movie_change (id, changes) VALUES (1, 0)'))
+event.listen(Movie.__table__, 'after_create', DDL(COUNT_MOVIE_CHANGES))
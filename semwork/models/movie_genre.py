@@ -0,0 +1,24 @@
+"""Module defining SQLAlchemy model of MovieGenre."""
+
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from semwork.extensions import db
+
+
+class MovieGenre(db.Model):  # pylint: disable=R0903; # sqlalchemy class used to only store data
+    """Class representing table MovieGenre in database.
+    Genres of the movie, the index finds movies of a genre.
+    """
+
+    __table_args__ = (Index('ix_movie_genre_genre_id_movie_id', 'genre_id', 'movie_id'),)
+
+    movie_id: Mapped[int] = mapped_column(ForeignKey('movie.id', ondelete='CASCADE'), primary_key=True)
+    genre_id: Mapped[int] = mapped_column(ForeignKey('genre.id', ondelete='CASCADE'), primary_key=True)
+
+    def __init__(self, movie_id: int, genre_id: int):
+        self.movie_id = movie_id
+        self.genre_id = genre_id
+
+    def __repr__(self):
+        return f'<MovieGenre> Movie: {self.movie_id} Genre: {self.genre_id}'
@@ -0,0 +1,31 @@
+"""Module defining SQLAlchemy model of MoviePerson."""
+
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from semwork.extensions import db
+
+DIRECTOR = 'director'
+STAR = 'star'
+
+
+class MoviePerson(db.Model):  # pylint: disable=R0903; # sqlalchemy class used to only store data
+    """Class representing table MoviePerson in database.
+    Director (position 0) and stars (positions 1 to 4) of the movie, the index finds movies of a person.
+    """
+
+    __table_args__ = (Index('ix_movie_person_person_id_role', 'person_id', 'role', 'movie_id'),)
+
+    movie_id: Mapped[int] = mapped_column(ForeignKey('movie.id', ondelete='CASCADE'), primary_key=True)
+    position: Mapped[int] = mapped_column(primary_key=True)
+    person_id: Mapped[int] = mapped_column(ForeignKey('person.id', ondelete='CASCADE'))
+    role: Mapped[str]
+
+    def __init__(self, movie_id: int, position: int, person_id: int, role: str):
+        self.movie_id = movie_id
+        self.position = position
+        self.person_id = person_id
+        self.role = role
+
+    def __repr__(self):
+        return f'<MoviePerson {self.role}> Movie: {self.movie_id} Person: {self.person_id} Position: {self.position}'
@@ -0,0 +1,20 @@
+"""Module defining SQLAlchemy model of Person."""
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from semwork.extensions import db
+
+
+class Person(db.Model):  # pylint: disable=R0903; # sqlalchemy class used to only store data
+    """Class representing table Person in database.
+    Directors and stars of movies.
+    """
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(unique=True)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return f'<Person {self.name}>'
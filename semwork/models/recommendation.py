@@ -0,0 +1,26 @@
+"""Module defining SQLAlchemy model of Recommendation."""
+
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from semwork.extensions import db
+
+
+class Recommendation(db.Model):  # pylint: disable=R0903; # sqlalchemy class used to only store data
+    """Class representing table Recommendation in database.
+    Stores precomputed recommended movies of the user.
+    """
+
+    __table_args__ = (Index('ix_recommendation_user_id_value', 'user_id', 'value'),)
+
+    user_id: Mapped[int] = mapped_column(ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    movie_id: Mapped[int] = mapped_column(ForeignKey('movie.id', ondelete='CASCADE'), primary_key=True)
+    value: Mapped[float]
+
+    def __init__(self, user_id: int, movie_id: int, value: float):
+        self.user_id = user_id
+        self.movie_id = movie_id
+        self.value = value
+
+    def __repr__(self):
+        return f'<Recommendation {self.value}> User: {self.user_id} Movie: {self.movie_id}'
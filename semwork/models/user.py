@@ -12,6 +12,8 @@ class User(UserMixin, db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
     username: Mapped[str] = mapped_column(unique=True)
     password: Mapped[str]
+    # set when watch history changes, precomputed recommendations are then calculated again
+    recommendations_outdated: Mapped[bool] = mapped_column(default=True, server_default='true')
 
     def __init__(self, username: str, password: str):
         self.username = username
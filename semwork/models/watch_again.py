@@ -0,0 +1,45 @@
+"""Module defining SQLAlchemy model of WatchAgain."""
+
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from semwork.extensions import db
+
+
+def next_due(last_watched: datetime, previous_watched: datetime):
+    """Get when the movie watched on given dates is due to be watched again."""
+
+    return last_watched + (last_watched - previous_watched) if previous_watched else None
+
+
+class WatchAgain(db.Model):  # pylint: disable=R0903; # sqlalchemy class used to only store data
+    """Class representing table WatchAgain in database.
+    Last two dates the user watched the movie, the movie is due to be watched again
+    when the interval between them passes after the last date.
+    """
+
+    __table_args__ = (Index('ix_watch_again_user_id_next_due', 'user_id', 'next_due'),)
+
+    user_id: Mapped[int] = mapped_column(ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    movie_id: Mapped[int] = mapped_column(ForeignKey('movie.id', ondelete='CASCADE'), primary_key=True)
+    last_watched: Mapped[datetime]
+    previous_watched: Mapped[datetime] = mapped_column(nullable=True)
+    next_due: Mapped[datetime] = mapped_column(nullable=True)
+
+    def __init__(self, user_id: int, movie_id: int, last_watched: datetime, previous_watched: datetime = None):
+        self.user_id = user_id
+        self.movie_id = movie_id
+        self.last_watched = last_watched
+        self.previous_watched = previous_watched
+        self.next_due = next_due(last_watched, previous_watched)
+
+    def __repr__(self):
+        return (
+            f'<WatchAgain {self.next_due}>'
+            f' User: {self.user_id}'
+            f' Movie: {self.movie_id}'
+            f' Last watched: {self.last_watched}'
+            f' Previous watched: {self.previous_watched}'
+        )
@@ -1,6 +1,6 @@
 """Module defining SQLAlchemy model of WatchLater."""
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from semwork.extensions import db
@@ -9,6 +9,9 @@ from semwork.extensions import db
 class WatchLater(db.Model):  # pylint: disable=R0903; # sqlalchemy class used to only store data
     """Class representing table WatchLater in database."""
 
+    # the primary key finds movies of users, the index finds users of movies
+    __table_args__ = (Index('ix_watch_later_movie_id', 'movie_id'),)
+
     user_id: Mapped[int] = mapped_column(ForeignKey('user.id'), primary_key=True)
     movie_id: Mapped[int] = mapped_column(ForeignKey('movie.id'), primary_key=True)
 
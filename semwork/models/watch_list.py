@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from semwork.extensions import db
@@ -11,6 +11,13 @@ from semwork.extensions import db
 class WatchList(db.Model):  # pylint: disable=R0903; # sqlalchemy class used to only store data
     """Class representing table WatchList in database."""
 
+    __table_args__ = (
+        Index('ix_watch_list_user_id_date_watched_id', 'user_id', 'date_watched', 'id'),
+        Index('ix_watch_list_user_id_movie_id_date_watched', 'user_id', 'movie_id', 'date_watched'),
+        # finds watch history entries of movies, e.g. when movies are deleted
+        Index('ix_watch_list_movie_id', 'movie_id'),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('user.id'), primary_key=True)
     movie_id: Mapped[int] = mapped_column(ForeignKey('movie.id'), primary_key=True)
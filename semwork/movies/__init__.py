@@ -5,4 +5,4 @@ from flask import Blueprint
 bp = Blueprint('movies', __name__)
 
 # according to official documentation this is intended
-from semwork.movies import routes  # pylint: disable=C0413; # noqa
+from semwork.movies import routes, async_routes, commands, links  # pylint: disable=C0413; # noqa
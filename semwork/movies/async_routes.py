@@ -0,0 +1,81 @@
+"""Module providing async versions of read-heavy /movies sites, used in async mode."""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from sqlalchemy import func, select
+from flask import request, redirect, url_for
+
+from semwork.async_db import async_db, async_view, render_template_async
+from semwork.cache import cache
+from semwork.conditional import conditional
+from semwork.movies.browse import browse_arguments, group_facet_counts
+from semwork.movies.catalogue import catalogue
+from semwork.movies.pagination import LoadedPagination
+from semwork.movies.routes import browse_pagination, browse_validators, movie_validators, search_query
+from semwork.models.facet_count import FacetCount
+from semwork.models.movie import Movie
+
+
+@async_view('movies.browse')
+@conditional(browse_validators)
+@cache.cached_page
+async def browse():
+    """Route to the browse movies page."""
+
+    pagination = browse_pagination(select(Movie), load=False)
+    items, counts = await asyncio.gather(
+        async_db.scalars(pagination.statement),
+        async_db.execute(select(FacetCount.facet, FacetCount.value, FacetCount.movies)),
+    )
+    pagination.load_items(items)
+    return await render_template_async(
+        'movies/browse.html', pagination=pagination, arguments=browse_arguments(), facets=group_facet_counts(counts)
+    )
+
+
+@async_view('movies.movie')
+@conditional(movie_validators)
+@cache.cached_page
+async def movie(movie_id, name):
+    """Route to the specific movie page."""
+
+    record = await sync_to_async(catalogue.get, thread_sensitive=False)(movie_id, name.lower())
+    if record is None or record.slug != name.lower():
+        # incorrect id or name
+        return redirect(url_for('movies.not_found'))
+
+    queried_movie = await async_db.get(Movie, movie_id)
+    if queried_movie is None:
+        # deleted since the record was loaded
+        return redirect(url_for('movies.not_found'))
+
+    return await render_template_async('movies/movie.html', movie=queried_movie, **request.args)
+
+
+@async_view('movies.search_movie')
+async def search_movie():
+    """Route to the page with search results, the page and the total are queried concurrently."""
+
+    prompt = request.values.get('search')
+    if prompt is None:
+        return redirect(url_for('movies.not_found'))
+    if prompt == '':
+        return redirect(url_for('movies.browse'))
+
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = 24
+    mode = request.args.get('mode')
+    query = search_query(prompt, mode)
+    if mode == 'fuzzy':
+        # similar names are not counted, only the page is read from the trigram index
+        items = await async_db.scalars(query.limit(per_page + 1).offset((page - 1) * per_page))
+        pagination = LoadedPagination(page=page, per_page=per_page, items=items)
+    else:
+        items, total = await asyncio.gather(
+            async_db.scalars(query.limit(per_page).offset((page - 1) * per_page)),
+            async_db.scalars(select(func.count()).select_from(query.order_by(None).subquery())),
+        )
+        pagination = LoadedPagination(page=page, per_page=per_page, items=items, total=total[0])
+
+    return await render_template_async('movies/search.html', prompt=prompt, mode=mode, pagination=pagination)
@@ -0,0 +1,168 @@
+"""In-process prefix index of movie names and people used for search suggestions."""
+
+import re
+import time
+from bisect import bisect_left
+from datetime import timedelta
+from threading import Lock
+
+from flask import current_app
+from sqlalchemy import event, func, select
+
+from semwork.extensions import db
+from semwork.models.movie import Movie, remove_accents
+
+MOVIE = 'movie'
+PERSON = 'person'
+# leading words of movie names that users usually do not type
+ARTICLES = ('the ', 'a ', 'an ')
+
+
+def normalize(text: str):
+    """Transform text to unaccented lowercase words separated by one space."""
+
+    return ' '.join(re.sub('[^a-z0-9]+', ' ', remove_accents(text).lower()).split())
+
+
+class PrefixIndex:
+    """Sorted array of (key, label, kind, movie id) entries searched by key prefix with bisect.
+
+    New entries are merged into a copy of the array that replaces the old one at once,
+    so searches running in other threads never see a partially updated array.
+    People stay in the index until it is created again, even when their movies are removed.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.people = set()
+        self.movie_ids = set()
+        # time of the database when the last refresh started and monotonic time of the worker when it ended,
+        # None before the first refresh and after changes by this worker
+        self.refresh_started_at = None
+        self.refreshed_at = None
+        self.lock = Lock()
+
+    def add_movies(self, movies):
+        """Add movies given as rows of id, name, director and stars, entries of already indexed movies are replaced."""
+
+        new_entries = []
+        changed_ids = set()
+        for movie_id, name, *people in movies:
+            key = normalize(name)
+            new_entries.append((key, name, MOVIE, movie_id))
+            for article in ARTICLES:
+                if key.startswith(article):
+                    new_entries.append((key[len(article) :], name, MOVIE, movie_id))
+            for person in people:
+                person_key = normalize(person)
+                if person_key not in self.people:
+                    self.people.add(person_key)
+                    new_entries.append((person_key, person, PERSON, None))
+            if movie_id in self.movie_ids:
+                changed_ids.add(movie_id)
+            self.movie_ids.add(movie_id)
+
+        if new_entries:
+            entries = [entry for entry in self.entries if entry[3] not in changed_ids] if changed_ids else self.entries
+            self.entries = sorted(entries + new_entries, key=lambda entry: entry[0])
+
+    def remove_movies(self, movie_ids: set):
+        """Remove entries of the movies."""
+
+        if movie_ids:
+            self.entries = [entry for entry in self.entries if entry[3] not in movie_ids]
+            self.movie_ids -= movie_ids
+
+    def search(self, prompt: str, limit: int):
+        """Return at most limit entries whose key starts with the normalized prompt."""
+
+        prefix = normalize(prompt)
+        if not prefix:
+            return []
+
+        entries = self.entries
+        found = []
+        seen = set()
+        i = bisect_left(entries, prefix, key=lambda entry: entry[0])
+        while i < len(entries) and len(found) < limit and entries[i][0].startswith(prefix):
+            # movie names starting with an article are stored twice
+            if entries[i][1:] not in seen:
+                seen.add(entries[i][1:])
+                found.append(entries[i])
+            i += 1
+        return found
+
+
+class Autocomplete:
+    """Flask extension keeping one prefix index per app and worker.
+
+    The index is loaded on first use, movies changed by this worker are updated on the next use
+    and movies changed elsewhere after AUTOCOMPLETE_REFRESH_INTERVAL seconds, always by loading
+    only movies changed since AUTOCOMPLETE_REFRESH_OVERLAP seconds before the start of the last refresh.
+    Changes are stamped by the start of their transactions, so the overlap also loads changes of transactions
+    that were not committed yet during the last refresh, as long as they ran for less than the overlap.
+    Deleted movies and movies added by longer transactions are found by comparing the number of movies.
+    """
+
+    def init_app(self, app):
+        """Register prefix index of the app."""
+
+        app.config.setdefault('AUTOCOMPLETE_REFRESH_INTERVAL', 300)
+        app.config.setdefault('AUTOCOMPLETE_REFRESH_OVERLAP', 60)
+        app.extensions['autocomplete'] = PrefixIndex()
+
+    @property
+    def index(self) -> PrefixIndex:
+        """Prefix index of the current app."""
+
+        return current_app.extensions['autocomplete']
+
+    def refresh(self, force: bool = False):
+        """Load movies changed since the last refresh and remove deleted ones when the refresh interval has passed."""
+
+        index = self.index
+        interval = current_app.config['AUTOCOMPLETE_REFRESH_INTERVAL']
+
+        def fresh():
+            return not force and index.refreshed_at is not None and time.monotonic() - index.refreshed_at < interval
+
+        if fresh():
+            return
+
+        with index.lock:
+            if fresh():
+                # refreshed by another thread meanwhile
+                return
+            started_at = db.session.scalar(select(func.clock_timestamp()))
+            movies = select(Movie.id, Movie.name, Movie.director, Movie.star1, Movie.star2, Movie.star3, Movie.star4)
+            changed = movies
+            if index.refresh_started_at is not None:
+                overlap = timedelta(seconds=current_app.config['AUTOCOMPLETE_REFRESH_OVERLAP'])
+                changed = movies.where(Movie.updated_at > index.refresh_started_at - overlap)
+            index.add_movies(db.session.execute(changed.order_by(Movie.id)).all())
+            if len(index.movie_ids) != db.session.scalar(select(func.count(Movie.id))):
+                movie_ids = set(db.session.scalars(select(Movie.id)))
+                index.remove_movies(index.movie_ids - movie_ids)
+                missing = movies.where(Movie.id.in_(movie_ids - index.movie_ids))
+                index.add_movies(db.session.execute(missing.order_by(Movie.id)).all())
+            index.refresh_started_at = started_at
+            index.refreshed_at = time.monotonic()
+
+    def suggest(self, prompt: str, limit: int = 10):
+        """Return movies and people starting with the prompt."""
+
+        self.refresh()
+        return self.index.search(prompt, limit)
+
+
+autocomplete = Autocomplete()
+
+
+@event.listens_for(Movie, 'after_insert')
+@event.listens_for(Movie, 'after_update')
+@event.listens_for(Movie, 'after_delete')
+def refresh_after_change(mapper, connection, target):  # pylint: disable=W0613; # signature given by sqlalchemy
+    """Refresh prefix index on next use when this worker adds, changes or deletes a movie."""
+
+    if 'autocomplete' in current_app.extensions:
+        current_app.extensions['autocomplete'].refreshed_at = None
@@ -0,0 +1,177 @@
+"""Filters, sorts and facet counts of the browse movies page."""
+
+from flask import g, request
+from sqlalchemy import String, cast, delete, event, func, inspect, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+
+from semwork.extensions import db
+from semwork.models.facet_count import FacetCount
+from semwork.models.genre import Genre
+from semwork.models.movie import SORTED_GROSS_EARNED, Movie
+from semwork.models.movie_genre import MovieGenre
+from semwork.models.movie_person import DIRECTOR, MoviePerson
+from semwork.models.person import Person
+
+# sorts of the page by names, every sort has an index of its key columns, so pages are read from the index,
+# sorts are key columns, values of the key of one movie and whether the greatest values are first
+SORTS = {
+    'id': ([Movie.id], lambda movie: [movie.id], False),
+    'rating': ([Movie.imdb_rating, Movie.id], lambda movie: [movie.imdb_rating, movie.id], True),
+    'votes': ([Movie.no_of_votes, Movie.id], lambda movie: [movie.no_of_votes, movie.id], True),
+    'gross': ([SORTED_GROSS_EARNED, Movie.id], lambda movie: [movie.gross_earned or 0, movie.id], True),
+    'year': ([Movie.release_year, Movie.id], lambda movie: [movie.release_year, movie.id], True),
+}
+# columns of movies needed by keys of all sorts
+SORT_COLUMNS = [Movie.imdb_rating, Movie.no_of_votes, Movie.gross_earned, Movie.release_year]
+# arguments of the page with their types, empty arguments are ignored
+FILTERS = {
+    'genre': str,
+    'certificate': str,
+    'director': str,
+    'year_from': int,
+    'year_to': int,
+    'min_rating': float,
+}
+# facets shown with numbers of movies, decades are filtered by the year range
+FACETS = ['genre', 'certificate', 'decade']
+# columns of movies the facets are counted from
+FACET_COLUMNS = ['genre', 'certificate', 'release_year']
+
+
+def browse_arguments() -> dict:
+    """Get valid filters and sort of the request, invalid values are ignored."""
+
+    arguments = {}
+    for name, kind in FILTERS.items():
+        value = request.args.get(name, type=kind)
+        if value is not None and value != '':
+            arguments[name] = value
+    if request.args.get('sort') in SORTS and request.args['sort'] != 'id':
+        arguments['sort'] = request.args['sort']
+    return arguments
+
+
+def filter_movies(query, arguments: dict):
+    """Add conditions of the filters to the query of movies.
+
+    Genres and directors are found by indexes of their link tables instead of matching text columns."""
+
+    if 'genre' in arguments:
+        genre_movies = select(MovieGenre.movie_id).join(Genre, Genre.id == MovieGenre.genre_id)
+        query = query.where(Movie.id.in_(genre_movies.where(Genre.name == arguments['genre'])))
+    if 'director' in arguments:
+        director_movies = select(MoviePerson.movie_id).join(Person, Person.id == MoviePerson.person_id)
+        query = query.where(
+            Movie.id.in_(director_movies.where(Person.name == arguments['director'], MoviePerson.role == DIRECTOR))
+        )
+    if 'certificate' in arguments:
+        query = query.where(Movie.certificate == arguments['certificate'])
+    if 'year_from' in arguments:
+        query = query.where(Movie.release_year >= arguments['year_from'])
+    if 'year_to' in arguments:
+        query = query.where(Movie.release_year <= arguments['year_to'])
+    if 'min_rating' in arguments:
+        query = query.where(Movie.imdb_rating >= arguments['min_rating'])
+    return query
+
+
+def facet_counts_query():
+    """Create query of (facet, value, number of movies) rows of all facets."""
+
+    decade = Movie.release_year // 10 * 10
+    return union_all(
+        select(literal('genre'), Genre.name, func.count())
+        .join(MovieGenre, MovieGenre.genre_id == Genre.id)
+        .group_by(Genre.name),
+        select(literal('certificate'), Movie.certificate, func.count())
+        .where(Movie.certificate.is_not(None))
+        .group_by(Movie.certificate),
+        select(literal('decade'), cast(decade, String), func.count()).group_by(decade),
+    )
+
+
+def refresh_facet_counts(connection):
+    """Replace facet counts by numbers of movies counted by one query."""
+
+    connection.execute(delete(FacetCount))
+    connection.execute(insert(FacetCount).from_select(['facet', 'value', 'movies'], facet_counts_query()))
+
+
+def movie_facets(genre: str, certificate: str, release_year: int) -> list:
+    """Get (facet, value) pairs of the movie with given columns."""
+
+    facets = [('genre', name) for name in dict.fromkeys(genre.split(', ')) if name]
+    if certificate is not None:
+        facets.append(('certificate', certificate))
+    facets.append(('decade', str(release_year // 10 * 10)))
+    return facets
+
+
+def change_facet_counts(connection, facets: list, change: int):
+    """Add change to counts of the facets, counts dropping to zero are removed."""
+
+    statement = insert(FacetCount).values(
+        [{'facet': facet, 'value': value, 'movies': change} for facet, value in facets]
+    )
+    connection.execute(
+        statement.on_conflict_do_update(
+            index_elements=['facet', 'value'], set_={'movies': FacetCount.movies + statement.excluded.movies}
+        )
+    )
+    connection.execute(delete(FacetCount).where(FacetCount.movies <= 0))
+
+
+def committed_facets(target) -> list:
+    """Get (facet, value) pairs of the movie before its flushed change."""
+
+    values = []
+    for name in FACET_COLUMNS:
+        history = inspect(target).attrs[name].history
+        values.append(history.deleted[0] if history.deleted else getattr(target, name))
+    return movie_facets(*values)
+
+
+@event.listens_for(Movie, 'after_insert')
+def count_after_insert(mapper, connection, target):  # pylint: disable=W0613; # signature given by sqlalchemy
+    """Count movie added through the session, imports count all movies again instead."""
+
+    change_facet_counts(connection, movie_facets(target.genre, target.certificate, target.release_year), 1)
+
+
+@event.listens_for(Movie, 'after_update')
+def count_after_update(mapper, connection, target):  # pylint: disable=W0613; # signature given by sqlalchemy
+    """Move changed movie to counts of its new facets."""
+
+    old, new = committed_facets(target), movie_facets(target.genre, target.certificate, target.release_year)
+    if removed := [facet for facet in old if facet not in new]:
+        change_facet_counts(connection, removed, -1)
+    if added := [facet for facet in new if facet not in old]:
+        change_facet_counts(connection, added, 1)
+
+
+@event.listens_for(Movie, 'after_delete')
+def count_after_delete(mapper, connection, target):  # pylint: disable=W0613; # signature given by sqlalchemy
+    """Remove movie deleted through the session from counts."""
+
+    change_facet_counts(connection, committed_facets(target), -1)
+
+
+def group_facet_counts(rows) -> dict:
+    """Group (facet, value, number of movies) rows by facets, values with most movies first."""
+
+    counts = {facet: [] for facet in FACETS}
+    for facet, value, movies in sorted(rows, key=lambda row: (-row[2], row[1])):
+        counts.setdefault(facet, []).append((value, movies))
+    # decades are listed in order of time
+    counts['decade'].sort(key=lambda count: int(count[0]))
+    return counts
+
+
+def facet_counts() -> dict:
+    """Get numbers of movies by facets and their values, loaded by one query per request."""
+
+    if 'facet_counts' not in g:
+        g.facet_counts = group_facet_counts(
+            db.session.execute(select(FacetCount.facet, FacetCount.value, FacetCount.movies)).all()
+        )
+    return g.facet_counts
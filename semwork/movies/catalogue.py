@@ -0,0 +1,85 @@
+"""In-process read-through cache of movie names and posters."""
+
+from threading import Lock
+
+from flask import current_app
+from sqlalchemy import select
+
+from semwork.cache import LRUBackend, cache
+from semwork.extensions import db
+from semwork.models.movie import Movie
+
+
+class MovieRecord:
+    """Immutable record of the movie with columns needed by links to the movie."""
+
+    __slots__ = ('id', 'name', 'slug', 'poster_link', 'release_year')
+
+    def __init__(self, movie_id: int, name: str, slug: str, poster_link: str, release_year: int):
+        for slot, value in zip(self.__slots__, (movie_id, name, slug, poster_link, release_year)):
+            object.__setattr__(self, slot, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __repr__(self):
+        return f'<MovieRecord {self.name}> {self.id} {self.release_year}'
+
+
+class Catalogue:
+    """Flask extension keeping records of movies per app and worker.
+
+    Records are loaded from the database on first lookup of the movie and kept for CACHE_TIMEOUT seconds
+    or until the version of the page cache changes, which happens when changes of movies are committed.
+    At most CATALOGUE_MAX_RECORDS least recently used records are kept. The catalogue is disabled together
+    with the page cache, lookups then always query the database.
+    """
+
+    def init_app(self, app):
+        """Register records of the app."""
+
+        app.config.setdefault('CATALOGUE_MAX_RECORDS', 10_000)
+        app.extensions['catalogue'] = {
+            'records': LRUBackend(app.config['CATALOGUE_MAX_RECORDS']),
+            'version': None,
+            'lock': Lock(),
+        }
+
+    def get(self, movie_id: int, slug: str = None):
+        """Get record of the movie, None for unknown movie.
+
+        A record with other slug than the given one is loaded again, the movie may have been renamed since."""
+
+        if cache.backend is None:
+            return self.load(movie_id)
+
+        state = current_app.extensions['catalogue']
+        version = cache.version()
+        if state['version'] != version:
+            with state['lock']:
+                if state['version'] != version:
+                    state['records'] = LRUBackend(current_app.config['CATALOGUE_MAX_RECORDS'])
+                    state['version'] = version
+
+        records = state['records']
+        record = records.get(movie_id)
+        if record is None or (slug is not None and record.slug != slug):
+            record = self.load(movie_id)
+            if record is None:
+                return None
+            records.set(movie_id, record, current_app.config['CACHE_TIMEOUT'])
+        return record
+
+    @staticmethod
+    def load(movie_id: int):
+        """Load record of the movie from the primary database, records are kept under the current version of the cache,
+        which may be newer than the data of replicas."""
+
+        found = db.session.execute(
+            select(Movie.id, Movie.name, Movie.slug, Movie.poster_link, Movie.release_year).where(Movie.id == movie_id),
+            bind_arguments={'bind': db.engine},
+        ).first()
+        return MovieRecord(*found) if found else None
+
+
+catalogue = Catalogue()
@@ -0,0 +1,49 @@
+"""Module providing CLI commands of the movies module."""
+
+import click
+
+from semwork.cache import cache
+from semwork.extensions import db
+from semwork.import_data import BATCH_SIZE, import_lock, load_dataset
+from semwork.movies import bp  # pylint: disable=R0401; # noqa
+from semwork.movies.browse import refresh_facet_counts
+from semwork.synthetic import analyze, generate_movies, generate_users
+
+
+@bp.cli.command('import')
+@click.argument('file_name', default='imdb_top_1000.csv')
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True, help='Number of rows committed at once.')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint and import the whole file again.')
+def import_movies(file_name, batch_size, restart):
+    """Import movies dataset, continuing from the last committed row, to database migrated by `flask db upgrade`."""
+
+    with import_lock(db) as acquired:
+        if not acquired:
+            click.echo('Import is already running.')
+            return
+        load_dataset(db, file_name, batch_size=batch_size, resume=not restart)
+        cache.invalidate()
+
+
+@bp.cli.command('generate')
+@click.option('--movies', default=100_000, show_default=True, help='Number of generated movies.')
+@click.option('--users', default=1000, show_default=True, help='Number of generated users with watch histories.')
+@click.option('--seed', default=0, show_default=True, help='Seed of the generator.')
+def generate(movies, users, seed):
+    """Generate synthetic movies and users for scale testing, the same seed generates the same data."""
+
+    if movies:
+        generate_movies(db, movies, seed)
+    if users:
+        generate_users(db, users, seed)
+    analyze(db)
+    cache.invalidate()
+
+
+@bp.cli.command('refresh-facets')
+def refresh_facets():
+    """Count movies of browse filters again, e.g. after movies were changed outside of imports."""
+
+    refresh_facet_counts(db.session.connection())
+    db.session.commit()
+    cache.invalidate()
@@ -1,26 +1,19 @@
 """App template filters for movies module."""
 
-import re
-import unicodedata
+from flask import render_template
+from markupsafe import Markup
 
+from semwork.cache import cache
+from semwork.models.movie import name_to_slug
 from semwork.movies import bp  # pylint: disable=R0401; # noqa
-from semwork.extensions import db
-from semwork.models.watch_later import WatchLater
+from semwork.movies.services import get_watch_later_ids
 
 
 @bp.app_template_filter('movie_name_to_url')
 def movie_name_to_url(movie_name):
-    """Filter transforming movie name to corresponding url name."""
+    """Filter transforming movie name to corresponding url name, stored movies have it in slug."""
 
-    # remove accents
-    url_name = unicodedata.normalize('NFD', movie_name).encode('ASCII', 'ignore').decode("utf-8")
-    # remove non-words character and lowercase letters
-    url_name = re.sub('[^a-zA-Z0-9 -]+', '', url_name)
-    # replace ' - ' with just one space
-    url_name = re.sub('( - )+', ' ',  url_name)
-    # lowercase all and replace spaces with dash
-    url_name = url_name.lower().replace(' ', '-')
-    return url_name
+    return name_to_slug(movie_name)
 
 
 @bp.app_template_filter('query_empty')
@@ -37,4 +30,11 @@ def in_watch_later(movie, user):
     if not user or not user.is_authenticated:
         # user has to be authenticated
         return False
-    return db.session.query(WatchLater).where(WatchLater.user_id == user.id, WatchLater.movie_id == movie).count() > 0
+    return movie in get_watch_later_ids(user.id)
+
+
+@bp.app_template_global('movie_card')
+def movie_card(movie):
+    """Render card of the movie, cards are the same for all users, so they are cached."""
+
+    return Markup(cache.fragment('card', movie.id, lambda: render_template('movies/movie_card.html', movie=movie)))
@@ -0,0 +1,181 @@
+"""Bulk import and streaming export of watch histories in CSV and NDJSON files."""
+
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import insert, or_, select, update
+
+from semwork.extensions import db
+from semwork.home.services import rebuild_watch_again
+from semwork.models.movie import Movie, name_to_slug
+from semwork.models.user import User
+from semwork.models.watch_list import WatchList
+
+IMPORT_BATCH_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+# errors of lines after this number are only counted
+MAX_REPORTED_ERRORS = 100
+# columns of exported files, imported files may also contain only title and date_watched
+COLUMNS = ['movie_id', 'title', 'year', 'date_watched']
+# formats of files by their extensions and media types
+FORMATS = {
+    'csv': 'csv',
+    'text/csv': 'csv',
+    'ndjson': 'ndjson',
+    'jsonl': 'ndjson',
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+MEDIA_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def history_format(name: str):
+    """Get format of the file from its format name, file name or media type, None for unknown formats."""
+
+    name = (name or '').lower()
+    if name in FORMATS:
+        return FORMATS[name]
+    return FORMATS.get(name.rsplit('.', 1)[-1]) if '.' in name else None
+
+
+def read_entries(stream, file_format: str):
+    """Yield line numbers and entries of the binary stream of the file, None for lines which are not JSON objects.
+    The stream is read line by line, so uploaded files are never loaded to memory whole."""
+
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='' if file_format == 'csv' else None)
+    if file_format == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            entry = None
+        yield number, entry if isinstance(entry, dict) else None
+
+
+def find_movies(entries: list) -> tuple:
+    """Get ids of existing movies and movies by slugs of names of the entries, loaded by one query."""
+
+    movie_ids, slugs = set(), set()
+    for _, entry in entries:
+        if entry and str(entry.get('movie_id') or '').isdigit():
+            movie_ids.add(int(entry['movie_id']))
+        elif entry and entry.get('title'):
+            slugs.add(name_to_slug(str(entry['title'])))
+
+    found_ids, by_slug = set(), {}
+    rows = db.session.execute(
+        select(Movie.id, Movie.slug, Movie.release_year).where(or_(Movie.id.in_(movie_ids), Movie.slug.in_(slugs)))
+    )
+    for movie_id, slug, release_year in rows:
+        found_ids.add(movie_id)
+        by_slug.setdefault(slug, []).append((movie_id, release_year))
+    return found_ids & movie_ids, by_slug
+
+
+def match_entry(entry: dict, movie_ids: set, by_slug: dict) -> int:
+    """Get id of the movie of the entry, raise ValueError describing why it does not match one movie."""
+
+    if str(entry.get('movie_id') or '').isdigit():
+        if int(entry['movie_id']) not in movie_ids:
+            raise ValueError(f'unknown movie id {entry["movie_id"]}')
+        return int(entry['movie_id'])
+    if not entry.get('title'):
+        raise ValueError('missing title')
+
+    candidates = by_slug.get(name_to_slug(str(entry['title'])), [])
+    if entry.get('year'):
+        candidates = [movie for movie in candidates if str(movie[1]) == str(entry['year']).strip()]
+    if not candidates:
+        raise ValueError(f'unknown movie {entry["title"]}')
+    if len(candidates) > 1:
+        raise ValueError(f'several movies named {entry["title"]}, add year')
+    return candidates[0][0]
+
+
+def parse_date(entry: dict) -> datetime:
+    """Get date the movie of the entry was watched, raise ValueError when it is missing or invalid."""
+
+    value = entry.get('date_watched') or entry.get('date')
+    if not value:
+        raise ValueError('missing date_watched')
+    try:
+        return datetime.fromisoformat(str(value).strip())
+    except ValueError as error:
+        raise ValueError(f'invalid date {value}') from error
+
+
+def import_history(user_id: int, stream, file_format: str) -> dict:
+    """Import entries of the file to the watch history of the user, return report of the import.
+
+    Movies are matched by ids or by names and release years, batches of entries are matched by one query
+    and inserted by one statement. Watch again dates and recommendations of the user are updated once
+    at the end, everything is committed together, so a failed import changes nothing.
+    """
+
+    imported, errors, error_count = 0, [], 0
+    entries = read_entries(stream, file_format)
+    while batch := list(islice(entries, IMPORT_BATCH_SIZE)):
+        movie_ids, by_slug = find_movies(batch)
+        rows = []
+        for line, entry in batch:
+            try:
+                if entry is None:
+                    raise ValueError('invalid JSON object')
+                movie_id = match_entry(entry, movie_ids, by_slug)
+                rows.append({'user_id': user_id, 'movie_id': movie_id, 'date_watched': parse_date(entry)})
+            except ValueError as error:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'line': line, 'error': str(error)})
+        if rows:
+            db.session.execute(insert(WatchList), rows)
+            imported += len(rows)
+
+    if imported:
+        # bulk inserts do not trigger listeners of watch list changes
+        rebuild_watch_again(db.session.connection(), [user_id])
+        db.session.execute(update(User).where(User.id == user_id).values(recommendations_outdated=True))
+    db.session.commit()
+    return {'imported': imported, 'failed': error_count, 'errors': errors}
+
+
+def export_history(user_id: int, file_format: str):
+    """Yield chunks of the watch history of the user in the file format, oldest first.
+    Rows are fetched by a server-side cursor, so the history is never loaded to memory whole."""
+
+    statement = (
+        select(Movie.id, Movie.name, Movie.release_year, WatchList.date_watched)
+        .join(WatchList, Movie.id == WatchList.movie_id)
+        .where(WatchList.user_id == user_id)
+        .order_by(WatchList.date_watched, WatchList.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    result = db.session.execute(statement)
+    if file_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(COLUMNS)
+        for rows in result.partitions():
+            writer.writerows((movie_id, name, year, date.isoformat()) for movie_id, name, year, date in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+        return
+
+    for rows in result.partitions():
+        yield ''.join(
+            json.dumps(dict(zip(COLUMNS, (movie_id, name, year, date.isoformat())))) + '\n'
+            for movie_id, name, year, date in rows
+        )
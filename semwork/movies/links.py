@@ -0,0 +1,82 @@
+"""Synchronization of normalized genres and people with the genre, director and star columns of movies."""
+
+from sqlalchemy import Integer, any_, bindparam, delete, event, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from semwork.models.genre import Genre
+from semwork.models.movie import Movie
+from semwork.models.movie_genre import MovieGenre
+from semwork.models.movie_person import DIRECTOR, STAR, MoviePerson
+from semwork.models.person import Person
+
+
+def in_movies(column, movie_ids: list):
+    """Create condition of the column being one of given movie ids, bound as one array parameter."""
+
+    return column == any_(bindparam('movie_ids', movie_ids, type_=ARRAY(Integer)))
+
+
+def movie_genres(movie_ids: list):
+    """Create query of (movie id, genre name) pairs of given movies."""
+
+    genre_names = func.unnest(func.string_to_array(Movie.genre, ', ')).label('name')
+    return select(Movie.id.label('movie_id'), genre_names).where(in_movies(Movie.id, movie_ids)).subquery()
+
+
+def movie_people(movie_ids: list):
+    """Create query of (movie id, position, person name, role) rows of given movies,
+    director has position 0 and stars positions 1 to 4."""
+
+    columns = [
+        (Movie.director, DIRECTOR),
+        (Movie.star1, STAR),
+        (Movie.star2, STAR),
+        (Movie.star3, STAR),
+        (Movie.star4, STAR),
+    ]
+    return union_all(
+        *(
+            select(
+                Movie.id.label('movie_id'),
+                literal(position).label('position'),
+                column.label('name'),
+                literal(role).label('role'),
+            ).where(in_movies(Movie.id, movie_ids))
+            for position, (column, role) in enumerate(columns)
+        )
+    ).subquery()
+
+
+def link_movies(connection, movie_ids: list):
+    """Replace genres and people of given movies by ones from their columns,
+    genres and people are created when missing."""
+
+    genres = movie_genres(movie_ids)
+    people = movie_people(movie_ids)
+
+    connection.execute(delete(MovieGenre).where(in_movies(MovieGenre.movie_id, movie_ids)))
+    connection.execute(delete(MoviePerson).where(in_movies(MoviePerson.movie_id, movie_ids)))
+    connection.execute(insert(Genre).from_select(['name'], select(genres.c.name).distinct()).on_conflict_do_nothing())
+    connection.execute(insert(Person).from_select(['name'], select(people.c.name).distinct()).on_conflict_do_nothing())
+    connection.execute(
+        insert(MovieGenre).from_select(
+            ['movie_id', 'genre_id'],
+            select(genres.c.movie_id, Genre.id).distinct().join(Genre, Genre.name == genres.c.name),
+        )
+    )
+    connection.execute(
+        insert(MoviePerson).from_select(
+            ['movie_id', 'position', 'person_id', 'role'],
+            select(people.c.movie_id, people.c.position, Person.id, people.c.role).join(
+                Person, Person.name == people.c.name
+            ),
+        )
+    )
+
+
+@event.listens_for(Movie, 'after_insert')
+@event.listens_for(Movie, 'after_update')
+def link_after_change(mapper, connection, target):  # pylint: disable=W0613; # signature given by sqlalchemy
+    """Keep genres and people of movies added or changed through the session up to date."""
+
+    link_movies(connection, [target.id])
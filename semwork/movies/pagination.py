@@ -0,0 +1,174 @@
+"""Keyset pagination of queries ordered by a unique key."""
+
+from datetime import datetime
+from math import ceil
+
+from sqlalchemy import tuple_
+
+from semwork.extensions import db
+
+CURSOR_SEPARATOR = ','
+
+
+class KeysetPagination:  # pylint: disable=R0902,R0903; # class used to only store data
+    """Page of query results following the after cursor or preceding the before cursor.
+
+    Results are ordered by the key columns, which have to be unique together, and pages are found
+    by comparing the key with the cursor, so the database reads only one page from the index of the key
+    however deep the page is. Cursors are values of the key of the first or last item joined by a comma.
+    With descending, results are ordered from the greatest key, which reads the same index backwards.
+    """
+
+    def __init__(
+        self,
+        query,
+        key_columns: list,
+        item_key,
+        per_page: int,
+        after: str = None,
+        before: str = None,
+        load: bool = True,
+        descending: bool = False,
+    ):  # pylint: disable=R0913; # options of the page
+        """Load the page, item_key returns values of the key columns of one item.
+
+        Without load, the statement of the page is only prepared and its items are set by load_items."""
+
+        self.key_columns = key_columns
+        self.item_key = item_key
+        self.per_page = per_page
+        key = tuple_(*key_columns)
+        # order of pages and the reverse order in which preceding pages are read
+        order, reverse_order = list(key_columns), [column.desc() for column in key_columns]
+        if descending:
+            order, reverse_order = reverse_order, order
+        self.backwards = False
+        if before is not None and (cursor := self.parse_cursor(before)):
+            preceding = key > tuple_(*cursor) if descending else key < tuple_(*cursor)
+            query = query.where(preceding).order_by(*reverse_order)
+            self.backwards = True
+        elif after is not None and (cursor := self.parse_cursor(after)):
+            following = key < tuple_(*cursor) if descending else key > tuple_(*cursor)
+            query = query.where(following).order_by(*order)
+        else:
+            cursor = None
+            query = query.order_by(*order)
+        self.first_page = cursor is None
+
+        # one more item tells whether there is another page in the direction of the query
+        self.statement = query.limit(per_page + 1)
+        self.scalar = len(query.column_descriptions) == 1
+        if load:
+            if self.scalar:
+                self.load_items(db.session.scalars(self.statement).all())
+            else:
+                self.load_items(db.session.execute(self.statement).all())
+
+    def load_items(self, items: list):
+        """Set the page from items loaded by the statement of the page."""
+
+        has_more = len(items) > self.per_page
+        items = items[: self.per_page]
+
+        if self.backwards:
+            self.items = items[::-1]
+            self.has_prev = has_more
+            self.has_next = True
+        else:
+            self.items = items
+            self.has_prev = not self.first_page
+            self.has_next = has_more
+
+        self.prev_cursor = self.format_cursor(self.item_key(self.items[0])) if self.items else None
+        self.next_cursor = self.format_cursor(self.item_key(self.items[-1])) if self.items else None
+
+    def parse_cursor(self, cursor: str):
+        """Get values of the key columns from the cursor, None for invalid cursor."""
+
+        values = cursor.split(CURSOR_SEPARATOR)
+        if len(values) != len(self.key_columns):
+            return None
+        try:
+            return [
+                datetime.fromisoformat(value) if column.type.python_type is datetime else column.type.python_type(value)
+                for column, value in zip(self.key_columns, values)
+            ]
+        except ValueError:
+            return None
+
+    @staticmethod
+    def format_cursor(values):
+        """Create cursor from values of the key columns."""
+
+        return CURSOR_SEPARATOR.join(
+            value.isoformat() if isinstance(value, datetime) else str(value) for value in values
+        )
+
+
+class LoadedPagination:
+    """Offset pagination of items and total loaded beforehand, e.g. by async session.
+
+    Pages are numbered from 1 and listed by iter_pages the same way as by pagination of Flask-SQLAlchemy,
+    so both render the same in templates. Without the total, one more item than per_page is loaded
+    and tells whether there is a next page, pages are then listed up to the next one."""
+
+    def __init__(self, page: int, per_page: int, items: list, total: int = None):
+        self.page = page
+        self.per_page = per_page
+        self.has_more = len(items) > per_page
+        self.items = items[:per_page]
+        self.total = total
+
+    @property
+    def pages(self) -> int:
+        """Number of all pages, of pages up to the next one without the total."""
+
+        if self.total is None:
+            return self.page + 1 if self.has_more else self.page
+        return ceil(self.total / self.per_page) if self.total else 0
+
+    @property
+    def has_prev(self) -> bool:
+        """Whether this is not the first page."""
+
+        return self.page > 1
+
+    @property
+    def prev_num(self):
+        """Number of the previous page, None on the first page."""
+
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def has_next(self) -> bool:
+        """Whether this is not the last page."""
+
+        return self.page < self.pages
+
+    @property
+    def next_num(self):
+        """Number of the next page, None on the last page."""
+
+        return self.page + 1 if self.has_next else None
+
+    def iter_pages(self, *, left_edge: int = 2, left_current: int = 2, right_current: int = 4, right_edge: int = 2):
+        """Yield numbers of pages at the edges and around the current page, skipped pages are one None."""
+
+        pages_end = self.pages + 1
+        left_end = min(1 + left_edge, pages_end)
+        yield from range(1, left_end)
+        if left_end == pages_end:
+            return
+
+        mid_start = max(left_end, self.page - left_current)
+        mid_end = min(self.page + right_current + 1, pages_end)
+        if mid_start > left_end:
+            yield None
+        yield from range(mid_start, mid_end)
+        if mid_end == pages_end:
+            return
+
+        right_start = max(mid_end, pages_end - right_edge)
+        if right_start > mid_end:
+            yield None
+        yield from range(right_start, pages_end)
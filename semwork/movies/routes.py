@@ -1,48 +1,110 @@
 """Module providing routes for /movies sites."""
 
-import re
-import unicodedata
+import csv
 
-from sqlalchemy import select, case
-from flask import request, render_template, redirect, url_for
+from sqlalchemy import select
+from flask import Response, jsonify, request, render_template, redirect, stream_with_context, url_for
 from flask_login import login_required, current_user
 
+from semwork.cache import cache
+from semwork.conditional import conditional
 from semwork.extensions import db
 from semwork.movies import bp  # pylint: disable=R0401; # noqa
+from semwork.movies.autocomplete import MOVIE, autocomplete
+from semwork.movies.browse import SORT_COLUMNS, SORTS, browse_arguments, facet_counts, filter_movies
+from semwork.movies.catalogue import catalogue
 from semwork.movies.filters import movie_name_to_url
+from semwork.movies.history import MEDIA_TYPES, export_history, history_format, import_history
+from semwork.movies.pagination import KeysetPagination, LoadedPagination
+from semwork.replicas import replica_reads
+from semwork.movies.services import (
+    full_text_search,
+    fuzzy_search,
+    get_watch_later_ids,
+    person_search,
+    prompt_to_words,
+)
 from semwork.models.movie import Movie
 from semwork.models.watch_list import WatchList
 from semwork.models.watch_later import WatchLater
 
 
+def browse_pagination(query, load: bool = True):
+    """Load page of the query filtered and sorted as requested by browse page, ordered by movie id by default."""
+
+    arguments = browse_arguments()
+    key_columns, item_key, descending = SORTS[arguments.get('sort', 'id')]
+    return KeysetPagination(
+        filter_movies(query, arguments),
+        key_columns,
+        item_key,
+        per_page=24,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        load=load,
+        descending=descending,
+    )
+
+
+def browse_validators():
+    """Get versions of movies on the browse page, its filters and facet counts and time of the last change of them."""
+
+    pagination = browse_pagination(select(Movie.id, Movie.version, Movie.updated_at, *SORT_COLUMNS))
+    parts = [(row.id, row.version) for row in pagination.items] + [pagination.has_prev, pagination.has_next]
+    parts += [sorted(browse_arguments().items()), facet_counts()]
+    return parts, max((row.updated_at for row in pagination.items), default=None)
+
+
 @bp.route('/browse')
+@replica_reads
+@conditional(browse_validators)
+@cache.cached_page
 def browse():
     """Route to the browse movies page."""
 
-    page = request.args.get('page', 1, type=int)
-    query = select(Movie).order_by(Movie.id)
-    pagination = db.paginate(query, page=page, per_page=24)
-    return render_template('movies/browse.html', pagination=pagination)
+    pagination = browse_pagination(select(Movie))
+    return render_template(
+        'movies/browse.html', pagination=pagination, arguments=browse_arguments(), facets=facet_counts()
+    )
+
+
+def movie_validators(movie_id, name):
+    """Get version of the movie and whether it is in watch later of the user,
+    None for unknown movie or wrong name, which are redirected by the view."""
+
+    found = db.session.execute(select(Movie.slug, Movie.version, Movie.updated_at).where(Movie.id == movie_id)).first()
+    if found is None or found.slug != name.lower():
+        return None
+    in_watch_later = current_user.is_authenticated and movie_id in get_watch_later_ids(current_user.id)
+    return [movie_id, found.version, in_watch_later], found.updated_at
 
 
 @bp.route('/movie/<int:movie_id>-<string:name>')
+@replica_reads
+@conditional(movie_validators)
+@cache.cached_page
 def movie(movie_id, name):
     """Route to the specific movie page."""
 
-    queried_movie = db.session.query(Movie).filter_by(id=movie_id).first()
-    if queried_movie is None:
+    record = catalogue.get(movie_id, name.lower())
+    if record is None:
         # incorrect id
         return redirect(url_for('movies.not_found'))
 
-    url_name = movie_name_to_url(queried_movie.name)
-    if url_name != name.lower():
+    if record.slug != name.lower():
         # incorrect name
         return redirect(url_for('movies.not_found'))
 
+    queried_movie = db.session.get(Movie, movie_id)
+    if queried_movie is None:
+        # deleted since the record was loaded
+        return redirect(url_for('movies.not_found'))
+
     return render_template('movies/movie.html', movie=queried_movie, **request.args)
 
 
 @bp.route('/not-found')
+@cache.cached_page
 def not_found():
     """Route to the error site when movie does not exist."""
 
@@ -54,40 +116,77 @@ def not_found():
 def watch_history():
     """Route to the page with user's watch history."""
 
-    page = request.args.get('page', 1, type=int)
     # pagination.items are now a tuple (Movie, int, datetime)
-    pagination = (
-        Movie.query.join(WatchList)
-        .add_columns(WatchList.id, WatchList.date_watched)
-        .where(WatchList.user_id == current_user.id)
-        .order_by(WatchList.date_watched)
-        .paginate(page=page, per_page=24, error_out=False)
+    pagination = KeysetPagination(
+        select(Movie, WatchList.id, WatchList.date_watched)
+        .join(WatchList, Movie.id == WatchList.movie_id)
+        .where(WatchList.user_id == current_user.id),
+        [WatchList.date_watched, WatchList.id],
+        lambda item: [item[2], item[1]],
+        per_page=24,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
     )
 
     return render_template('movies/watch_history.html', pagination=pagination)
 
 
+@bp.route('watch-history/import', methods=['POST'])
+@login_required
+def import_watch_history():
+    """Route importing watch history from CSV or NDJSON file, uploaded as file field or as the request body.
+    Responds with numbers of imported and failed lines and errors of the lines."""
+
+    upload = request.files.get('file')
+    file_format = history_format(request.args.get('format') or (upload.filename if upload else request.mimetype))
+    if file_format is None:
+        return jsonify(error='Unknown format, upload CSV or NDJSON file'), 400
+
+    try:
+        report = import_history(current_user.id, upload.stream if upload else request.stream, file_format)
+    except (UnicodeDecodeError, csv.Error):
+        db.session.rollback()
+        return jsonify(error='File is not valid UTF-8 CSV or NDJSON'), 400
+    return jsonify(report)
+
+
+@bp.route('watch-history/export')
+@login_required
+def export_watch_history():
+    """Route streaming the whole watch history of the user as CSV or NDJSON file."""
+
+    file_format = history_format(request.args.get('format', 'csv'))
+    if file_format is None:
+        return jsonify(error='Unknown format, export CSV or NDJSON file'), 400
+
+    return Response(
+        stream_with_context(export_history(current_user.id, file_format)),
+        mimetype=MEDIA_TYPES[file_format],
+        headers={'Content-Disposition': f'attachment; filename=watch-history.{file_format}'},
+    )
+
+
 @bp.route('add-to-watch-list/<int:movie_id>', methods=['POST'])
 @login_required
 def add_to_watch_list(movie_id):
     """Route to page that will add specified movie to user's watch history."""
 
-    queried_movie = db.session.query(Movie).filter_by(id=movie_id).first()
-    if queried_movie is None:
+    record = catalogue.get(movie_id)
+    if record is None:
         return redirect(url_for('movies.not_found'))
 
     date_watched = request.form.get('datewatched')
-    name = movie_name_to_url(queried_movie.name)
+    name = record.slug
 
     if not date_watched:
-        return redirect(url_for('movies.movie', movie_id=queried_movie.id, name=name, error='Select the date'))
+        return redirect(url_for('movies.movie', movie_id=record.id, name=name, error='Select the date'))
 
     db.session.add(WatchList(user_id=current_user.id, movie_id=movie_id, date_watched=date_watched))
     db.session.commit()
     return redirect(
         url_for(
             'movies.movie',
-            movie_id=queried_movie.id,
+            movie_id=record.id,
             name=name,
             success='Added this movie to watch list',
         )
@@ -116,12 +215,12 @@ def remove_from_watch_list(movie_id):
 def add_to_watch_later(movie_id):
     """Route to page that will add specified movie to user's watch later."""
 
-    queried_movie = db.session.query(Movie).filter_by(id=movie_id).first()
-    if queried_movie is None:
+    record = catalogue.get(movie_id)
+    if record is None:
         return redirect(url_for('movies.not_found'))
 
     watch_later_movie = db.session.query(WatchLater).filter_by(user_id=current_user.id, movie_id=movie_id).first()
-    name = movie_name_to_url(queried_movie.name)
+    name = record.slug
 
     if watch_later_movie:
         return redirect(url_for('movies.movie', movie_id=movie_id, name=name))
@@ -136,12 +235,12 @@ def add_to_watch_later(movie_id):
 def remove_from_watch_later(movie_id):
     """Route to page that will remove specified movie from user's watch later."""
 
-    queried_movie = db.session.query(Movie).filter_by(id=movie_id).first()
-    if queried_movie is None:
+    record = catalogue.get(movie_id)
+    if record is None:
         return redirect(url_for('movies.not_found'))
 
     watch_later_movie = db.session.query(WatchLater).filter_by(user_id=current_user.id, movie_id=movie_id).first()
-    name = movie_name_to_url(queried_movie.name)
+    name = record.slug
 
     if watch_later_movie is None:
         return redirect(url_for('movies.movie', movie_id=movie_id, name=name))
@@ -151,31 +250,51 @@ def remove_from_watch_later(movie_id):
     return redirect(url_for('movies.movie', movie_id=movie_id, name=name))
 
 
-@bp.route('search-movie', methods=['POST'])
+def search_query(prompt: str, mode: str):
+    """Create search query of the search mode."""
+
+    if mode == 'fuzzy':
+        return fuzzy_search(prompt_to_words(prompt))
+    if mode == 'person':
+        return person_search(prompt)
+    return full_text_search(prompt_to_words(prompt))
+
+
+@bp.route('search-movie', methods=['GET', 'POST'])
+@replica_reads
 def search_movie():
     """Route to the page with search results."""
 
-    prompt = request.form.get('search')
+    prompt = request.values.get('search')
     if prompt is None:
         return redirect(url_for('movies.not_found'))
     if prompt == '':
         return redirect(url_for('movies.browse'))
 
-    prompt_words = unicodedata.normalize('NFD', prompt).encode('ASCII', 'ignore').decode("utf-8")
-    # remove non-words character and lowercase letters
-    prompt_words = re.sub('[^a-zA-Z0-9 ]+', ' ', prompt_words).lower()
-    # remove words the, a, and
-    prompt_words = re.sub('(?<![a-zA-Z0-9_])(the|a|and)+(?![a-zA-Z0-9_])', '', prompt_words)
-    # remove leading or trailing whitespaces
-    prompt_words = re.sub('^[\r\n\t\f\v ]+|[\r\n\t\f\v ]+$', '', prompt_words)
-    # squash whitespaces and split into words
-    prompt_words = re.sub('[\r\n\t\f\v ]+', ' ', prompt_words).split(' ')
-
-    common_words = (sum(case((Movie.unaccented_name.ilike(f'%{word}%'), 1), else_=0) for word in prompt_words)).label(
-        'common_words'
-    )
-    found_movies = (
-        db.session.query(Movie).add_columns(common_words).where(common_words > 0).order_by(common_words.desc()).all()
-    )
-
-    return render_template('movies/search.html', prompt=prompt, movies=found_movies)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = 24
+    mode = request.args.get('mode')
+    query = search_query(prompt, mode)
+    if mode == 'fuzzy':
+        # similar names are not counted, only the page is read from the trigram index
+        items = db.session.scalars(query.limit(per_page + 1).offset((page - 1) * per_page)).all()
+        pagination = LoadedPagination(page=page, per_page=per_page, items=items)
+    else:
+        pagination = db.paginate(query, page=page, per_page=per_page, error_out=False)
+
+    return render_template('movies/search.html', prompt=prompt, mode=mode, pagination=pagination)
+
+
+@bp.route('autocomplete')
+def autocomplete_movies():
+    """Route returning movies and people starting with the prompt as JSON."""
+
+    prompt = request.args.get('q', '')
+    suggestions = []
+    for _, label, kind, movie_id in autocomplete.suggest(prompt):
+        if kind == MOVIE:
+            url = url_for('movies.movie', movie_id=movie_id, name=movie_name_to_url(label))
+        else:
+            url = url_for('movies.search_movie', search=label, mode='person')
+        suggestions.append({'label': label, 'type': kind, 'url': url})
+    return jsonify(suggestions)
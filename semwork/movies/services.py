@@ -0,0 +1,98 @@
+"""Business logic of the movies sites."""
+
+import re
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, func, literal, select
+from sqlalchemy.orm import Session, object_session
+
+from semwork.cache import cache
+from semwork.extensions import db
+from semwork.models.movie import Movie, remove_accents
+from semwork.models.movie_person import MoviePerson
+from semwork.models.person import Person
+from semwork.models.watch_later import WatchLater
+
+
+def prompt_to_words(prompt: str):
+    """Split search prompt to unaccented lowercase words."""
+
+    prompt_words = remove_accents(prompt)
+    # remove non-words character and lowercase letters
+    prompt_words = re.sub('[^a-zA-Z0-9 ]+', ' ', prompt_words).lower()
+    # remove words the, a, and
+    prompt_words = re.sub('(?<![a-zA-Z0-9_])(the|a|and)+(?![a-zA-Z0-9_])', '', prompt_words)
+    # squash whitespaces and split into words
+    return prompt_words.split()
+
+
+def full_text_search(prompt_words: list):
+    """Create query of movies matching any of the words ranked by full-text search relevance.
+    Words are matched as prefixes, so incomplete words match too.
+    """
+
+    # words contain only letters and digits, so they can not break tsquery syntax
+    ts_query = func.to_tsquery('english', ' | '.join(f'{word}:*' for word in prompt_words))
+    rank = func.ts_rank(Movie.search_vector, ts_query).label('rank')
+    return select(Movie).where(Movie.search_vector.bool_op('@@')(ts_query)).order_by(rank.desc(), Movie.id)
+
+
+def fuzzy_search(prompt_words: list):
+    """Create query of movies with names similar to the words ranked by trigram similarity.
+    Tolerates typos, the nearest names are read from the trigram index in the order of their distance,
+    so pages of the query are found without scoring all similar names.
+    """
+
+    prompt = literal(' '.join(prompt_words))
+    # names containing the whole prompt are ranked by how close they are to the prompt
+    word_distance = prompt.op('<<->')(Movie.unaccented_name)
+    distance = prompt.op('<->')(Movie.unaccented_name)
+    return select(Movie).where(prompt.bool_op('<%')(Movie.unaccented_name)).order_by(word_distance, distance, Movie.id)
+
+
+def person_search(name: str):
+    """Create query of movies directed by or starring the person with given name, newest first.
+    Uses the indexes of people names and their links to movies.
+    """
+
+    movie_ids = select(MoviePerson.movie_id).join(Person, Person.id == MoviePerson.person_id).where(Person.name == name)
+    return select(Movie).where(Movie.id.in_(movie_ids)).order_by(Movie.release_year.desc(), Movie.id)
+
+
+def get_watch_later_ids(user_id: int) -> set:
+    """Get ids of movies in user's watch later, loaded by one query per request."""
+
+    # pending changes are flushed like by autoflush of a query, so the listener below drops outdated ids
+    db.session.flush()
+    watch_later_ids = g.setdefault('watch_later_ids', {})
+    if user_id not in watch_later_ids:
+        watch_later_ids[user_id] = set(
+            db.session.scalars(select(WatchLater.movie_id).where(WatchLater.user_id == user_id))
+        )
+    return watch_later_ids[user_id]
+
+
+@event.listens_for(WatchLater, 'after_insert')
+@event.listens_for(WatchLater, 'after_delete')
+def outdate_watch_later_ids(mapper, connection, target):  # pylint: disable=W0613; # signature given by sqlalchemy
+    """Load watch later of the user again after it changes."""
+
+    if has_app_context():
+        g.get('watch_later_ids', {}).pop(target.user_id, None)
+
+
+@event.listens_for(Movie, 'after_insert')
+@event.listens_for(Movie, 'after_update')
+@event.listens_for(Movie, 'after_delete')
+def outdate_cache(mapper, connection, target):  # pylint: disable=W0613; # signature given by sqlalchemy
+    """Mark cached pages and movie cards outdated when a movie changes."""
+
+    object_session(target).info['cache_outdated'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_cache(session):
+    """Invalidate cache after changes of movies are committed, so pages are not cached again from old data."""
+
+    if session.info.pop('cache_outdated', False) and has_app_context() and 'cache' in current_app.extensions:
+        cache.invalidate()
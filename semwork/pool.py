@@ -0,0 +1,134 @@
+"""Pool of database connections of the worker configured by DATABASE_* config and its metrics."""
+
+import time
+from collections import Counter
+from threading import Lock
+
+from flask import current_app, has_request_context
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+class MeteredQueuePool(QueuePool):
+    """Queue pool counting checkouts, time spent getting connections, overflow connections and timeouts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = Counter()
+        self.stats_lock = Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with self.stats_lock:
+                self.stats['timeouts'] += 1
+            raise
+        # includes time of opening new connections
+        waited = time.perf_counter() - start
+        with self.stats_lock:
+            self.stats['checkouts'] += 1
+            self.stats['wait_seconds'] += waited
+            self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], waited)
+        return connection
+
+    def _inc_overflow(self):
+        # same as in QueuePool, overflow connections are recognized under the lock guarding the counter
+        with self._overflow_lock:
+            if -1 < self._max_overflow <= self._overflow:
+                return False
+            self._overflow += 1
+            overflowed = self._overflow > 0
+        if overflowed:
+            with self.stats_lock:
+                self.stats['overflows'] += 1
+        return True
+
+    def metrics(self):
+        """Get current state of the pool and counters since the start of the worker."""
+
+        with self.stats_lock:
+            stats = dict(self.stats)
+        return {
+            'size': self.size(),
+            'checked_in': self.checkedin(),
+            'checked_out': self.checkedout(),
+            'overflow': max(self.overflow(), 0),
+            'checkouts': stats.get('checkouts', 0),
+            'overflows': stats.get('overflows', 0),
+            'timeouts': stats.get('timeouts', 0),
+            'wait_seconds': stats.get('wait_seconds', 0.0),
+            'max_wait_seconds': stats.get('max_wait_seconds', 0.0),
+        }
+
+
+def engine_options(config) -> dict:
+    """Create options of the engine of the app database from DATABASE_* config."""
+
+    if config['DATABASE_EXTERNAL_POOLER']:
+        # the external pooler keeps connections
+        return {'poolclass': NullPool}
+    return {
+        'poolclass': MeteredQueuePool,
+        'pool_size': config['DATABASE_POOL_SIZE'],
+        'max_overflow': config['DATABASE_MAX_OVERFLOW'],
+        'pool_timeout': config['DATABASE_POOL_TIMEOUT'],
+        'pool_recycle': config['DATABASE_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+
+
+def async_engine_options(config) -> dict:
+    """Create options of the async engine (asyncpg) of the app database from DATABASE_* config."""
+
+    options = engine_options(config)
+    if config['DATABASE_EXTERNAL_POOLER']:
+        # prepared statements of asyncpg do not survive switching of server connections by the pooler
+        options['connect_args'] = {'statement_cache_size': 0, 'prepared_statement_cache_size': 0}
+    else:
+        # async engines need their own pool class
+        del options['poolclass']
+    return options
+
+
+@event.listens_for(Engine, 'begin')
+def set_transaction_statement_timeout(connection):
+    """Set statement timeout of transactions of web requests.
+
+    Migrations and CLI commands run without the timeout, so long imports and backfills are not cancelled.
+    The timeout is set in every transaction, which also works with external poolers in transaction mode
+    not allowing startup options and session settings."""
+
+    if not has_request_context():
+        return
+    timeout = current_app.config['DATABASE_STATEMENT_TIMEOUT']
+    if timeout:
+        cursor = connection.connection.dbapi_connection.cursor()
+        cursor.execute(f'SET LOCAL statement_timeout = {int(timeout)}')
+        cursor.close()
+
+
+class DatabasePool:
+    """Flask extension configuring the pool of the app database, call before db.init_app creates the engine."""
+
+    def init_app(self, app):
+        """Set engine options of the app from DATABASE_* config, unless engine options are set directly."""
+
+        app.config.setdefault('DATABASE_POOL_SIZE', 10)
+        app.config.setdefault('DATABASE_MAX_OVERFLOW', 10)
+        app.config.setdefault('DATABASE_POOL_TIMEOUT', 5)
+        app.config.setdefault('DATABASE_POOL_RECYCLE', 1800)
+        app.config.setdefault('DATABASE_STATEMENT_TIMEOUT', 30_000)
+        app.config.setdefault('DATABASE_EXTERNAL_POOLER', False)
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+
+    @staticmethod
+    def metrics(engine):
+        """Get metrics of the pool of the engine, None for pools without metrics."""
+
+        return engine.pool.metrics() if isinstance(engine.pool, MeteredQueuePool) else None
+
+
+database_pool = DatabasePool()
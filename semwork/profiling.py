@@ -0,0 +1,103 @@
+"""Opt-in profiling of requests: wall time, SQL queries, template rendering and slow queries."""
+
+import time
+from collections import Counter, defaultdict
+from threading import Lock
+
+from flask import before_render_template, current_app, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query(conn, cursor, statement, parameters, context, executemany):  # pylint: disable=R0913,W0613
+    """Remember start of the query of a profiled request."""
+
+    if has_request_context() and 'profile' in g:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def end_query(conn, cursor, statement, parameters, context, executemany):  # pylint: disable=R0913,W0613
+    """Add the query to the profile of the request and log it when it is slow."""
+
+    if not (has_request_context() and 'profile' in g and conn.info.get('query_start')):
+        return
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    g.profile['sql_queries'] += 1
+    g.profile['sql_seconds'] += elapsed
+    if elapsed * 1000 >= current_app.config['PROFILING_SLOW_QUERY_MS']:
+        g.profile['slow_queries'] += 1
+        current_app.logger.warning(
+            'Slow query (%.1f ms) of %s: %s %r', elapsed * 1000, request.path, statement, parameters
+        )
+
+
+def start_template(sender, template, context, **extra):  # pylint: disable=W0613; # signal receiver
+    """Remember start of rendering of the template."""
+
+    if 'profile' in g:
+        g.profile_templates.append(time.perf_counter())
+
+
+def end_template(sender, template, context, **extra):  # pylint: disable=W0613; # signal receiver
+    """Add rendering of the template to the profile of the request."""
+
+    if 'profile' in g and g.profile_templates:
+        g.profile['template_seconds'] += time.perf_counter() - g.profile_templates.pop()
+
+
+class Profiler:
+    """Flask extension profiling requests when PROFILING_ENABLED is set.
+
+    Every response gets Server-Timing header with times of the request, and totals by endpoints
+    are exported on /metrics. Queries of home page shelves run by the thread pool are not counted.
+    """
+
+    def init_app(self, app):
+        """Register hooks of profiled requests and signals of rendered templates of the app."""
+
+        app.config.setdefault('PROFILING_ENABLED', False)
+        app.config.setdefault('PROFILING_SLOW_QUERY_MS', 200)
+        app.extensions['profiling'] = {'stats': defaultdict(Counter), 'lock': Lock()}
+        if not app.config['PROFILING_ENABLED']:
+            return
+
+        app.before_request(self.start_request)
+        app.after_request(self.end_request)
+        before_render_template.connect(start_template, app)
+        template_rendered.connect(end_template, app)
+
+    @staticmethod
+    def start_request():
+        """Start profile of the request."""
+
+        g.profile = Counter()
+        g.profile_templates = []
+        g.profile_start = time.perf_counter()
+
+    @staticmethod
+    def end_request(response):
+        """Add profile of the request to totals of its endpoint and to Server-Timing header of the response."""
+
+        profile = g.profile
+        profile['requests'] = 1
+        profile['request_seconds'] = time.perf_counter() - g.profile_start
+        with current_app.extensions['profiling']['lock']:
+            current_app.extensions['profiling']['stats'][request.endpoint or 'not_found'].update(profile)
+
+        response.headers['Server-Timing'] = (
+            f'app;dur={profile["request_seconds"] * 1000:.2f}, '
+            f'db;dur={profile["sql_seconds"] * 1000:.2f};desc="{profile["sql_queries"]} queries", '
+            f'template;dur={profile["template_seconds"] * 1000:.2f}'
+        )
+        return response
+
+    def stats(self):
+        """Get totals of profiled requests of this worker by endpoints."""
+
+        with current_app.extensions['profiling']['lock']:
+            return {endpoint: dict(totals) for endpoint, totals in current_app.extensions['profiling']['stats'].items()}
+
+
+profiler = Profiler()
@@ -0,0 +1,129 @@
+"""Routing of reads of read-only pages to replicas of the database."""
+
+import random
+import re
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import TextClause, create_engine, event
+
+
+def replica_reads(view):
+    """Decorator routing reads of the view to replicas, until the first write of the request."""
+
+    @wraps(view)
+    def decorated_view(*args, **kwargs):
+        g.replica_reads = True
+        return current_app.ensure_sync(view)(*args, **kwargs)
+
+    return decorated_view
+
+
+def replica_reads_allowed() -> bool:
+    """Check whether reads of the current request may be routed to replicas.
+
+    After a write, reads of the request and of the following requests of the same client
+    stay on the primary for DATABASE_REPLICA_STICKY_SECONDS, so users see their own writes
+    even when replicas lag behind.
+    """
+
+    return (
+        has_request_context()
+        and g.get('replica_reads', False)
+        and bool(current_app.extensions['replicas'])
+        and session.get('primary_until', 0) < time.time()
+    )
+
+
+def parse_lsn(lsn) -> int:
+    """Convert WAL position in text form, e.g. 16/B374D848, to a number, None (unknown position) to 0."""
+
+    if lsn is None:
+        return 0
+    high, low = lsn.split('/')
+    return int(high, 16) << 32 | int(low, 16)
+
+
+def record_replay_lsn(connection):
+    """Remember the lowest WAL position replayed by replicas at the start of their transactions in the request,
+    statements of the transactions read data at least as new as the position."""
+
+    if has_request_context():
+        lsn = parse_lsn(connection.exec_driver_sql('SELECT pg_last_wal_replay_lsn()').scalar())
+        g.replica_lsn = min(g.get('replica_lsn', lsn), lsn)
+
+
+def replica_lsn():
+    """Get WAL position of the primary replayed by replicas before the current request read from them,
+    None when the request did not read from a replica, 0 when the position is not known."""
+
+    if not g.get('replica_read', False):
+        return None
+    return g.get('replica_lsn', 0)
+
+
+def is_read(clause) -> bool:
+    """Check whether the statement is a SELECT, textual statements are recognized by their first keyword."""
+
+    if isinstance(clause, TextClause):
+        return re.match(r'\s*SELECT\b', clause.text, re.IGNORECASE) is not None
+    return clause.is_select
+
+
+def mark_write():
+    """Keep reads of the client on the primary after its write."""
+
+    if has_request_context() and current_app.extensions['replicas']:
+        g.replica_reads = False
+        session['primary_until'] = time.time() + current_app.config['DATABASE_REPLICA_STICKY_SECONDS']
+
+
+class RoutingSession(Session):
+    """Session executing reads of read-only pages on a random replica and everything else on the primary."""
+
+    @staticmethod
+    def replica_engine():
+        """Get engine of a random replica."""
+
+        return random.choice(current_app.extensions['replicas'])
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and clause is not None and is_read(clause):
+            if replica_reads_allowed():
+                g.replica_read = True
+                return self.replica_engine()
+        elif bind is None:
+            mark_write()
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def read_engine(self):
+        """Get engine for reads outside of the session, a random replica when reads may use replicas."""
+
+        if replica_reads_allowed():
+            g.replica_read = True
+            engine = self.replica_engine()
+            # the replayed position is recorded in the request, the engine is used by threads without its context
+            with engine.begin():
+                pass
+            return engine
+        return self._db.engines[None]
+
+
+class Replicas:
+    """Flask extension creating engines of replicas from DATABASE_REPLICA_URIS with options of the primary engine."""
+
+    def init_app(self, app):
+        """Create engines of replicas of the app, call after configuring the pool of the primary engine."""
+
+        app.config.setdefault('DATABASE_REPLICA_URIS', [])
+        app.config.setdefault('DATABASE_REPLICA_STICKY_SECONDS', 10)
+        app.extensions['replicas'] = [
+            create_engine(uri, **app.config['SQLALCHEMY_ENGINE_OPTIONS']) for uri in app.config['DATABASE_REPLICA_URIS']
+        ]
+        for engine in app.extensions['replicas']:
+            event.listen(engine, 'begin', record_replay_lsn)
+
+
+replicas = Replicas()
@@ -0,0 +1,263 @@
+"""Module generating synthetic catalogues of movies and users with watch histories for scale testing."""
+
+import csv
+import io
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import Integer, cast, func, select, text
+
+from semwork.extensions import bcrypt
+from semwork.home.services import rebuild_watch_again
+from semwork.models.movie import Movie, name_to_slug, remove_accents
+from semwork.models.user import User
+from semwork.movies.browse import refresh_facet_counts
+from semwork.movies.links import link_movies
+
+# rows generated and copied at once, part of the seed of every batch, so it is not configurable
+BATCH_SIZE = 10_000
+# password of all generated users
+PASSWORD = 'synthetic'
+# watch histories of generated users start in the following nine years
+HISTORY_START = datetime(2015, 1, 1)
+
+# genres with their frequency in the IMDb dataset, movies have one to three genres as often as there
+GENRES = (
+    'Drama Comedy Crime Adventure Action Thriller Romance Biography Mystery Animation Sci-Fi Fantasy History Family '
+    'War Music Horror Western Film-Noir Sport Musical'
+).split()
+GENRE_WEIGHTS = [724, 233, 209, 196, 189, 137, 125, 109, 99, 82, 67, 66, 56, 56, 51, 35, 32, 20, 19, 19, 17]
+GENRE_COUNTS = {1: 105, 2: 249, 3: 646}
+CERTIFICATES = {'U': 233, 'A': 197, 'UA': 175, 'R': 146, None: 101, 'PG-13': 43, 'PG': 38, 'Passed': 34, 'G': 12}
+# words of titles and names of people
+ADJECTIVES = (
+    'Silent Dark Last Lost Golden Broken Hidden Wild Eternal Crimson Frozen Burning Little Great Secret Forgotten '
+    'Final Bright Empty Distant Sweet Bitter Long Quiet Lonely Brave Strange Midnight Electric Iron Velvet Paper Blue'
+).split()
+NOUNS = (
+    'Knight River City Dream Road Storm Heart Garden Empire Shadow Island Promise Winter Summer Journey Kingdom '
+    'Stranger Mountain Letter Song Mirror Harbor Train Hunter Sky Wolf Night Station House Game Memory Machine Star'
+).split()
+FIRST_NAMES = (
+    'James Mary John Anna Robert Emma Michael Olivia David Sophia Tomas Eva Pierre Marie Hiroshi Yuki Carlos Lucia '
+    'Ivan Olga Ahmed Leila Raj Priya Lars Ingrid Marco Giulia Jan Petra Kwame Amara Chen Mei Diego Elena'
+).split()
+LAST_NAMES = (
+    'Smith Novak Dubois Tanaka Garcia Ivanov Hassan Sharma Larsen Rossi Svoboda Mensah Wang Lopez Brown Muller '
+    'Kowalski Moreau Sato Fernandez Petrov Khan Patel Nilsson Bianchi Dvorak Owusu Li Martinez Taylor Schmidt Laurent'
+).split()
+SUMMARIES = [
+    'A {adjective} story of {star1} and {star2}, whose lives change after one {noun}.',
+    '{star1} searches for a {adjective} {noun} while {star2} tries to stop them.',
+    'When a {noun} disappears, {star1} must face the {adjective} past of the whole family.',
+    'The {adjective} rise and fall of {star1}, told by {star2} years later.',
+]
+# gray rectangle shown instead of posters of generated movies
+POSTER_LINK = (
+    "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='67' height='98'%3E"
+    "%3Crect width='67' height='98' fill='%23bbb'/%3E%3C/svg%3E"
+)
+
+MOVIE_COLUMNS = (
+    'id name unaccented_name slug poster_link release_year certificate runtime genre imdb_rating summary meta_score '
+    'director star1 star2 star3 star4 no_of_votes gross_earned'
+).split()
+
+
+def probabilities(weights) -> np.ndarray:
+    """Normalize weights to probabilities."""
+
+    weights = np.asarray(weights, dtype=float)
+    return weights / weights.sum()
+
+
+def zipf_probabilities(count: int, exponent: float, offset: float = 0) -> np.ndarray:
+    """Get probabilities of ranks 1 to count by Zipf's law, the offset flattens probabilities of top ranks."""
+
+    return probabilities((np.arange(1, count + 1, dtype=float) + offset) ** -exponent)
+
+
+def person_name(index: int) -> str:
+    """Get unique name of the person with given index."""
+
+    first = FIRST_NAMES[index % len(FIRST_NAMES)]
+    last = LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)]
+    generation = index // (len(FIRST_NAMES) * len(LAST_NAMES))
+    return f'{first} {last}' if generation == 0 else f'{first} {last} {generation + 1}'
+
+
+def copy_rows(connection, table: str, columns: list, rows):
+    """Load rows to the table by COPY, the fastest way of loading data to PostgreSQL."""
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f'COPY "{table}" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer)
+    finally:
+        cursor.close()
+
+
+def reserve_ids(connection, table: str, count: int) -> list:
+    """Take count ids from the sequence of the table, so copied rows do not collide with concurrent inserts."""
+
+    return connection.scalars(
+        text('SELECT nextval(pg_get_serial_sequence(:table, \'id\')) FROM generate_series(1, :count)'),
+        {'table': f'"{table}"', 'count': count},
+    ).all()
+
+
+def generate_movie_rows(rng, ids: list, people: int, titles: dict, existing: set) -> list:
+    """Generate rows of movies with given ids.
+
+    Titles repeated in the same year are numbered like sequels, titles counts generated movies of (title, year)
+    pairs and existing contains (name, year) pairs of movies already in the database.
+    """
+
+    size = len(ids)
+    years = rng.choice(np.arange(1920, 2025), size, p=probabilities(np.exp(np.arange(105) / 25)))
+    ratings = np.clip(rng.normal(6.8, 0.9, size), 1, 10).round(1)
+    meta_scores = np.clip(ratings * 10 + rng.normal(0, 8, size), 1, 100).astype(int)
+    # star appearances follow Zipf's law, few people appear in hundreds of movies and most in one or two
+    credits = rng.choice(people, (size, 5), p=zipf_probabilities(people, 1.0, 100))
+    # genres without repetition picked by their weights, Gumbel top-k sampling
+    genre_names = np.array(GENRES)
+    genre_order = np.argsort(-(np.log(probabilities(GENRE_WEIGHTS)) + rng.gumbel(size=(size, len(GENRES)))))
+    genre_counts = rng.choice(list(GENRE_COUNTS), size, p=probabilities(list(GENRE_COUNTS.values())))
+    certificates = rng.choice(len(CERTIFICATES), size, p=probabilities(list(CERTIFICATES.values())))
+    words = rng.integers(0, [len(ADJECTIVES), len(NOUNS), len(NOUNS), 3, len(SUMMARIES)], (size, 5))
+    votes = np.minimum(rng.lognormal(9, 1.6, size), 3_000_000).astype(int) + 25_000
+    runtimes = np.clip(rng.normal(112, 22, size), 60, 240).astype(int)
+    # gross earnings stay in range of the integer column
+    gross = np.minimum(rng.lognormal(17, 1.5, size), 2_000_000_000).astype(int)
+    has_meta_score, has_gross = rng.random(size) > 0.16, rng.random(size) > 0.17
+
+    rows = []
+    for i, movie_id in enumerate(ids):
+        adjective, noun, other_noun = ADJECTIVES[words[i, 0]], NOUNS[words[i, 1]], NOUNS[words[i, 2]]
+        title = [f'The {adjective} {noun}', f'{noun} of the {other_noun}', f'{adjective} {noun}'][words[i, 3]]
+        year = int(years[i])
+        sequel = titles.get((title, year), 0) + 1
+        while (name := title if sequel == 1 else f'{title} {sequel}', year) in existing:
+            sequel += 1
+        titles[title, year] = sequel
+        director, *stars = (person_name(int(index)) for index in credits[i])
+        summary = SUMMARIES[words[i, 4]].format(
+            adjective=adjective.lower(), noun=noun.lower(), star1=stars[0], star2=stars[1]
+        )
+        rows.append(
+            [
+                movie_id,
+                name,
+                remove_accents(name),
+                name_to_slug(name),
+                POSTER_LINK,
+                year,
+                list(CERTIFICATES)[certificates[i]],
+                f'{runtimes[i]} min',
+                ', '.join(sorted(genre_names[genre_order[i, : genre_counts[i]]])),
+                ratings[i],
+                summary,
+                meta_scores[i] if has_meta_score[i] else None,
+                director,
+                *stars,
+                votes[i],
+                gross[i] if has_gross[i] else None,
+            ]
+        )
+    return rows
+
+
+def generate_movies(db, count: int, seed: int) -> int:
+    """Generate and copy count movies to the database in batches, each committed with its genres and people,
+    facet counts are counted again after the last batch."""
+
+    start = time.perf_counter()
+    # every movie has five credits, so every person appears in two movies on average
+    people = max(count * 5 // 2, 100)
+    titles = {}
+    existing = {tuple(row) for row in db.session.execute(select(Movie.name, Movie.release_year))}
+    for batch, offset in enumerate(range(0, count, BATCH_SIZE)):
+        rng = np.random.default_rng([seed, 0, batch])
+        connection = db.session.connection()
+        ids = reserve_ids(connection, Movie.__tablename__, min(BATCH_SIZE, count - offset))
+        copy_rows(
+            connection, Movie.__tablename__, MOVIE_COLUMNS, generate_movie_rows(rng, ids, people, titles, existing)
+        )
+        link_movies(connection, ids)
+        db.session.commit()
+    refresh_facet_counts(db.session.connection())
+    db.session.commit()
+
+    elapsed = time.perf_counter() - start
+    print(f'Movies generated: {count} ({count / elapsed if elapsed else 0:.0f} rows/s)')
+    return count
+
+
+def first_username_number(db, prefix: str) -> int:
+    """Get number following numbers of existing users named by the prefix and a number."""
+
+    number = cast(func.substr(User.username, len(prefix) + 1), Integer)
+    last = db.session.scalar(select(func.max(number)).where(User.username.regexp_match(f'^{prefix}[0-9]+$')))
+    return 0 if last is None else last + 1
+
+
+def generate_users(db, count: int, seed: int, max_history: int = 2000) -> int:
+    """Generate count users with watch histories of power-law sizes, return number of watched movies.
+
+    Movies are watched proportionally to their number of votes, so popular movies are watched
+    and watched again most often. Generated users log in with the password 'synthetic'.
+    Users generated by the same seed again are numbered after the existing ones, like titles of movies.
+    """
+
+    start = time.perf_counter()
+    movies = db.session.execute(select(Movie.id, Movie.no_of_votes).order_by(Movie.id)).all()
+    if not movies:
+        print('Users generated: 0, there are no movies to watch')
+        return 0
+    movie_ids, votes = np.array(movies).T
+    popularity = probabilities(votes)
+    password = bcrypt.generate_password_hash(PASSWORD).decode('utf-8')
+    prefix = f'synthetic-{seed}-'
+    first = first_username_number(db, prefix)
+    watched = 0
+    for batch, offset in enumerate(range(0, count, BATCH_SIZE)):
+        rng = np.random.default_rng([seed, 1, batch])
+        connection = db.session.connection()
+        user_ids = reserve_ids(connection, 'user', min(BATCH_SIZE, count - offset))
+        copy_rows(
+            connection,
+            'user',
+            ['id', 'username', 'password'],
+            ([user_id, f'{prefix}{first + offset + i}', password] for i, user_id in enumerate(user_ids)),
+        )
+
+        # sizes of watch histories have Pareto distribution starting at 5 movies
+        sizes = np.minimum((rng.pareto(1.2, len(user_ids)) + 1) * 5, max_history).astype(int)
+        watched_ids = rng.choice(movie_ids, sizes.sum(), p=popularity)
+        # histories start during nine years, days between watched movies are exponential, a few days on average
+        starts = rng.integers(0, 9 * 365 * 86400, len(sizes))
+        gaps = np.cumsum(rng.exponential(3 * 86400, sizes.sum()).astype(int))
+        seconds = np.repeat(starts, sizes) + gaps - gaps[np.repeat(np.cumsum(sizes) - sizes, sizes)]
+        copy_rows(
+            connection,
+            'watch_list',
+            ['user_id', 'movie_id', 'date_watched'],
+            zip(np.repeat(user_ids, sizes), watched_ids, (HISTORY_START + timedelta(seconds=int(s)) for s in seconds)),
+        )
+        rebuild_watch_again(connection, user_ids)
+        db.session.commit()
+        watched += int(sizes.sum())
+
+    elapsed = time.perf_counter() - start
+    print(f'Users generated: {count} with {watched} watched movies ({watched / elapsed if elapsed else 0:.0f} rows/s)')
+    return watched
+
+
+def analyze(db):
+    """Update statistics of the planner after generating data."""
+
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
@@ -1,10 +1,14 @@
 """Configuration module for pytest."""
 
+from contextlib import contextmanager
 from datetime import datetime
 import pytest
+from sqlalchemy import event
 
 import config
 from semwork import create_app
+from semwork.extensions import db
+from semwork.import_data import load_dataset
 from semwork.models.user import User
 from semwork.models.movie import Movie
 from semwork.models.watch_later import WatchLater
@@ -67,4 +71,28 @@ def test_client():
 
     with test_app.test_client() as app_test_client:
         with test_app.app_context():
+            # import movies from given dataset
+            db.create_all()
+            if db.session.query(Movie).count() == 0:
+                load_dataset(db, 'imdb_top_1000.csv')
             yield app_test_client
+
+
+@pytest.fixture
+def count_queries():
+    """Fixture for counting SQL statements executed inside a with block."""
+
+    @contextmanager
+    def counter():
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):  # pylint: disable=R0913,W0613
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+
+    return counter
@@ -0,0 +1,147 @@
+"""Module testing async views of read-heavy pages."""
+
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy.pool import NullPool
+
+import config
+from semwork import create_app
+from semwork.asgi import RequestBody, create_asgi_app
+from semwork.extensions import db
+from semwork.movies import async_routes
+from semwork.models.movie import Movie
+from semwork.models.user import User
+from semwork.models.watch_later import WatchLater
+from semwork.models.watch_list import WatchList
+
+
+@pytest.fixture
+def async_client(test_client):  # pylint: disable=W0613,W0621; # test client creates the database
+    """Fixture for creating test app serving pages by async views."""
+
+    class AsyncTestingConfig(config.LocalTestingConfig):  # pylint: disable=R0903; # flask config class
+        ASYNC_DATABASE = True
+        # test client runs every async view in a new event loop, so connections cannot be pooled
+        ASYNC_ENGINE_OPTIONS = {'poolclass': NullPool}
+
+    # contexts of requests are not preserved, the test uses the context of the sync test client
+    return create_app(config_class=AsyncTestingConfig).test_client()
+
+
+def test_async_pages(test_client, async_client):
+    """Test async views render the same pages as sync views."""
+
+    assert async_client.application.view_functions['movies.browse'] is async_routes.browse
+    movie = db.session.scalars(db.select(Movie).order_by(Movie.id).limit(1)).one()
+    paths = [
+        '/movies/browse',
+        '/movies/browse?after=24',
+        f'/movies/movie/{movie.id}-{movie.slug}',
+        f'/movies/movie/{movie.id}-wrong-name',
+        '/movies/search-movie?search=godfather',
+        '/movies/search-movie?search=godfather&page=2',
+        '/movies/search-movie?search=Christopher+Nolan&mode=person',
+        '/movies/search-movie?search=shawshenk&mode=fuzzy',
+    ]
+    for path in paths:
+        expected = test_client.get(path)
+        response = async_client.get(path)
+        assert response.status_code == expected.status_code
+        assert response.data == expected.data
+
+
+def test_asgi_app(test_client):
+    """Test ASGI app serves concurrent requests by async views on its loop, with pooled connections."""
+
+    class AsgiTestingConfig(config.LocalTestingConfig):  # pylint: disable=R0903; # flask config class
+        ASYNC_DATABASE = True
+
+    asgi_app = create_asgi_app(config_class=AsgiTestingConfig)
+
+    async def get(path):
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': query.encode(),
+            'http_version': '1.1',
+            'headers': [(b'host', b'localhost')],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        await asgi_app(scope, receive, send)
+        return messages[0]['status'], b''.join(message.get('body', b'') for message in messages[1:])
+
+    async def serve(paths):
+        try:
+            return await asyncio.gather(*(get(path) for path in paths))
+        finally:
+            await asgi_app.wsgi_application.extensions['async_db'].dispose()
+
+    paths = ['/movies/browse', '/movies/browse?after=24', '/movies/search-movie?search=godfather&page=2'] * 2
+    for path, (status, body) in zip(paths, asyncio.run(serve(paths))):
+        expected = test_client.get(path)
+        assert status == expected.status_code
+        assert body == expected.data
+
+
+def test_request_body():
+    """Test body of the request is received by the loop only as the WSGI application reads it."""
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    chunks = [b'first,', b'second,', b'third']
+    received = []
+
+    async def receive():
+        received.append(chunks[len(received)])
+        return {'type': 'http.request', 'body': received[-1], 'more_body': len(received) < len(chunks)}
+
+    try:
+        body = RequestBody(receive, loop)
+        assert body.read(3) == b'fir'
+        assert len(received) == 1
+        assert body.read() == b'st,second,third'
+        assert len(received) == 3
+        assert body.read() == b''
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def test_async_home(test_client, async_client, new_user):
+    """Test async home page shows all shelves of the user."""
+
+    db.session.add(new_user)
+    db.session.commit()
+    movies = db.session.scalars(db.select(Movie).order_by(Movie.id).limit(2)).all()
+    try:
+        db.session.add(WatchLater(user_id=new_user.id, movie_id=movies[0].id))
+        db.session.add(WatchList(new_user.id, movies[1].id, datetime(2020, 1, 1)))
+        db.session.add(WatchList(new_user.id, movies[1].id, datetime(2021, 1, 1)))
+        db.session.commit()
+
+        for client in [test_client, async_client]:
+            client.post('/users/login', data={'username': 'TestClient', 'password': 'TestPasswd'})
+        response = async_client.get('/')
+        assert response.data == test_client.get('/').data
+        assert response.data.count(movies[0].name.encode()) >= 2
+        assert b'There are no movies recommended for you' not in response.data
+        assert b'There are currently no movies for you to watch again.' not in response.data
+    finally:
+        db.session.query(WatchLater).filter_by(user_id=new_user.id).delete()
+        db.session.query(WatchList).filter_by(user_id=new_user.id).delete()
+        db.session.query(User).filter_by(id=new_user.id).delete()
+        db.session.commit()
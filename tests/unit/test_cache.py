@@ -0,0 +1,226 @@
+"""Module testing cache of rendered pages."""
+
+import socketserver
+import threading
+import time
+
+import pytest
+
+import config
+from semwork import create_app
+from semwork.cache import LRUBackend, RedisBackend, cache
+from semwork.extensions import db
+from semwork.models.movie import Movie
+from semwork.movies.catalogue import catalogue
+
+
+class RedisStandIn(socketserver.StreamRequestHandler):
+    """Local server answering GET, SET, INCR and SELECT commands of the Redis protocol."""
+
+    values = {}
+
+    def read_command(self):
+        """Read one command sent as array of bulk strings."""
+
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2].decode())
+        return args
+
+    def handle(self):
+        while (args := self.read_command()) is not None:
+            name = args[0].upper()
+            if name == 'GET':
+                expires_at, value = self.values.get(args[1], (None, None))
+                if value is None or (expires_at is not None and expires_at < time.monotonic()):
+                    self.wfile.write(b'$-1\r\n')
+                else:
+                    self.wfile.write(b'$%d\r\n%s\r\n' % (len(value.encode()), value.encode()))
+            elif name == 'SET':
+                expires_at = time.monotonic() + int(args[4]) / 1000 if len(args) > 3 else None
+                self.values[args[1]] = (expires_at, args[2])
+                self.wfile.write(b'+OK\r\n')
+            elif name == 'INCR':
+                value = int(self.values.get(args[1], (None, '0'))[1]) + 1
+                self.values[args[1]] = (None, str(value))
+                self.wfile.write(b':%d\r\n' % value)
+            else:
+                self.wfile.write(b'+OK\r\n')
+
+
+@pytest.fixture
+def redis_url():
+    """Fixture running local stand-in of Redis server."""
+
+    RedisStandIn.values = {}
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), RedisStandIn)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'redis://127.0.0.1:{server.server_address[1]}/1'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=['lru', 'redis'])
+def cached_client(request, redis_url, test_client):  # pylint: disable=W0613,W0621; # test client creates the database
+    """Fixture for creating test app caching pages with each backend."""
+
+    class CachingConfig(config.LocalTestingConfig):  # pylint: disable=R0903; # flask config class
+        CACHE_BACKEND = request.param
+        CACHE_REDIS_URL = redis_url
+
+    test_app = create_app(config_class=CachingConfig)
+    with test_app.test_client() as app_test_client:
+        with test_app.app_context():
+            yield app_test_client
+
+
+def test_lru_backend():
+    """Test least recently used values are dropped and expired values are missing."""
+
+    backend = LRUBackend(max_entries=2)
+    backend.set('a', '1')
+    backend.set('b', '2')
+    assert backend.get('a') == '1'
+    backend.set('c', '3')
+    assert backend.get('b') is None
+    assert backend.get('a') == '1'
+    assert backend.get('c') == '3'
+
+    backend.set('d', '4', timeout=0.01)
+    time.sleep(0.02)
+    assert backend.get('d') is None
+    assert backend.incr('version') == 1
+    assert backend.incr('version') == 2
+
+
+def test_redis_backend(redis_url):
+    """Test Redis backend against local stand-in and unreachable server."""
+
+    backend = RedisBackend(redis_url)
+    assert backend.get('a') is None
+    backend.set('a', 'Amélie')
+    assert backend.get('a') == 'Amélie'
+    assert RedisStandIn.values['semwork:a'][1] == 'Amélie'
+    backend.set('b', '2', timeout=0.01)
+    time.sleep(0.02)
+    assert backend.get('b') is None
+    assert backend.incr('version') == 1
+
+    unreachable = RedisBackend('redis://127.0.0.1:1/0')
+    unreachable.set('a', '1')
+    assert unreachable.get('a') is None
+
+
+def test_cached_pages(cached_client):
+    """Test pages of anonymous users are cached until a movie changes."""
+
+    response = cached_client.get('/movies/browse')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert cache.stats()['card_misses'] == 24
+
+    response = cached_client.get('/movies/browse')
+    assert response.headers['X-Cache'] == 'HIT'
+    assert cache.stats() == {'page_misses': 1, 'page_hits': 1, 'card_misses': 24}
+
+    # cards are shared by pages
+    movie = db.session.scalars(db.select(Movie).order_by(Movie.id).limit(1)).one()
+    cached_client.post('/movies/search-movie', data={'search': movie.name})
+    assert cache.stats()['card_hits'] >= 1
+
+    # redirects are not cached
+    response = cached_client.get(f'/movies/movie/{movie.id}-wrong-name')
+    assert response.status_code == 302
+    assert 'X-Cache' not in response.headers
+
+    name = movie.name
+    try:
+        movie.name = 'Cached Movie'
+        db.session.commit()
+        response = cached_client.get('/movies/browse')
+        assert response.headers['X-Cache'] == 'MISS'
+        assert b'<h5 class="card-title">Cached Movie</h5>' in response.data
+    finally:
+        movie.name = name
+        db.session.commit()
+
+
+def test_catalogue(cached_client, count_queries):
+    """Test records of movies are loaded once until a movie changes."""
+
+    movie = db.session.scalars(db.select(Movie).order_by(Movie.id).limit(1)).one()
+    cache.version()
+    with count_queries() as statements:
+        record = catalogue.get(movie.id)
+        assert catalogue.get(movie.id) is record
+    assert len(statements) == 1
+    assert (record.name, record.slug) == (movie.name, 'the-shawshank-redemption')
+    assert catalogue.get(0) is None
+    with pytest.raises(AttributeError):
+        record.name = 'Changed'
+
+    # wrong names are redirected without loading the whole movie
+    with count_queries() as statements:
+        response = cached_client.get(f'/movies/movie/{movie.id}-wrong-name')
+    assert response.status_code == 302
+    assert not any('movie.summary' in statement for statement in statements)
+
+    name = movie.name
+    try:
+        movie.name = 'Cached Movie'
+        db.session.commit()
+        assert catalogue.get(movie.id).slug == 'cached-movie'
+
+        # renamed without invalidating the cache, e.g. by another worker before the version is read again
+        db.session.execute(db.update(Movie).where(Movie.id == movie.id).values(slug='renamed-movie'))
+        db.session.commit()
+        assert catalogue.get(movie.id).slug == 'cached-movie'
+        assert catalogue.get(movie.id, 'renamed-movie').slug == 'renamed-movie'
+    finally:
+        movie.name = name
+        db.session.commit()
+
+    # records are bounded and expire
+    cached_client.application.config.update(CACHE_TIMEOUT=0.01, CATALOGUE_MAX_RECORDS=2)
+    cache.invalidate()
+    movie_ids = db.session.scalars(db.select(Movie.id).order_by(Movie.id).limit(3)).all()
+    for movie_id in movie_ids:
+        catalogue.get(movie_id)
+    assert list(cached_client.application.extensions['catalogue']['records'].values) == movie_ids[1:]
+    time.sleep(0.02)
+    with count_queries() as statements:
+        catalogue.get(movie_ids[2])
+    assert len(statements) == 1
+
+
+def test_invalidation_shared_by_workers(test_client):  # pylint: disable=W0613; # creates the database
+    """Test cache cleared by another worker or command outdates pages cached in-process by this worker."""
+
+    class WorkerConfig(config.LocalTestingConfig):  # pylint: disable=R0903; # flask config class
+        CACHE_BACKEND = 'lru'
+        CACHE_VERSION_POLL = 0
+
+    worker, other_worker = create_app(config_class=WorkerConfig), create_app(config_class=WorkerConfig)
+    with worker.app_context():
+        client = worker.test_client()
+        assert client.get('/movies/browse').headers['X-Cache'] == 'MISS'
+        assert client.get('/movies/browse').headers['X-Cache'] == 'HIT'
+
+    with other_worker.app_context():
+        assert 'Cache cleared' in other_worker.test_cli_runner().invoke(args=['cache', 'clear']).output
+
+    with worker.app_context():
+        assert client.get('/movies/browse').headers['X-Cache'] == 'MISS'
+        # the version is not one of cached values, so evicting them does not bring back outdated pages
+        worker.extensions['cache']['backend'].values.clear()
+        assert client.get('/movies/browse').headers['X-Cache'] == 'MISS'
+        assert client.get('/movies/browse').headers['X-Cache'] == 'HIT'
+
+    disabled = create_app(config_class=config.LocalTestingConfig)
+    with disabled.app_context():
+        assert 'Cache is disabled' in disabled.test_cli_runner().invoke(args=['cache', 'clear']).output
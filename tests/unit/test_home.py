@@ -1,19 +1,33 @@
 """Module testing home modules."""
 
 from datetime import datetime, timedelta
-from flask_login import current_user
-
+import threading
+import time
+import pytest
+from flask_login import current_user, login_user
+from sqlalchemy import event, func, literal, select, text, update
+
+import config
+from semwork import create_app
 from semwork.extensions import db
 from semwork.import_data import load_dataset
 from semwork.models.movie import Movie
+from semwork.models.movie_change import MovieChange
 from semwork.models.watch_later import WatchLater
 from semwork.models.watch_list import WatchList
 from semwork.models.user import User
+from semwork.models.recommendation import Recommendation
+from semwork.models.watch_again import WatchAgain
 from semwork.home.services import (
+    RECOMMENDATIONS_LOCK_KEY,
     find_and_calculate_recommendations,
     get_new_recommendations,
+    get_recommendations,
     get_watch_again,
+    refresh_outdated_recommendations,
+    watch_later_statement,
 )
+from semwork.home.shelves import shelves
 
 
 def test_homepage_access(test_client, new_user, new_movie):
@@ -221,6 +235,150 @@ def test_get_new_recommendations(test_client, new_user):
         db.session.commit()
 
 
+def test_get_recommendations(test_client, new_user):
+    """Test retrieving stored recommendations."""
+
+    assert db.session.query(User).filter_by(username='TestClient').first() is None
+
+    try:
+        # prepare watch history
+        load_dataset(db, 'tests/test_dataset.csv')
+        db.session.add(new_user)
+        _ = test_client.post(
+            '/users/login', data={'username': 'TestClient', 'password': 'TestPasswd'}
+        )
+        assert current_user.username == 'TestClient'
+        watch_date = datetime.strptime('2024-02-01 00:00:00', '%Y-%m-%d %H:%M:%S')
+        movie_ids = dict(db.session.query(Movie.name, Movie.id)
+                        .filter(Movie.poster_link.ilike('%https://link-to-movie-%'))
+                        .all())
+
+        assert get_recommendations() == []
+        assert new_user.recommendations_outdated is False
+
+        db.session.add(WatchList(new_user.id, movie_ids['Movie 9'], watch_date))
+        recommendations = get_recommendations()
+        assert recommendations == get_new_recommendations()
+        assert {(movie[0].name, movie[1]) for movie in recommendations[:2]} == {
+            ('Movie 7', 177),
+            ('Movie 6', 174.25),
+        }
+        assert db.session.query(Recommendation).filter_by(user_id=new_user.id).count() == 30
+
+        # stored recommendations are not calculated again while watch history does not change
+        db.session.query(Recommendation).filter_by(user_id=new_user.id, movie_id=movie_ids['Movie 7']).delete()
+        db.session.commit()
+        assert 'Movie 7' not in [movie[0].name for movie in get_recommendations()]
+
+        watched = WatchList(new_user.id, movie_ids['Movie 7'], watch_date + timedelta(days=1))
+        db.session.add(watched)
+        recommendations = get_recommendations()
+        assert 'Movie 7' not in [movie[0].name for movie in recommendations]
+        assert recommendations[0][0].name == 'Movie 6'
+
+        db.session.delete(watched)
+        db.session.commit()
+        assert get_recommendations()[0][0].name == 'Movie 7'
+    finally:
+        db.session.query(WatchList).filter_by(user_id=new_user.id).delete()
+        db.session.query(Movie).filter(
+            Movie.poster_link.ilike('%https://link-to-movie-%')
+        ).delete()
+        db.session.query(User).filter_by(username=new_user.username).delete()
+        db.session.commit()
+
+
+def test_concurrent_refresh(test_client, new_user):
+    """Test request waiting for a concurrent refresh of recommendations does not refresh them again."""
+
+    db.session.add(new_user)
+    db.session.commit()
+    movie = db.session.scalars(select(Movie).order_by(Movie.id).limit(1)).one()
+    try:
+        db.session.add(WatchList(new_user.id, movie.id, datetime(2024, 1, 1)))
+        db.session.commit()
+
+        def refresh():
+            with test_client.application.test_request_context():
+                login_user(new_user)
+                refresh_outdated_recommendations()
+
+        with db.engine.begin() as connection:
+            # the concurrent refresh holds the lock until it marks recommendations refreshed
+            connection.execute(
+                text('SELECT pg_advisory_xact_lock(:key, :user_id)'),
+                {'key': RECOMMENDATIONS_LOCK_KEY, 'user_id': new_user.id},
+            )
+            thread = threading.Thread(target=refresh)
+            thread.start()
+            thread.join(0.5)
+            assert thread.is_alive()
+            connection.execute(update(User).where(User.id == new_user.id).values(recommendations_outdated=False))
+        thread.join(5)
+        assert not thread.is_alive()
+        assert db.session.query(Recommendation).filter_by(user_id=new_user.id).count() == 0
+    finally:
+        db.session.query(Recommendation).filter_by(user_id=new_user.id).delete()
+        db.session.query(WatchList).filter_by(user_id=new_user.id).delete()
+        db.session.query(User).filter_by(id=new_user.id).delete()
+        db.session.commit()
+
+
+def test_vector_scorer(test_client, new_user):
+    """Test in-process recommendations scoring gives the same results as the database."""
+
+    assert db.session.query(User).filter_by(username='TestClient').first() is None
+
+    try:
+        # prepare watch history
+        load_dataset(db, 'tests/test_dataset.csv')
+        db.session.add(new_user)
+        _ = test_client.post(
+            '/users/login', data={'username': 'TestClient', 'password': 'TestPasswd'}
+        )
+        assert current_user.username == 'TestClient'
+        watch_date = datetime.strptime('2024-02-01 00:00:00', '%Y-%m-%d %H:%M:%S')
+        movie_ids = dict(db.session.query(Movie.name, Movie.id)
+                        .filter(Movie.poster_link.ilike('%https://link-to-movie-%'))
+                        .all())
+
+        test_client.application.config['RECOMMENDATION_SCORER'] = 'numpy'
+        assert get_new_recommendations() == []
+
+        for i in [1, 4, 9]:
+            db.session.add(WatchList(new_user.id, movie_ids[f'Movie {i}'], watch_date))
+            watch_date = watch_date + timedelta(days=1)
+
+        for maximum, recent_limit in [(30, 10), (4, 2), (1, 1), (0, 3), (2000, 10)]:
+            test_client.application.config['RECOMMENDATION_SCORER'] = 'numpy'
+            vectorized = get_new_recommendations(maximum=maximum, recent_limit=recent_limit)
+            test_client.application.config['RECOMMENDATION_SCORER'] = 'sql'
+            expected = get_new_recommendations(maximum=maximum, recent_limit=recent_limit)
+            assert [movie.id for movie, _ in vectorized] == [movie.id for movie, _ in expected]
+            assert [value for _, value in vectorized] == pytest.approx([value for _, value in expected])
+
+        assert movie_ids['Movie 1'] not in [movie.id for movie, _ in vectorized]
+
+        # changed movies are loaded again
+        db.session.commit()
+        changes = db.session.get(MovieChange, 1).changes
+        db.session.get(Movie, vectorized[0][0].id).genre = 'Western'
+        db.session.commit()
+        assert db.session.get(MovieChange, 1).changes == changes + 1
+        test_client.application.config['RECOMMENDATION_SCORER'] = 'numpy'
+        vectorized = get_new_recommendations()
+        test_client.application.config['RECOMMENDATION_SCORER'] = 'sql'
+        assert [value for _, value in vectorized] == pytest.approx([value for _, value in get_new_recommendations()])
+    finally:
+        test_client.application.config['RECOMMENDATION_SCORER'] = 'sql'
+        db.session.query(WatchList).filter_by(user_id=new_user.id).delete()
+        db.session.query(Movie).filter(
+            Movie.poster_link.ilike('%https://link-to-movie-%')
+        ).delete()
+        db.session.query(User).filter_by(username=new_user.username).delete()
+        db.session.commit()
+
+
 def test_watch_again(test_client, new_user):
     """Test getting movies to watch again."""
 
@@ -277,6 +435,25 @@ def test_watch_again(test_client, new_user):
         watch_again = get_watch_again()
         assert len(watch_again) == 2
         assert [movie.name for movie in watch_again] == ['Movie 4', 'Movie 2']
+
+        # removing the last watch of a movie makes the previous interval count again
+        db.session.delete(
+            db.session.query(WatchList)
+            .filter_by(user_id=new_user.id, movie_id=movie_ids['Movie 1'])
+            .order_by(WatchList.date_watched.desc())
+            .first()
+        )
+        assert db.session.get(WatchAgain, (new_user.id, movie_ids['Movie 1'])).last_watched == watch_date + timedelta(
+            days=21
+        )
+        assert [movie.name for movie in get_watch_again()] == ['Movie 4', 'Movie 2', 'Movie 1']
+
+        # movies watched once are never due
+        assert db.session.get(WatchAgain, (new_user.id, movie_ids['Movie 3'])).next_due is None
+        db.session.delete(
+            db.session.query(WatchList).filter_by(user_id=new_user.id, movie_id=movie_ids['Movie 3']).one()
+        )
+        assert db.session.query(WatchAgain).filter_by(user_id=new_user.id, movie_id=movie_ids['Movie 3']).count() == 0
     finally:
         db.session.query(WatchList).filter_by(user_id=new_user.id).delete()
         db.session.query(Movie).filter(
@@ -284,3 +461,71 @@ def test_watch_again(test_client, new_user):
         ).delete()
         db.session.query(User).filter_by(username=new_user.username).delete()
         db.session.commit()
+
+
+def test_concurrent_shelves(test_client, new_user):  # pylint: disable=W0613; # test client creates the database
+    """Test shelves are queried by threads and slow shelves are empty after their timeout."""
+
+    class ShelvesConfig(config.LocalTestingConfig):  # pylint: disable=R0903; # flask config class
+        HOME_SHELF_WORKERS = 2
+        HOME_SHELF_TIMEOUTS = {'slow': 0.2}
+
+    shelves_app = create_app(config_class=ShelvesConfig)
+    db.session.add(new_user)
+    db.session.commit()
+    movie = db.session.scalars(select(Movie).order_by(Movie.id).limit(1)).one()
+    try:
+        db.session.add(WatchLater(user_id=new_user.id, movie_id=movie.id))
+        db.session.commit()
+
+        with shelves_app.test_request_context():
+            login_user(new_user)
+            start = time.monotonic()
+            loaded = shelves.load(
+                {
+                    'watch_later': watch_later_statement(),
+                    'slow': select(func.pg_sleep(5), literal(1)),
+                    'sum': select(literal(1) + 1, literal(0)),
+                }
+            )
+            assert time.monotonic() - start < 2
+        assert [watched.name for watched in loaded['watch_later']] == [movie.name]
+        assert loaded['slow'] == []
+        assert loaded['sum'] == [(2, 0)]
+
+        with shelves_app.test_client() as client:
+            client.post('/users/login', data={'username': 'TestClient', 'password': 'TestPasswd'})
+            response = client.get('/')
+        assert b'<span>You have no movies to watch.</span>' not in response.data
+    finally:
+        db.session.query(WatchLater).filter_by(user_id=new_user.id).delete()
+        db.session.query(User).filter_by(id=new_user.id).delete()
+        db.session.commit()
+
+
+def test_cancelled_shelves(test_client):  # pylint: disable=W0613; # test client creates the database
+    """Test shelves waiting for a thread after their timeout are not queried."""
+
+    class ShelvesConfig(config.LocalTestingConfig):  # pylint: disable=R0903; # flask config class
+        HOME_SHELF_WORKERS = 1
+        HOME_SHELF_TIMEOUTS = {'slow': 0.3, 'queued': 0.1}
+
+    shelves_app = create_app(config_class=ShelvesConfig)
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):  # pylint: disable=R0913,W0613
+        statements.append(f'{statement} {parameters}')
+
+    with shelves_app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            loaded = shelves.load(
+                {'slow': select(func.pg_sleep(5), literal(1)), 'queued': select(literal('queued'), literal(1))}
+            )
+            # the only thread is free again after the statement timeout of the slow shelf
+            shelves_app.extensions['shelves'].submit(time.sleep, 0).result(2)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+    assert loaded == {'slow': [], 'queued': []}
+    assert any('pg_sleep' in statement for statement in statements)
+    assert not any('queued' in statement for statement in statements)
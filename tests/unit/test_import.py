@@ -1,8 +1,13 @@
 """Module testing importing."""
 
-from semwork.import_data import load_dataset
+from semwork.import_data import import_lock, load_dataset
 from semwork.extensions import db
+from semwork.models.import_checkpoint import ImportCheckpoint
+from semwork.models.genre import Genre
 from semwork.models.movie import Movie
+from semwork.models.movie_genre import MovieGenre
+from semwork.models.movie_person import MoviePerson
+from semwork.models.person import Person
 
 
 def test_load_dataset(test_client):
@@ -42,8 +47,87 @@ def test_load_dataset(test_client):
                 .count()
                 == 9
             )
+
+            # genres and people are linked to imported movies
+            movie = db.session.query(Movie).filter_by(name='Movie 2').first()
+            assert [
+                name
+                for name, in db.session.query(Genre.name)
+                .join(MovieGenre, Genre.id == MovieGenre.genre_id)
+                .where(MovieGenre.movie_id == movie.id)
+                .order_by(Genre.name)
+            ] == ['GenreA', 'GenreB']
+            assert db.session.query(Person.name, MoviePerson.role).join(
+                MoviePerson, Person.id == MoviePerson.person_id
+            ).where(MoviePerson.movie_id == movie.id).order_by(MoviePerson.position).all() == [
+                ('Christopher Nolan', 'director'),
+                ('Arnold Schwarzenegger', 'star'),
+                ('Brad Pitt', 'star'),
+                ('Michael Caine', 'star'),
+                ('Scarlett Johansson', 'star'),
+            ]
         finally:
             db.session.query(Movie).filter(
                 Movie.poster_link.ilike('%https://link-to-movie-%')
             ).delete()
             db.session.commit()
+
+
+def test_load_dataset_in_batches(test_client):
+    """Test importing movies dataset in batches smaller than the dataset."""
+
+    with test_client.application.app_context():
+        try:
+            assert load_dataset(db, 'tests/test_dataset.csv', batch_size=4) == 9
+            assert (
+                db.session.query(Movie)
+                .filter(Movie.poster_link.ilike('%https://link-to-movie-%'))
+                .count()
+                == 9
+            )
+            assert db.session.query(Movie).filter_by(name='Movie 9', certificate='PG').count() == 1
+        finally:
+            db.session.query(Movie).filter(
+                Movie.poster_link.ilike('%https://link-to-movie-%')
+            ).delete()
+            db.session.commit()
+
+
+def test_import_command(test_client):
+    """Test CLI command importing movies dataset."""
+
+    runner = test_client.application.test_cli_runner()
+    try:
+        result = runner.invoke(
+            args=['movies', 'import', 'tests/test_dataset.csv', '--batch-size', '4', '--restart']
+        )
+        assert 'Movies added: 9' in result.output
+        assert db.session.get(ImportCheckpoint, 'tests/test_dataset.csv').rows_committed == 9
+
+        # resume after the last committed row
+        db.session.get(ImportCheckpoint, 'tests/test_dataset.csv').rows_committed = 4
+        db.session.commit()
+        result = runner.invoke(args=['movies', 'import', 'tests/test_dataset.csv'])
+        assert 'Movies added: 5' in result.output
+
+        # importing again updates already imported movies
+        result = runner.invoke(args=['movies', 'import', 'tests/test_dataset.csv', '--restart'])
+        assert 'Movies added: 9' in result.output
+        assert (
+            db.session.query(Movie)
+            .filter(Movie.poster_link.ilike('%https://link-to-movie-%'))
+            .count()
+            == 9
+        )
+
+        # import is not started when another one is running
+        with import_lock(db) as acquired:
+            assert acquired
+            result = runner.invoke(args=['movies', 'import', 'tests/test_dataset.csv', '--restart'])
+            assert 'Import is already running.' in result.output
+    finally:
+        db.session.query(ImportCheckpoint).filter_by(source='tests/test_dataset.csv').delete()
+        db.session.query(Movie).filter(
+            Movie.poster_link.ilike('%https://link-to-movie-%')
+        ).delete()
+        db.session.commit()
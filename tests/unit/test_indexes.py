@@ -0,0 +1,136 @@
+"""Module testing hot queries use indexes."""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, select, text
+
+from semwork.extensions import db
+from semwork.models.genre import Genre
+from semwork.models.movie import SORTED_GROSS_EARNED, Movie
+from semwork.models.movie_genre import MovieGenre
+from semwork.models.user import User
+from semwork.models.watch_again import WatchAgain
+from semwork.models.watch_later import WatchLater
+from semwork.models.watch_list import WatchList
+
+# tables read by every request of logged-in users, they grow with the number of users
+USER_TABLES = ['watch_list', 'watch_later', 'watch_again', 'recommendation']
+# rows of many users, so plans are the ones of a used database and not of nearly empty tables
+FILL_TABLES = """
+INSERT INTO "user" (username, password) SELECT 'index-test-' || n, '' FROM generate_series(1, 100) AS n;
+INSERT INTO watch_list (user_id, movie_id, date_watched)
+SELECT u.id, m.id, timestamp '2024-01-01' + m.id * interval '1 hour'
+FROM "user" AS u JOIN movie AS m ON m.id % 10 = u.id % 10 WHERE u.username LIKE 'index-test-%';
+INSERT INTO watch_again (user_id, movie_id, last_watched)
+SELECT user_id, movie_id, max(date_watched) FROM watch_list GROUP BY user_id, movie_id ON CONFLICT DO NOTHING;
+INSERT INTO watch_later (user_id, movie_id) SELECT user_id, movie_id FROM watch_list WHERE movie_id % 4 = 0
+ON CONFLICT DO NOTHING;
+INSERT INTO recommendation (user_id, movie_id, value) SELECT user_id, movie_id, movie_id FROM watch_list WHERE movie_id % 3 = 0
+ON CONFLICT DO NOTHING;
+ANALYZE movie, movie_genre, genre, watch_list, watch_later, watch_again, recommendation;
+"""
+
+
+def explain(statement: str, parameters=None) -> str:
+    """Get plan of the statement, sequential scans are disabled, so they are only planned when no index can be used."""
+
+    cursor = db.session.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute(f'EXPLAIN {statement}', parameters)
+        return '\n'.join(row[0] for row in cursor.fetchall())
+    finally:
+        cursor.execute('SET LOCAL enable_seqscan = on')
+        cursor.close()
+
+
+def full_scans(plan: str, tables: list) -> list:
+    """Get scans of the tables in the plan reading whole tables, sequential scans and index scans without condition."""
+
+    return [
+        node.splitlines()[0].strip()
+        for node in plan.split('->')
+        if any(f' on {table} ' in node.splitlines()[0] for table in tables)
+        and 'Index Cond' not in node
+        and 'Recheck Cond' not in node
+    ]
+
+
+def test_user_pages_use_indexes(test_client, new_user):
+    """Test queries of home and watch history pages do not scan whole tables of all users."""
+
+    db.session.add(new_user)
+    db.session.commit()
+    movie_ids = db.session.scalars(select(Movie.id).order_by(Movie.id).limit(3)).all()
+    db.session.add_all(
+        WatchList(new_user.id, movie_id, datetime(2024, 1, 1 + i)) for i, movie_id in enumerate(movie_ids)
+    )
+    db.session.add(WatchLater(new_user.id, movie_ids[0]))
+    db.session.commit()
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):  # pylint: disable=R0913,W0613
+        if statement.lstrip().upper().startswith('SELECT') and not executemany:
+            statements.append((statement, parameters))
+
+    try:
+        test_client.post('/users/login', data={'username': 'TestClient', 'password': 'TestPasswd'})
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            for path in ['/', '/movies/watch-history']:
+                assert test_client.get(path).status_code == 200
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+
+        # rows of other users are rolled back after explaining queries of the pages
+        db.session.execute(text(FILL_TABLES))
+        tables = ' '.join(statement for statement, _ in statements)
+        assert all(table in tables for table in USER_TABLES)
+        for statement, parameters in statements:
+            plan = explain(statement, parameters)
+            assert not full_scans(plan, USER_TABLES), f'{statement}\n{plan}'
+    finally:
+        db.session.rollback()
+        db.session.query(WatchAgain).filter_by(user_id=new_user.id).delete()
+        db.session.query(WatchLater).filter_by(user_id=new_user.id).delete()
+        db.session.query(WatchList).filter_by(user_id=new_user.id).delete()
+        db.session.query(User).filter_by(username=new_user.username).delete()
+        db.session.commit()
+
+
+@pytest.mark.parametrize(
+    'statement, index',
+    [
+        (
+            select(WatchList).where(WatchList.user_id == 1).order_by(WatchList.date_watched, WatchList.id).limit(24),
+            'ix_watch_list_user_id_date_watched_id',
+        ),
+        (select(WatchList).where(WatchList.movie_id == 1), 'ix_watch_list_movie_id'),
+        (select(WatchLater).where(WatchLater.movie_id == 1), 'ix_watch_later_movie_id'),
+        (select(Movie).order_by(Movie.release_year.desc(), Movie.id.desc()).limit(24), 'ix_movie_release_year_id'),
+        (select(Movie).order_by(Movie.imdb_rating, Movie.id).limit(24), 'ix_movie_imdb_rating_id'),
+        (select(Movie).order_by(Movie.no_of_votes.desc(), Movie.id.desc()).limit(24), 'ix_movie_no_of_votes_id'),
+        (
+            select(Movie).order_by(SORTED_GROSS_EARNED.desc(), Movie.id.desc()).limit(24),
+            'ix_movie_sorted_gross_earned_id',
+        ),
+        (select(Movie).where(Movie.certificate == 'G').order_by(Movie.id).limit(24), 'ix_movie_certificate_id'),
+        (
+            select(MovieGenre.movie_id).join(Genre).where(Genre.name == 'Western'),
+            'ix_movie_genre_genre_id_movie_id',
+        ),
+    ],
+)
+def test_queries_use_indexes(test_client, statement, index):  # pylint: disable=W0613; # creates the database
+    """Test watch history ordered by date, lookups of watch lists by movies and browse sorts and filters
+    use their indexes."""
+
+    try:
+        db.session.execute(text(FILL_TABLES))
+        plan = explain(str(statement.compile(db.engine, compile_kwargs={'literal_binds': True})))
+        assert index in plan, plan
+        assert 'Seq Scan' not in plan, plan
+    finally:
+        db.session.rollback()
@@ -19,6 +19,7 @@ def test_movie(new_movie):
 
     assert new_movie.name == 'Gekijô-ban: Air/Magokoro'
     assert new_movie.unaccented_name == 'Gekijo-ban: Air/Magokoro'
+    assert new_movie.slug == 'gekijo-ban-airmagokoro'
     assert new_movie.poster_link == 'https://testPoster.com'
     assert new_movie.release_year == 1994
     assert new_movie.runtime == '142 min'
@@ -34,6 +35,7 @@ def test_movie(new_movie):
     assert repr(new_movie) == (
         '<Movie Gekijô-ban: Air/Magokoro>'
         ' Gekijo-ban: Air/Magokoro'
+        ' gekijo-ban-airmagokoro'
         ' https://testPoster.com'
         ' 1994'
         ' 142 min'
@@ -1,16 +1,26 @@
 """Module testing movies modules."""
 
-from datetime import datetime
+from datetime import datetime, timedelta
+import io
+import json
+import re
 import pytest
 
-from flask_login import current_user
+from flask import render_template_string
+from flask_login import current_user, login_user
+from sqlalchemy import update
 
 from semwork.extensions import db
+from semwork.models.facet_count import FacetCount
 from semwork.models.movie import Movie
+from semwork.models.watch_again import WatchAgain
 from semwork.models.watch_later import WatchLater
 from semwork.models.watch_list import WatchList
 from semwork.models.user import User
+from semwork.movies.autocomplete import PrefixIndex, autocomplete
+from semwork.movies.browse import group_facet_counts, refresh_facet_counts
 from semwork.movies.filters import movie_name_to_url, query_empty, in_watch_later
+from semwork.movies.services import full_text_search, fuzzy_search, person_search, prompt_to_words
 
 
 @pytest.mark.parametrize(
@@ -112,6 +122,34 @@ def test_watch_later(test_client, new_movie):
         db.session.commit()
 
 
+def test_watch_later_queried_once(test_client, new_user, count_queries):
+    """Test watch later of the user is queried once per request however many movies are checked."""
+
+    db.session.add(new_user)
+    db.session.commit()
+
+    try:
+        movie_ids = db.session.scalars(db.select(Movie.id).order_by(Movie.id).limit(24)).all()
+        db.session.add_all(WatchLater(new_user.id, movie_id) for movie_id in movie_ids[::2])
+        db.session.commit()
+
+        template = '{% for movie in movies %}{{ movie | in_watch_later(current_user) }} {% endfor %}'
+        with test_client.application.test_request_context():
+            login_user(new_user)
+            with count_queries() as statements:
+                rendered = render_template_string(template, movies=movie_ids)
+            assert rendered.split() == ['True', 'False'] * 12
+            assert len(statements) == 1
+
+            # removed movie is not in watch later any more
+            db.session.delete(db.session.get(WatchLater, (new_user.id, movie_ids[2])))
+            assert in_watch_later(movie_ids[2], new_user) is False
+    finally:
+        db.session.query(WatchLater).filter_by(user_id=new_user.id).delete()
+        db.session.query(User).filter_by(username=new_user.username).delete()
+        db.session.commit()
+
+
 def test_browse_movies(test_client):
     """Test browse movies page."""
 
@@ -128,6 +166,226 @@ def test_browse_movies(test_client):
     assert b'<span>No movies are available.</span>' in response.data
 
 
+def test_browse_movies_keyset(test_client):
+    """Test browse movies pages following and preceding cursors."""
+
+    movie_ids = db.session.scalars(db.select(Movie.id).order_by(Movie.id)).all()
+
+    response = test_client.get('/movies/browse')
+    assert f'href="/movies/browse?after={movie_ids[23]}">Next'.encode() in response.data
+    assert b'<li class="page-item disabled">\n            <a class="page-link" href="/movies/browse?before=' in response.data
+
+    response = test_client.get('/movies/browse', query_string={'after': movie_ids[23]})
+    assert f'/movies/movie/{movie_ids[24]}-'.encode() in response.data
+    assert f'/movies/movie/{movie_ids[23]}-'.encode() not in response.data
+    assert f'href="/movies/browse?before={movie_ids[24]}">Previous'.encode() in response.data
+
+    response = test_client.get('/movies/browse', query_string={'before': movie_ids[24]})
+    assert f'/movies/movie/{movie_ids[0]}-'.encode() in response.data
+    assert f'/movies/movie/{movie_ids[24]}-'.encode() not in response.data
+
+    # last page has no next page
+    response = test_client.get('/movies/browse', query_string={'after': movie_ids[-2]})
+    assert f'href="/movies/browse?after={movie_ids[-1]}">Next'.encode() in response.data
+    assert b'<li class="page-item disabled">\n            <a class="page-link" href="/movies/browse?after=' in response.data
+
+    # invalid cursor shows the first page
+    response = test_client.get('/movies/browse', query_string={'after': 'abc'})
+    assert f'/movies/movie/{movie_ids[0]}-'.encode() in response.data
+
+
+def browsed_movie_ids(response) -> list:
+    """Get ids of movies on the browse page in their order."""
+
+    return list(dict.fromkeys(int(movie_id) for movie_id in re.findall(rb'/movies/movie/(\d+)-', response.data)))
+
+
+def test_browse_movies_filters(test_client):
+    """Test browse movies pages filtered and sorted by indexed columns."""
+
+    drama = db.select(Movie).where(Movie.genre.contains('Drama'), Movie.imdb_rating >= 8.5)
+    expected = db.session.scalars(drama.order_by(Movie.imdb_rating.desc(), Movie.id.desc())).all()
+    assert len(expected) > 24
+
+    response = test_client.get('/movies/browse', query_string={'genre': 'Drama', 'min_rating': 8.5, 'sort': 'rating'})
+    assert browsed_movie_ids(response) == [movie.id for movie in expected[:24]]
+    cursor = f'{expected[23].imdb_rating},{expected[23].id}'
+    assert f'after={cursor}'.encode() in response.data
+    assert b'genre=Drama' in response.data and b'min_rating=8.5' in response.data and b'sort=rating' in response.data
+
+    response = test_client.get(
+        '/movies/browse', query_string={'genre': 'Drama', 'min_rating': 8.5, 'sort': 'rating', 'after': cursor}
+    )
+    assert browsed_movie_ids(response) == [movie.id for movie in expected[24:48]]
+    before = f'{expected[24].imdb_rating},{expected[24].id}'
+    response = test_client.get(
+        '/movies/browse', query_string={'genre': 'Drama', 'min_rating': 8.5, 'sort': 'rating', 'before': before}
+    )
+    assert browsed_movie_ids(response) == [movie.id for movie in expected[:24]]
+
+    # directors are matched by names of people, years and certificates by columns
+    nolan = db.session.scalars(
+        db.select(Movie.id).where(Movie.director == 'Christopher Nolan').order_by(Movie.id)
+    ).all()
+    response = test_client.get('/movies/browse', query_string={'director': 'Christopher Nolan'})
+    assert browsed_movie_ids(response) == nolan
+    nineties = db.session.scalars(
+        db.select(Movie.id)
+        .where(Movie.release_year.between(1990, 1999), Movie.certificate == 'R')
+        .order_by(Movie.release_year.desc(), Movie.id.desc())
+    ).all()
+    response = test_client.get(
+        '/movies/browse', query_string={'year_from': 1990, 'year_to': 1999, 'certificate': 'R', 'sort': 'year'}
+    )
+    assert browsed_movie_ids(response) == nineties[:24]
+
+    # movies with unknown gross are sorted as without earnings
+    gross = db.session.scalars(
+        db.select(Movie.id).order_by(db.func.coalesce(Movie.gross_earned, 0).desc(), Movie.id.desc())
+    ).all()
+    assert browsed_movie_ids(test_client.get('/movies/browse', query_string={'sort': 'gross'})) == gross[:24]
+    votes = db.session.scalars(db.select(Movie.id).order_by(Movie.no_of_votes.desc(), Movie.id.desc())).all()
+    assert browsed_movie_ids(test_client.get('/movies/browse', query_string={'sort': 'votes'})) == votes[:24]
+
+    # invalid filters and sorts are ignored
+    response = test_client.get('/movies/browse', query_string={'year_from': 'abc', 'sort': 'name'})
+    assert browsed_movie_ids(response) == db.session.scalars(db.select(Movie.id).order_by(Movie.id).limit(24)).all()
+
+    response = test_client.get('/movies/browse', query_string={'genre': 'Unknown'})
+    assert b'<span>No movies are available.</span>' in response.data
+
+
+def test_browse_movies_facets(test_client, new_movie):
+    """Test facet counts of browse page are counted by movies of genres, certificates and decades
+    and follow movies changed through the session."""
+
+    dramas = db.session.scalar(db.select(db.func.count()).where(Movie.genre.contains('Drama')))
+    certified = db.session.scalar(db.select(db.func.count()).where(Movie.certificate == 'UA'))
+    nineties = db.session.scalar(db.select(db.func.count()).where(Movie.release_year.between(1990, 1999)))
+
+    try:
+        refresh_facet_counts(db.session.connection())
+        counts = group_facet_counts(db.session.execute(db.select(FacetCount.facet, FacetCount.value, FacetCount.movies)))
+        assert ('Drama', dramas) in counts['genre']
+        assert ('UA', certified) in counts['certificate']
+        assert ('1990', nineties) in counts['decade']
+        assert counts['genre'][0] == ('Drama', dramas)
+        assert [decade for decade, _ in counts['decade']] == sorted(decade for decade, _ in counts['decade'])
+
+        response = test_client.get('/movies/browse')
+        assert f'Drama ({dramas})'.encode() in response.data
+        assert b'/movies/browse?year_from=1990&amp;year_to=1999' in response.data
+
+        def movies(facet, value):
+            return db.session.scalar(db.select(FacetCount.movies).filter_by(facet=facet, value=value)) or 0
+
+        new_movie.genre = 'Drama, Western'
+        db.session.add(new_movie)
+        db.session.flush()
+        assert (movies('genre', 'Drama'), movies('decade', '1990')) == (dramas + 1, nineties + 1)
+
+        new_movie.genre = 'Western'
+        new_movie.release_year = 2031
+        db.session.flush()
+        assert (movies('genre', 'Drama'), movies('decade', '1990')) == (dramas, nineties)
+        assert movies('decade', '2030') == 1
+
+        db.session.delete(new_movie)
+        db.session.flush()
+        assert movies('decade', '2030') == 0
+        assert db.session.get(FacetCount, ('decade', '2030')) is None
+    finally:
+        db.session.rollback()
+
+
+def test_watch_history_keyset(test_client, new_user):
+    """Test watch history pages ordered by date watched."""
+
+    db.session.add(new_user)
+    db.session.commit()
+
+    try:
+        movie_ids = db.session.scalars(db.select(Movie.id).order_by(Movie.id).limit(25)).all()
+        # two movies watched at the same time are ordered by id of the watch history entry
+        db.session.add_all(
+            WatchList(new_user.id, movie_id, datetime(2024, 1, 1 + min(i, 23))) for i, movie_id in enumerate(movie_ids)
+        )
+        db.session.commit()
+        entries = db.session.scalars(
+            db.select(WatchList).where(WatchList.user_id == new_user.id).order_by(WatchList.date_watched, WatchList.id)
+        ).all()
+
+        test_client.post('/users/login', data={'username': 'TestClient', 'password': 'TestPasswd'})
+        response = test_client.get('/movies/watch-history')
+        assert f'remove-from-watch-list/{entries[23].id}"'.encode() in response.data
+        assert f'remove-from-watch-list/{entries[24].id}"'.encode() not in response.data
+
+        response = test_client.get(
+            '/movies/watch-history', query_string={'after': f'{entries[23].date_watched.isoformat()},{entries[23].id}'}
+        )
+        assert f'remove-from-watch-list/{entries[24].id}"'.encode() in response.data
+        assert f'remove-from-watch-list/{entries[23].id}"'.encode() not in response.data
+    finally:
+        db.session.query(WatchList).filter_by(user_id=new_user.id).delete()
+        db.session.query(User).filter_by(username=new_user.username).delete()
+        db.session.commit()
+
+
+def test_conditional_requests(test_client, new_user):
+    """Test pages are not sent again while the client has the current version."""
+
+    movie = db.session.scalars(db.select(Movie).order_by(Movie.id).limit(1)).one()
+    url = f'/movies/movie/{movie.id}-{movie_name_to_url(movie.name)}'
+
+    response = test_client.get(url)
+    etag = response.headers['ETag']
+    last_modified = response.headers['Last-Modified']
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert response.headers['Vary'] == 'Cookie'
+
+    response = test_client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    response = test_client.get(url, headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+    # wrong name is redirected, not answered by validators of the movie
+    response = test_client.get(f'/movies/movie/{movie.id}-wrong-name', headers={'If-None-Match': etag})
+    assert response.status_code == 302
+
+    response = test_client.get('/movies/browse')
+    assert test_client.get('/movies/browse', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    browse_etag = response.headers['ETag']
+
+    summary = movie.summary
+    try:
+        movie.summary = 'Changed summary'
+        db.session.commit()
+        response = test_client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert b'Changed summary' in response.data
+        assert response.headers['ETag'] != etag
+        etag = response.headers['ETag']
+        assert test_client.get('/movies/browse', headers={'If-None-Match': browse_etag}).status_code == 200
+
+        # pages of logged in users differ from anonymous ones and by their watch later
+        db.session.add(new_user)
+        db.session.commit()
+        test_client.post('/users/login', data={'username': 'TestClient', 'password': 'TestPasswd'})
+        response = test_client.get(url)
+        user_etag = response.headers['ETag']
+        assert user_etag != etag
+        assert response.headers['Cache-Control'] == 'no-cache, private'
+        test_client.post(f'/movies/add-to-watch-later/{movie.id}')
+        assert test_client.get(url, headers={'If-None-Match': user_etag}).status_code == 200
+    finally:
+        movie.summary = summary
+        db.session.query(WatchLater).filter_by(user_id=new_user.id).delete()
+        db.session.query(User).filter_by(username=new_user.username).delete()
+        db.session.commit()
+
+
 def test_movie_page(test_client):
     """Test specific movie page."""
 
@@ -171,6 +429,178 @@ def test_search_movie(test_client):
     assert b'<span>No movies were found</span>' in response.data
 
 
+def test_search_movie_full_text(test_client, new_movie):
+    """Test full-text search of movies."""
+
+    db.session.add(new_movie)
+    db.session.commit()
+
+    try:
+        # accents are ignored and incomplete words match
+        for prompt in ['Gekijô-ban', 'gekijo', 'Magoko', 'the magokoro air']:
+            response = test_client.post('/movies/search-movie', data={'search': prompt})
+            assert f'<h5 class="card-title">{new_movie.name}</h5>'.encode('UTF-8') in response.data
+
+        # name matches are ranked above matches of people
+        found = db.session.execute(full_text_search(prompt_to_words('Frank Darabont Magokoro'))).scalars().all()
+        assert found[0].id == new_movie.id
+        assert len(found) > 1
+
+        # results are paginated
+        response = test_client.get('/movies/search-movie', query_string={'search': 'the', 'page': 1})
+        assert b'<span>No movies were found</span>' in response.data
+        response = test_client.get('/movies/search-movie', query_string={'search': 'love', 'page': 2})
+        assert response.status_code == 200
+        assert b'search=love' in response.data
+    finally:
+        db.session.query(Movie).filter_by(id=new_movie.id).delete()
+        db.session.commit()
+
+
+def test_search_movie_fuzzy(test_client, new_movie, count_queries):
+    """Test fuzzy search of movies tolerating typos, similar names are paged without counting them."""
+
+    db.session.add(new_movie)
+    db.session.commit()
+
+    try:
+        response = test_client.post('/movies/search-movie', data={'search': 'Magokro'})
+        assert b'<span>No movies were found</span>' in response.data
+        assert b'mode=fuzzy' in response.data
+
+        response = test_client.get(
+            '/movies/search-movie', query_string={'search': 'Magokro', 'mode': 'fuzzy'}
+        )
+        assert f'<h5 class="card-title">{new_movie.name}</h5>'.encode('UTF-8') in response.data
+
+        found = db.session.execute(fuzzy_search(prompt_to_words('Gekijô-ban: Air/Magokoro'))).scalars().all()
+        assert found[0].id == new_movie.id
+
+        response = test_client.get('/movies/search-movie', query_string={'search': 'pkmjnhgs', 'mode': 'fuzzy'})
+        assert b'<span>No movies were found</span>' in response.data
+
+        with count_queries() as statements:
+            response = test_client.get('/movies/search-movie', query_string={'search': 'man', 'mode': 'fuzzy'})
+        assert not any('count(' in statement for statement in statements)
+        assert response.data.count(b'<h5 class="card-title">') == 24
+        assert b'page=2' in response.data
+        response = test_client.get('/movies/search-movie', query_string={'search': 'man', 'mode': 'fuzzy', 'page': 2})
+        assert 0 < response.data.count(b'<h5 class="card-title">') < 24
+        assert b'page=3' not in response.data
+    finally:
+        db.session.query(Movie).filter_by(id=new_movie.id).delete()
+        db.session.commit()
+
+
+def test_search_movie_person(test_client, new_movie):
+    """Test search of movies of the person using normalized people."""
+
+    db.session.add(new_movie)
+    db.session.commit()
+
+    try:
+        found = db.session.execute(person_search('Frank Darabont')).scalars().all()
+        assert [movie.name for movie in found] == ['The Green Mile', 'The Shawshank Redemption', new_movie.name]
+
+        # links follow changes of the movie
+        new_movie.star2 = 'Frank Darabont'
+        new_movie.genre = 'Drama'
+        db.session.commit()
+        assert new_movie in db.session.execute(person_search('Frank Darabont')).scalars().all()
+        assert new_movie not in db.session.execute(person_search('Morgan Freeman')).scalars().all()
+
+        response = test_client.get('/movies/search-movie', query_string={'search': 'Bob Gunton', 'mode': 'person'})
+        assert f'<h5 class="card-title">{new_movie.name}</h5>'.encode('UTF-8') in response.data
+        assert b'<h5 class="card-title">The Shawshank Redemption</h5>' in response.data
+    finally:
+        db.session.query(Movie).filter_by(id=new_movie.id).delete()
+        db.session.commit()
+
+
+def test_autocomplete(test_client, new_movie):
+    """Test search suggestions of movie names and people."""
+
+    response = test_client.get('/movies/autocomplete', query_string={'q': 'shawshank'})
+    assert response.json == [
+        {
+            'label': 'The Shawshank Redemption',
+            'type': 'movie',
+            'url': f'/movies/movie/{db.session.query(Movie).filter_by(name="The Shawshank Redemption").first().id}'
+            '-the-shawshank-redemption',
+        }
+    ]
+    assert test_client.get('/movies/autocomplete', query_string={'q': ''}).json == []
+
+    try:
+        # movie added by this worker is suggested without reloading the index
+        db.session.add(new_movie)
+        db.session.commit()
+        suggestions = test_client.get('/movies/autocomplete', query_string={'q': 'gekijo'}).json
+        assert [suggestion['label'] for suggestion in suggestions] == [new_movie.name]
+
+        # people are suggested once with link to search
+        suggestions = test_client.get('/movies/autocomplete', query_string={'q': 'Frank Dar'}).json
+        assert suggestions == [
+            {'label': 'Frank Darabont', 'type': 'person', 'url': '/movies/search-movie?search=Frank+Darabont&mode=person'}
+        ]
+
+        # index is not queried again for new prompts
+        assert len(autocomplete.suggest('The Godfather', limit=3)) == 3
+        assert new_movie.id in autocomplete.index.movie_ids
+
+        # renamed movie is suggested by its new name only
+        new_movie.name = 'Renamed Gekijo'
+        db.session.commit()
+        suggestions = test_client.get('/movies/autocomplete', query_string={'q': 'renamed gek'}).json
+        assert [suggestion['label'] for suggestion in suggestions] == ['Renamed Gekijo']
+        assert autocomplete.suggest('gekijo') == []
+
+        # movie renamed by another worker in a transaction started before the last refresh and committed after it
+        db.session.execute(
+            update(Movie)
+            .where(Movie.id == new_movie.id)
+            .values(name='Late Gekijo', updated_at=autocomplete.index.refresh_started_at - timedelta(seconds=10))
+        )
+        db.session.commit()
+        autocomplete.refresh(force=True)
+        assert [suggestion[1] for suggestion in autocomplete.suggest('late gek')] == ['Late Gekijo']
+
+        # movie deleted by another worker is removed by the next refresh
+        db.session.query(Movie).filter_by(id=new_movie.id).delete()
+        db.session.commit()
+        autocomplete.refresh(force=True)
+        assert autocomplete.suggest('renamed gek') == []
+        assert new_movie.id not in autocomplete.index.movie_ids
+    finally:
+        db.session.query(Movie).filter_by(id=new_movie.id).delete()
+        db.session.commit()
+
+
+def test_prefix_index():
+    """Test prefix index search."""
+
+    index = PrefixIndex()
+    index.add_movies([(1, 'The Dark Knight', 'Christopher Nolan', 'Christian Bale', 'Heath Ledger', 'Aaron Eckhart',
+                       'Michael Caine')])
+    index.add_movies([(2, 'Amélie', 'Jean-Pierre Jeunet', 'Audrey Tautou', 'Mathieu Kassovitz', 'Rufus',
+                       'Lorella Cravotta'), (3, 'Dark', 'Christopher Nolan', 'Someone', 'Else', 'Here', 'Now')])
+
+    assert [entry[1] for entry in index.search('dark', 10)] == ['Dark', 'The Dark Knight']
+    assert [entry[1] for entry in index.search('the da', 10)] == ['The Dark Knight']
+    assert [entry[1] for entry in index.search('AMELIE', 10)] == ['Amélie']
+    assert [entry[1] for entry in index.search('christ', 10)] == ['Christian Bale', 'Christopher Nolan']
+    assert len(index.search('c', 1)) == 1
+    assert index.search('x', 10) == []
+    assert index.movie_ids == {1, 2, 3}
+
+    index.add_movies([(3, 'Light', 'Christopher Nolan', 'Someone', 'Else', 'Here', 'Now')])
+    assert [entry[1] for entry in index.search('dark', 10)] == ['The Dark Knight']
+    assert [entry[1] for entry in index.search('light', 10)] == ['Light']
+    index.remove_movies({1})
+    assert index.search('dark', 10) == []
+    assert index.movie_ids == {2, 3}
+
+
 def test_watch_list_manipulation(test_client, new_movie):
     """Test adding and removing movies from watch history."""
 
@@ -355,6 +785,81 @@ def test_watch_history(test_client, new_movie):
         db.session.commit()
 
 
+def test_watch_history_import_export(test_client, new_user):
+    """Test bulk import of watch history reports errors of lines and export streams the whole history."""
+
+    db.session.add(new_user)
+    db.session.commit()
+    amelie_id = db.session.scalar(db.select(Movie.id).where(Movie.name == 'Amélie'))
+
+    try:
+        test_client.post('/users/login', data={'username': 'TestClient', 'password': 'TestPasswd'})
+        upload = (
+            'title,year,date_watched\n'
+            'the godfather,,2024-01-01\n'
+            'The Godfather,1972,2024-02-01 20:30\n'
+            'Amelie,2001,2024-01-05\n'
+            'Drishyam,,2024-01-06\n'
+            'Drishyam,2015,2024-01-07\n'
+            'Unknown Movie,1999,2024-01-08\n'
+            'Amelie,2001,yesterday\n'
+        )
+        response = test_client.post(
+            '/movies/watch-history/import', data={'file': (io.BytesIO(upload.encode()), 'history.csv')}
+        )
+        assert response.json == {
+            'imported': 4,
+            'failed': 3,
+            'errors': [
+                {'line': 5, 'error': 'several movies named Drishyam, add year'},
+                {'line': 7, 'error': 'unknown movie Unknown Movie'},
+                {'line': 8, 'error': 'invalid date yesterday'},
+            ],
+        }
+
+        response = test_client.post(
+            '/movies/watch-history/import',
+            data=f'{{"movie_id": {amelie_id}, "date_watched": "2024-03-01"}}\nnot json\n\n[1]\n',
+            content_type='application/x-ndjson',
+        )
+        assert response.json['imported'] == 1
+        assert response.json['errors'] == [
+            {'line': 2, 'error': 'invalid JSON object'},
+            {'line': 4, 'error': 'invalid JSON object'},
+        ]
+        response = test_client.post('/movies/watch-history/import', data='x', content_type='text/plain')
+        assert response.status_code == 400
+
+        # watch again dates and recommendations are updated like by adding movies one by one
+        assert db.session.get(User, new_user.id).recommendations_outdated
+        godfather = db.session.get(WatchAgain, (new_user.id, 2))
+        assert godfather.last_watched == datetime(2024, 2, 1, 20, 30)
+        assert godfather.previous_watched == datetime(2024, 1, 1)
+        assert db.session.get(WatchAgain, (new_user.id, amelie_id)).previous_watched == datetime(2024, 1, 5)
+
+        response = test_client.get('/movies/watch-history/export')
+        assert response.mimetype == 'text/csv'
+        lines = response.text.splitlines()
+        assert lines[0] == 'movie_id,title,year,date_watched'
+        assert lines[1] == '2,The Godfather,1972,2024-01-01T00:00:00'
+        assert len(lines) == 6
+
+        response = test_client.get('/movies/watch-history/export', query_string={'format': 'ndjson'})
+        entries = [json.loads(line) for line in response.text.splitlines()]
+        assert entries[-1] == {
+            'movie_id': amelie_id,
+            'title': 'Amélie',
+            'year': 2001,
+            'date_watched': '2024-03-01T00:00:00',
+        }
+        assert len(entries) == 5
+    finally:
+        db.session.query(WatchAgain).filter_by(user_id=new_user.id).delete()
+        db.session.query(WatchList).filter_by(user_id=new_user.id).delete()
+        db.session.query(User).filter_by(username=new_user.username).delete()
+        db.session.commit()
+
+
 def test_watch_later_manipulation(test_client, new_movie):
     """Test adding and removing movies from watch later."""
 
@@ -0,0 +1,70 @@
+"""Module testing pool of database connections and its metrics."""
+
+import pytest
+from sqlalchemy import exc, text
+
+import config
+from semwork import create_app
+from semwork.extensions import db
+from semwork.pool import database_pool
+
+
+class SmallPoolConfig(config.LocalTestingConfig):  # pylint: disable=R0903; # flask config class
+    """Configuration with pool of one connection and one overflow connection."""
+
+    DATABASE_POOL_SIZE = 1
+    DATABASE_MAX_OVERFLOW = 1
+    DATABASE_POOL_TIMEOUT = 0.1
+    DATABASE_STATEMENT_TIMEOUT = 1234
+    METRICS_ENABLED = True
+    METRICS_TOKEN = 'secret'
+
+
+class PoolerConfig(config.LocalTestingConfig):  # pylint: disable=R0903; # flask config class
+    """Configuration of connections pooled by external pooler."""
+
+    DATABASE_EXTERNAL_POOLER = True
+    DATABASE_STATEMENT_TIMEOUT = 4321
+
+
+def test_pool_metrics():
+    """Test pool counts checkouts, overflow connections and timeouts."""
+
+    app = create_app(config_class=SmallPoolConfig)
+    with app.app_context():
+        with db.engine.connect() as first:
+            assert first.execute(text('SHOW statement_timeout')).scalar() == '0'
+            with db.engine.connect():
+                assert database_pool.metrics(db.engine)['overflow'] == 1
+                with pytest.raises(exc.TimeoutError):
+                    db.engine.connect()
+
+        pool_metrics = database_pool.metrics(db.engine)
+        assert pool_metrics['checkouts'] == 2
+        assert pool_metrics['overflows'] == 1
+        assert pool_metrics['timeouts'] == 1
+        assert pool_metrics['checked_out'] == 0
+        assert pool_metrics['wait_seconds'] >= pool_metrics['max_wait_seconds'] > 0
+
+        assert app.test_client().get('/metrics').status_code == 401
+        response = app.test_client().get('/metrics', headers={'Authorization': 'Bearer secret'})
+        assert response.mimetype == 'text/plain'
+        assert '# TYPE semwork_db_pool_timeouts counter' in response.text
+        assert 'semwork_db_pool_overflows{pid="' in response.text
+
+
+@pytest.mark.parametrize('config_class, timeout', [(SmallPoolConfig, '1234ms'), (PoolerConfig, '4321ms')])
+def test_statement_timeout(config_class, timeout):
+    """Test transactions of requests set statement timeout, also when connections are pooled by external pooler,
+    while CLI commands and migrations run without it."""
+
+    app = create_app(config_class=config_class)
+    with app.app_context():
+        assert (database_pool.metrics(db.engine) is None) == (config_class is PoolerConfig)
+        assert db.session.execute(text('SHOW statement_timeout')).scalar() == '0'
+        db.session.commit()
+        with app.test_request_context():
+            assert db.session.execute(text('SHOW statement_timeout')).scalar() == timeout
+            db.session.commit()
+            assert db.session.execute(text('SHOW statement_timeout')).scalar() == timeout
+            db.session.commit()
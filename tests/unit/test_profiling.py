@@ -0,0 +1,40 @@
+"""Module testing profiling of requests."""
+
+import logging
+
+import config
+from semwork import create_app
+
+
+class ProfilingConfig(config.LocalTestingConfig):  # pylint: disable=R0903; # flask config class
+    """Configuration profiling requests and logging all queries as slow."""
+
+    PROFILING_ENABLED = True
+    PROFILING_SLOW_QUERY_MS = 0
+    METRICS_ENABLED = True
+
+
+def test_profiling(test_client, caplog):  # pylint: disable=W0613; # test client creates the database
+    """Test profiled requests send Server-Timing header, log slow queries and add totals to metrics."""
+
+    client = create_app(config_class=ProfilingConfig).test_client()
+    with caplog.at_level(logging.WARNING):
+        response = client.get('/movies/browse')
+
+    timings = dict(metric.split(';', 1) for metric in response.headers['Server-Timing'].split(', '))
+    assert set(timings) == {'app', 'db', 'template'}
+    queries = int(timings['db'].split('desc="')[1].split(' ')[0])
+    assert queries > 0
+    assert sum('Slow query' in record.getMessage() for record in caplog.records) == queries
+
+    metrics = client.get('/metrics').text
+    assert '# TYPE semwork_sql_queries counter' in metrics
+    assert 'semwork_sql_queries{pid="' in metrics
+    assert f'endpoint="movies.browse"}} {queries}' in metrics
+    assert 'semwork_template_seconds{' in metrics
+
+
+def test_profiling_disabled(test_client):
+    """Test requests are not profiled by default."""
+
+    assert 'Server-Timing' not in test_client.get('/movies/browse').headers
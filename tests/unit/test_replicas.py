@@ -0,0 +1,128 @@
+"""Module testing routing of reads to replicas."""
+
+import pytest
+from flask import g
+from sqlalchemy import create_engine, make_url, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy_utils import create_database, database_exists, drop_database
+
+import config
+from semwork import create_app
+from semwork.extensions import db
+from semwork.cache import cache
+from semwork.replicas import is_read, parse_lsn, replica_lsn
+from semwork.models.movie import Movie
+from semwork.models.user import User
+from semwork.movies.catalogue import catalogue
+
+REPLICA_URI = make_url(config.LocalTestingConfig.SQLALCHEMY_DATABASE_URI).set(database='replica_db')
+
+
+@pytest.fixture
+def replica_client(test_client):  # pylint: disable=W0613; # test client creates the primary database
+    """Fixture for creating test app reading from a replica, which is a separate database with one movie."""
+
+    if database_exists(REPLICA_URI):
+        drop_database(REPLICA_URI)
+    create_database(REPLICA_URI)
+    engine = create_engine(REPLICA_URI)
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(
+            Movie(
+                'Replica Movie', 'https://replica', 2000, '1 min', 'Drama', 5.0, 'Replica', 'A', 'B', 'C', 'D', 'E', 1
+            )
+        )
+        session.commit()
+    engine.dispose()
+
+    class ReplicaConfig(config.LocalTestingConfig):  # pylint: disable=R0903; # flask config class
+        DATABASE_REPLICA_URIS = [REPLICA_URI.render_as_string(hide_password=False)]
+
+    test_app = create_app(config_class=ReplicaConfig)
+    yield test_app.test_client()
+
+    for engine in test_app.extensions['replicas']:
+        engine.dispose()
+    drop_database(REPLICA_URI)
+
+
+def test_replica_reads(replica_client):
+    """Test read-only pages read from the replica until the client writes to the primary."""
+
+    response = replica_client.get('/movies/browse')
+    assert b'Replica Movie' in response.data
+    assert b'The Shawshank Redemption' not in response.data
+
+    try:
+        # writes go to the primary and the client reads its writes from the primary
+        response = replica_client.post('/users/register', data={'username': 'ReplicaUser', 'password': 'Passwd'})
+        assert response.status_code == 302
+        assert db.session.query(User).filter_by(username='ReplicaUser').count() == 1
+        response = replica_client.get('/movies/browse')
+        assert b'Replica Movie' not in response.data
+        assert b'The Shawshank Redemption' in response.data
+
+        # other clients still read from the replica
+        other_client = replica_client.application.test_client()
+        assert b'Replica Movie' in other_client.get('/movies/browse').data
+        assert b'Replica Movie' in other_client.get('/movies/search-movie?search=replica').data
+    finally:
+        db.session.query(User).filter_by(username='ReplicaUser').delete()
+        db.session.commit()
+
+
+def test_is_read():
+    """Test SELECTs, also textual ones, are recognized as reads."""
+
+    assert is_read(select(Movie))
+    assert is_read(text('  select * FROM movie'))
+    assert is_read(text('SELECT id FROM movie').columns())
+    assert not is_read(text('UPDATE movie SET name = name'))
+    assert not is_read(text('SELECTED'))
+    assert parse_lsn('16/B374D848') == 0x16B374D848
+    assert parse_lsn(None) == 0
+
+
+def test_replica_reads_not_cached(replica_client):
+    """Test pages rendered from the replica, which is not a standby and does not know its replayed position,
+    are not cached and records of the catalogue are read from the primary."""
+
+    class CachedReplicaConfig(config.LocalTestingConfig):  # pylint: disable=R0903; # flask config class
+        DATABASE_REPLICA_URIS = replica_client.application.config['DATABASE_REPLICA_URIS']
+        CACHE_BACKEND = 'lru'
+
+    app = create_app(config_class=CachedReplicaConfig)
+    movie = db.session.scalars(select(Movie).order_by(Movie.id).limit(1)).one()
+    try:
+        client = app.test_client()
+        for _ in range(2):
+            response = client.get('/movies/browse')
+            assert b'Replica Movie' in response.data
+            assert response.headers['X-Cache'] == 'MISS'
+
+        with app.test_request_context():
+            g.replica_reads = True
+            assert catalogue.get(movie.id).name == movie.name
+            assert replica_lsn() is None
+    finally:
+        for engine in app.extensions['replicas']:
+            engine.dispose()
+
+
+def test_replica_reads_cached_after_replay(test_client):  # pylint: disable=W0613; # test client creates the database
+    """Test values read from a replica are cached only when the replica replayed changes of the current version."""
+
+    class CachedConfig(config.LocalTestingConfig):  # pylint: disable=R0903; # flask config class
+        CACHE_BACKEND = 'lru'
+
+    app = create_app(config_class=CachedConfig)
+    with app.test_request_context():
+        version, version_lsn = cache.versions()
+        g.replica_read = True
+        g.replica_lsn = version_lsn - 1
+        cache.set('fragment', 'behind', 'value')
+        g.replica_lsn = version_lsn
+        cache.set('fragment', 'replayed', 'value')
+        assert cache.backend.get(f'fragment:{version}:behind') is None
+        assert cache.backend.get(f'fragment:{version}:replayed') == 'value'
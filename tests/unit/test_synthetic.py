@@ -0,0 +1,95 @@
+"""Module testing generator of synthetic data."""
+
+import numpy as np
+import pytest
+from sqlalchemy import func, make_url, select
+from sqlalchemy_utils import create_database, database_exists, drop_database
+
+import config
+from semwork import create_app
+from semwork.extensions import db
+from semwork.models.movie import Movie
+from semwork.models.movie_genre import MovieGenre
+from semwork.models.movie_person import MoviePerson
+from semwork.models.user import User
+from semwork.models.watch_again import WatchAgain
+from semwork.models.watch_list import WatchList
+from semwork.synthetic import GENRES, generate_movie_rows
+
+
+class SyntheticConfig(config.LocalTestingConfig):  # pylint: disable=R0903; # flask config class
+    """Configuration using empty database for generated data."""
+
+    SQLALCHEMY_DATABASE_URI = (
+        make_url(config.LocalTestingConfig.SQLALCHEMY_DATABASE_URI)
+        .set(database='synthetic_db')
+        .render_as_string(hide_password=False)
+    )
+
+
+@pytest.fixture
+def synthetic_app():
+    """Fixture for creating test app using empty database."""
+
+    if database_exists(SyntheticConfig.SQLALCHEMY_DATABASE_URI):
+        drop_database(SyntheticConfig.SQLALCHEMY_DATABASE_URI)
+    create_database(SyntheticConfig.SQLALCHEMY_DATABASE_URI)
+    test_app = create_app(config_class=SyntheticConfig)
+    with test_app.app_context():
+        db.create_all()
+    yield test_app
+
+    with test_app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    drop_database(SyntheticConfig.SQLALCHEMY_DATABASE_URI)
+
+
+def test_generated_rows_deterministic():
+    """Test rows generated by the same seed are the same and titles are unique in their year."""
+
+    first = generate_movie_rows(np.random.default_rng(1), list(range(2000)), 100, {}, set())
+    second = generate_movie_rows(np.random.default_rng(1), list(range(2000)), 100, {}, set())
+    assert first == second
+    assert len({(row[1], row[5]) for row in first}) == 2000
+    assert all(set(row[8].split(', ')) <= set(GENRES) for row in first)
+
+    existing = {(first[0][1], first[0][5])}
+    third = generate_movie_rows(np.random.default_rng(1), list(range(2000)), 100, {}, existing)
+    assert third[0][1] == f'{first[0][1]} 2'
+
+
+def test_generate_command(synthetic_app):
+    """Test generated movies are linked to genres and people and users have watch histories."""
+
+    result = synthetic_app.test_cli_runner().invoke(
+        args=['movies', 'generate', '--movies', '300', '--users', '20', '--seed', '3']
+    )
+    assert result.exit_code == 0, result.output
+    assert 'Movies generated: 300' in result.output
+
+    with synthetic_app.app_context():
+        assert db.session.scalar(select(func.count()).select_from(Movie)) == 300
+        assert db.session.scalar(select(func.count(func.distinct(MovieGenre.movie_id)))) == 300
+        assert db.session.scalar(select(func.count()).select_from(MoviePerson)) == 1500
+        assert db.session.scalar(select(func.count()).select_from(User)) == 20
+
+        sizes = db.session.scalars(select(func.count()).select_from(WatchList).group_by(WatchList.user_id)).all()
+        assert len(sizes) == 20
+        assert min(sizes) >= 5
+        # every movie watched by a user has its last watch date
+        pairs = select(WatchList.user_id, WatchList.movie_id).distinct().subquery()
+        assert db.session.scalar(select(func.count()).select_from(pairs)) == db.session.scalar(
+            select(func.count()).select_from(WatchAgain)
+        )
+        assert db.session.scalar(select(func.count()).select_from(WatchAgain).where(WatchAgain.next_due.isnot(None)))
+
+    # users generated by the same seed again are numbered after the existing ones
+    result = synthetic_app.test_cli_runner().invoke(
+        args=['movies', 'generate', '--movies', '0', '--users', '5', '--seed', '3']
+    )
+    assert result.exit_code == 0, result.output
+    with synthetic_app.app_context():
+        usernames = db.session.scalars(select(User.username)).all()
+        assert len(set(usernames)) == 25
+        assert 'synthetic-3-24' in usernames